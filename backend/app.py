@@ -1,13 +1,20 @@
 import os
-from flask import Flask, request, jsonify
+import threading
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import google.generativeai as genai
-from PIL import Image, ImageDraw, ImageFont
-import base64
-import io
-from datetime import datetime
 import requests
-from bs4 import BeautifulSoup
+
+from rendering import (
+    DesignImageCall,
+    engine_metrics,
+    engine_stats,
+    error_response,
+    readiness,
+    start_engine,
+    warm_up_engine,
+)
+from scraping import ContentExtractor
 
 from dotenv import load_dotenv  # <-- NEW
 
@@ -15,7 +22,7 @@ from dotenv import load_dotenv  # <-- NEW
 load_dotenv()
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["ETag", "X-Preview-Scale", "Server-Timing"])
 
 # Fetch API key from environment
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -24,796 +31,10 @@ genai.configure(api_key=GEMINI_API_KEY)
 
 model = genai.GenerativeModel('gemini-pro')
 
-# --- Helper function for image generation ---
-def generate_image_from_design(design_data, template_type, image_width, image_height):
-    try:
-        bg_color = design_data.get('bgColor', '#ffffff')
-        text_color = design_data.get('textColor', '#333333')
-        user_font_family = design_data.get('fontFamily', 'Arial')
-        main_text = design_data.get('text', '')
-        sub_text = design_data.get('subText', '')
-        offer_details = design_data.get('offerDetails', '')
-        phone_number = design_data.get('phoneNumber', '')
-        email = design_data.get('email', '')
-        website = design_data.get('website', '')
-        logo_base64 = design_data.get('logo')
-        logo_position = design_data.get('logoPosition', {'x': 0, 'y': 0})
-
-        img = Image.new('RGB', (image_width, image_height), color=bg_color)
-        d = ImageDraw.Draw(img)
-
-        # Centralized font loading function
-        def get_robust_font(size, preferred_font_name=None):
-            if preferred_font_name:
-                try:
-                    return ImageFont.truetype(preferred_font_name + ".ttf", size)
-                except IOError:
-                    try:
-                        return ImageFont.truetype(preferred_font_name, size)
-                    except IOError:
-                        pass
-
-            bundled_font_path = os.path.join(os.path.dirname(__file__), "DejaVuSans.ttf")
-            if os.path.exists(bundled_font_path):
-                try:
-                    return ImageFont.truetype(bundled_font_path, size)
-                except IOError:
-                    print(f"Warning: Could not load bundled font {bundled_font_path}. Trying system fonts.")
-            else:
-                print(f"Warning: Bundled font {bundled_font_path} not found. Trying system fonts.")
-
-            try:
-                return ImageFont.truetype("arial.ttf", size)
-            except IOError:
-                try:
-                    return ImageFont.truetype("sans-serif.ttf", size)
-                except IOError:
-                    print(f"Warning: Could not load any truetype font. Using default Pillow font.")
-                    return ImageFont.load_default()
-
-        # Function to draw text with basic wrapping
-        # Returns the total height occupied by the wrapped text block
-        def draw_text_wrapped(draw, text, font, fill, xy, max_width, line_spacing_factor=1.2):
-            lines = []
-            words = text.split()
-            current_line = []
-            
-            # Calculate average line height based on a sample character
-            try:
-                sample_text_bbox = draw.textbbox((0,0), "Tg", font=font)
-                base_line_height = sample_text_bbox[3] - sample_text_bbox[1]
-                if base_line_height == 0: # Avoid division by zero or tiny height
-                    base_line_height = font.size if hasattr(font, 'size') and font.size > 0 else 20
-            except Exception:
-                base_line_height = font.size if hasattr(font, 'size') and font.size > 0 else 20
-            
-            line_height = base_line_height * line_spacing_factor
-
-            for word in words:
-                test_line = ' '.join(current_line + [word])
-                bbox = draw.textbbox((0,0), test_line, font=font)
-                text_width = bbox[2] - bbox[0]
-                if text_width <= max_width:
-                    current_line.append(word)
-                else:
-                    lines.append(' '.join(current_line))
-                    current_line = [word]
-            lines.append(' '.join(current_line))
-
-            y_start = xy[1]
-            y_offset = 0
-            for line in lines:
-                bbox = draw.textbbox((0,0), line, font=font)
-                line_width = bbox[2] - bbox[0]
-                draw.text((xy[0] + (max_width - line_width) / 2, y_start + y_offset), line, font=font, fill=fill)
-                y_offset += line_height
-            return y_offset # Return total height used by the wrapped text block
-
-        # Add logo if provided
-        if logo_base64:
-            try:
-                logo_data = base64.b64decode(logo_base64.split(',')[1])
-                logo_img = Image.open(io.BytesIO(logo_data)).convert("RGBA")
-                
-                logo_w, logo_h = 80, 80
-                logo_x, logo_y = 0, 0
-
-                if template_type == 'poster':
-                    logo_w, logo_h = 80, 80
-                    logo_x, logo_y = 20, 20
-                elif template_type == 'businessCard':
-                    logo_w, logo_h = 60, 60
-                    logo_x = (image_width - logo_w) // 2
-                    logo_y = 20
-                elif template_type == 'modernEventPoster':
-                    logo_w, logo_h = 70, 70
-                    logo_x = (image_width - logo_w) // 2
-                    logo_y = 30
-                elif template_type == 'minimalistBusinessCard':
-                    logo_w, logo_h = 50, 50
-                    logo_x, logo_y = 20, 20
-                elif template_type == 'vibrantOfferPoster':
-                    logo_w, logo_h = 60, 60
-                    logo_x = (image_width - logo_w) // 2
-                    logo_y = 25
-                elif template_type == 'professionalFlyer':
-                    logo_w, logo_h = 70, 70
-                    logo_x = image_width - logo_w - 30
-                    logo_y = 30
-                elif template_type == 'socialMediaPost':
-                    logo_w, logo_h = 60, 60
-                    logo_x, logo_y = 20, 20
-                elif template_type == 'eventTicket':
-                    logo_w, logo_h = 40, 40
-                    logo_x = image_width - logo_w - 20
-                    logo_y = 20
-                elif template_type == 'traditionalIndianBusinessCard':
-                    logo_w, logo_h = 60, 60
-                    logo_x, logo_y = 20, 20
-                elif template_type == 'productDiscountBanner':
-                    logo_w, logo_h = 70, 70
-                    logo_x, logo_y = 20, 20
-                elif template_type == 'inspirationalQuoteCard':
-                    logo_w, logo_h = 50, 50
-                    logo_x, logo_y = image_width - logo_w - 20, 20
-                elif template_type == 'eventInvitationCard':
-                    logo_w, logo_h = 60, 60
-                    logo_x, logo_y = image_width - logo_w - 25, 25
-                elif template_type == 'productShowcasePost':
-                    logo_w, logo_h = 80, 80
-                    logo_x, logo_y = (image_width - logo_w) // 2, 30
-                elif template_type == 'limitedTimeOfferBanner':
-                    logo_w, logo_h = 60, 60
-                    logo_x, logo_y = 20, 20
-                elif template_type == 'elegantContactCard':
-                    logo_w, logo_h = 60, 60
-                    logo_x, logo_y = (image_width - logo_w) // 2, 25
-                elif template_type == 'modernTechBusinessCard':
-                    logo_w, logo_h = 70, 70
-                    logo_x, logo_y = (image_width * 0.15) - (logo_w // 2), (image_height // 2) - (logo_h // 2)
-                elif template_type == 'minimalistQrCodeCard':
-                    logo_w, logo_h = 50, 50
-                    logo_x, logo_y = 20, 20
-
-                logo_img = logo_img.resize((logo_w, logo_h))
-                
-                final_logo_x = logo_x + logo_position['x']
-                final_logo_y = logo_y + logo_position['y']
-
-                img.paste(logo_img, (final_logo_x, final_logo_y), logo_img)
-            except Exception as e:
-                print(f"Error processing logo: {e}")
-
-        # --- Template-specific rendering logic ---
-        if template_type == 'poster':
-            main_font = get_robust_font(40, user_font_family)
-            sub_font = get_robust_font(25, user_font_family)
-            offer_font = get_robust_font(22, user_font_family)
-            small_font = get_robust_font(18, user_font_family)
-            
-            text_y_offset = 150 if logo_base64 else 50
-            
-            # Main Text
-            bbox_main = d.textbbox((0,0), main_text or 'Your Poster Title', font=main_font)
-            main_text_width = bbox_main[2] - bbox_main[0]
-            main_text_x = (image_width - main_text_width) / 2
-            main_text_y = text_y_offset
-            d.text((main_text_x, main_text_y), main_text or 'Your Poster Title', font=main_font, fill=text_color)
-
-            # Sub Text
-            bbox_sub = d.textbbox((0,0), sub_text or 'Catchy slogan or details here.', font=sub_font)
-            sub_text_width = bbox_sub[2] - bbox_sub[0]
-            sub_text_x = (image_width - sub_text_width) / 2
-            sub_text_y = main_text_y + main_font.size + 20
-            d.text((sub_text_x, sub_text_y), sub_text or 'Catchy slogan or details here.', font=sub_font, fill=text_color)
-
-            # Offer Details
-            if offer_details:
-                offer_font = get_robust_font(22, user_font_family)
-                bbox_offer = d.textbbox((0,0), offer_details, font=offer_font)
-                offer_width = bbox_offer[2] - bbox_offer[0]
-                offer_x = (image_width - offer_width) / 2
-                offer_y = sub_text_y + sub_font.size + 20
-                d.text((offer_x, offer_y), offer_details, font=offer_font, fill='red')
-
-            # Contact Info
-            contact_y = image_height - 80
-            if phone_number:
-                d.text((image_width - 20, contact_y), f"Call: {phone_number}", font=small_font, fill=text_color, anchor="ra")
-                contact_y += small_font.size + 5
-            if website:
-                d.text((image_width - 20, contact_y), f"Visit: {website}", font=small_font, fill=text_color, anchor="ra")
-            elif not phone_number:
-                d.text((image_width - 20, contact_y), "Grogent.com", font=small_font, fill=text_color, anchor="ra")
-
-        elif template_type == 'businessCard':
-            main_font = get_robust_font(30, user_font_family)
-            sub_font = get_robust_font(20, user_font_family)
-            small_font = get_robust_font(16, user_font_family)
-
-            current_y = 80 if logo_base64 else 40
-
-            # Main Text
-            bbox_main = d.textbbox((0,0), main_text or 'Your Business Name', font=main_font)
-            main_text_width = bbox_main[2] - bbox_main[0]
-            d.text(((image_width - main_text_width) / 2, current_y), main_text or 'Your Business Name', font=main_font, fill=text_color)
-            current_y += main_font.size + 10
-
-            # Sub Text
-            bbox_sub = d.textbbox((0,0), sub_text or 'Your Tagline / Name', font=sub_font)
-            sub_text_width = bbox_sub[2] - bbox_sub[0]
-            d.text(((image_width - sub_text_width) / 2, current_y), sub_text or 'Your Tagline / Name', font=sub_font, fill=text_color)
-            current_y += sub_font.size + 20
-
-            # Contact Info
-            d.text((image_width / 2, current_y), f"Contact: {phone_number or '123-456-7890'}", font=small_font, fill=text_color, anchor="mm")
-            current_y += small_font.size + 5
-            d.text((image_width / 2, current_y), f"Email: {email or 'info@example.com'}", font=small_font, fill=text_color, anchor="mm")
-            current_y += small_font.size + 5
-            if website:
-                d.text((image_width / 2, current_y), f"Web: {website}", font=small_font, fill=text_color, anchor="mm")
-
-        elif template_type == 'modernEventPoster':
-            header_height = image_height * 0.25
-
-            # Header
-            d.rectangle([(0, 0), (image_width, header_height)], fill=text_color)
-            
-            header_text_font = get_robust_font(50, user_font_family)
-            bbox_header_text = d.textbbox((0,0), main_text or 'Modern Event', font=header_text_font)
-            header_text_width = bbox_header_text[2] - bbox_header_text[0]
-            d.text(((image_width - header_text_width) / 2, header_height / 2 - header_text_font.size / 2 + (30 if logo_base64 else 0)),
-                   main_text or 'Modern Event', font=header_text_font, fill=bg_color)
-
-            # Body
-            body_main_font = get_robust_font(30, user_font_family)
-            small_font = get_robust_font(18, user_font_family)
-            
-            current_y = header_height + 50
-            
-            # Sub Text
-            bbox_sub = d.textbbox((0,0), sub_text or 'Join Us for an Exciting Experience!', font=body_main_font)
-            sub_text_width = bbox_sub[2] - bbox_sub[0]
-            d.text(((image_width - sub_text_width) / 2, current_y), sub_text or 'Join Us for an Exciting Experience!', font=body_main_font, fill=text_color)
-            current_y += body_main_font.size + 20
-
-            # Offer Details
-            if offer_details:
-                offer_font = get_robust_font(24, user_font_family)
-                bbox_offer = d.textbbox((0,0), offer_details, font=offer_font)
-                offer_width = bbox_offer[2] - bbox_offer[0]
-                d.text(((image_width - offer_width) / 2, current_y), offer_details, font=offer_font, fill='red')
-                current_y += offer_font.size + 30
-
-            # Call to Action
-            cta_text = website if website else 'Learn More at Grogent.com'
-            cta_font = get_robust_font(22, user_font_family)
-            bbox_cta = d.textbbox((0,0), cta_text, font=cta_font)
-            cta_width = bbox_cta[2] - bbox_cta[0] + 40
-            cta_height = bbox_cta[3] - bbox_cta[1] + 20
-            
-            cta_x = (image_width - cta_width) / 2
-            cta_y = current_y
-            d.rectangle([(cta_x, cta_y), (cta_x + cta_width, cta_y + cta_height)], fill=text_color, radius=5)
-            d.text((cta_x + 20, cta_y + 10), cta_text, font=cta_font, fill=bg_color)
-            current_y += cta_height + 20
-
-            if phone_number:
-                d.text((image_width / 2, current_y), f"Contact: {phone_number}", font=small_font, fill=text_color, anchor="mm")
-
-        elif template_type == 'minimalistBusinessCard':
-            main_font = get_robust_font(35, user_font_family)
-            sub_font = get_robust_font(22, user_font_family)
-            small_font = get_robust_font(18, user_font_family)
-
-            current_y = 30
-
-            # Main Text
-            bbox_main = d.textbbox((0,0), main_text or 'Your Name', font=main_font)
-            main_text_width = bbox_main[2] - bbox_main[0]
-            d.text((image_width - 20 - main_text_width, current_y), main_text or 'Your Name', font=main_font, fill=text_color)
-            current_y += main_font.size + 5
-
-            # Sub Text
-            bbox_sub = d.textbbox((0,0), sub_text or 'Your Professional Title', font=sub_font)
-            sub_text_width = bbox_sub[2] - bbox_sub[0]
-            d.text((image_width - 20 - sub_text_width, current_y), sub_text or 'Your Professional Title', font=sub_font, fill=text_color)
-            current_y += sub_font.size + 20
-
-            # Contact Info
-            contact_y = image_height - 20 - (small_font.size + 5) * (3 if website else (2 if email else 1))
-            if website:
-                bbox_web = d.textbbox((0,0), website, font=small_font)
-                web_width = bbox_web[2] - bbox_web[0]
-                d.text((image_width - 20 - web_width, contact_y), website, font=small_font, fill=text_color)
-                contact_y -= (small_font.size + 5)
-            if email:
-                bbox_email = d.textbbox((0,0), email, font=small_font)
-                email_width = bbox_email[2] - bbox_email[0]
-                d.text((image_width - 20 - email_width, contact_y), email, font=small_font, fill=text_color)
-                contact_y -= (small_font.size + 5)
-            if phone_number:
-                bbox_phone = d.textbbox((0,0), phone_number, font=small_font)
-                phone_width = bbox_phone[2] - bbox_phone[0]
-                d.text((image_width - 20 - phone_width, contact_y), phone_number, font=small_font, fill=text_color)
-            elif not (phone_number or email or website):
-                d.text((image_width - 20 - d.textbbox((0,0), '+1 (234) 567-8900', font=small_font)[2], contact_y), '+1 (234) 567-8900', font=small_font, fill=text_color)
-                contact_y -= (small_font.size + 5)
-                d.text((image_width - 20 - d.textbbox((0,0), 'email@example.com', font=small_font)[2], contact_y), 'email@example.com', font=small_font, fill=text_color)
-                contact_y -= (small_font.size + 5)
-                d.text((image_width - 20 - d.textbbox((0,0), 'yourwebsite.com', font=small_font)[2], contact_y), 'yourwebsite.com', font=small_font, fill=text_color)
-
-        elif template_type == 'vibrantOfferPoster':
-            header_height = image_height * 0.25
-
-            # Header
-            d.rectangle([(0, 0), (image_width, header_height)], fill=text_color)
-            
-            header_text_font = get_robust_font(50, user_font_family)
-            bbox_header_text = d.textbbox((0,0), main_text or 'BIG SALE!', font=header_text_font)
-            header_text_width = bbox_header_text[2] - bbox_header_text[0]
-            d.text(((image_width - header_text_width) / 2, header_height / 2 - header_text_font.size / 2 + (30 if logo_base64 else 0)),
-                   main_text or 'BIG SALE!', font=header_text_font, fill=bg_color)
-
-            # Body
-            body_main_font = get_robust_font(35, user_font_family)
-            small_font = get_robust_font(18, user_font_family)
-            
-            current_y = header_height + 50
-            
-            # Sub Text
-            bbox_sub = d.textbbox((0,0), sub_text or 'Up to 50% Off Everything!', font=body_main_font)
-            sub_text_width = bbox_sub[2] - bbox_sub[0]
-            d.text(((image_width - sub_text_width) / 2, current_y), sub_text or 'Up to 50% Off Everything!', font=body_main_font, fill=text_color)
-            current_y += body_main_font.size + 20
-
-            # Offer Details
-            if offer_details:
-                offer_font = get_robust_font(28, user_font_family)
-                bbox_offer = d.textbbox((0,0), offer_details, font=offer_font)
-                offer_width = bbox_offer[2] - bbox_offer[0]
-                d.text(((image_width - offer_width) / 2, current_y), offer_details, font=offer_font, fill='darkred')
-                current_y += offer_font.size + 30
-
-            # Call to Action
-            cta_text = website if website else 'Shop Now!'
-            cta_font = get_robust_font(26, user_font_family)
-            bbox_cta = d.textbbox((0,0), cta_text, font=cta_font)
-            cta_width = bbox_cta[2] - bbox_cta[0] + 50
-            cta_height = bbox_cta[3] - bbox_cta[1] + 30
-            
-            cta_x = (image_width - cta_width) / 2
-            cta_y = current_y
-            d.rounded_rectangle([(cta_x, cta_y), (cta_x + cta_width, cta_y + cta_height)], radius=50, fill='red')
-            d.text((cta_x + 25, cta_y + 15), cta_text, font=cta_font, fill='white')
-            current_y += cta_height + 20
-
-            if phone_number:
-                d.text((image_width / 2, image_height - 80), f"Call: {phone_number}", font=small_font, fill=text_color, anchor="mm")
-            
-            d.text((image_width / 2, image_height - 30), "Limited Time Offer", font=small_font, fill=text_color, anchor="mm")
-
-        elif template_type == 'professionalFlyer':
-            main_font = get_robust_font(55, user_font_family)
-            sub_font = get_robust_font(30, user_font_family)
-            body_font = get_robust_font(22, user_font_family)
-            small_font = get_robust_font(20, user_font_family)
-
-            current_y = 30
-
-            # Main Text
-            height_used = draw_text_wrapped(d, main_text or 'Professional Service', main_font, text_color, (30, current_y), image_width - 60 - (100 if logo_base64 else 0))
-            current_y += height_used + 15
-
-            # Sub Text
-            height_used = draw_text_wrapped(d, sub_text or 'Your Tagline Goes Here', sub_font, text_color, (30, current_y), image_width - 60)
-            current_y += height_used + 25
-
-            # Offer Details / Body Text
-            height_used = draw_text_wrapped(d, offer_details or 'Discover how our solutions can help your business grow. We offer unparalleled quality and dedicated support.', body_font, text_color, (30, current_y), image_width - 60)
-            current_y += height_used + 30
-
-            # Contact Section
-            d.line([(30, current_y), (image_width - 30, current_y)], fill=text_color, width=1)
-            current_y += 20
-
-            if phone_number:
-                d.text((30, current_y), f"Phone: {phone_number}", font=small_font, fill=text_color)
-                current_y += small_font.size + 5
-            if email:
-                d.text((30, current_y), f"Email: {email}", font=small_font, fill=text_color)
-                current_y += small_font.size + 5
-            if website:
-                d.text((30, current_y), f"Website: {website}", font=small_font, fill=text_color)
-            elif not (phone_number or email):
-                d.text((30, current_y), "Learn more at Grogent.com", font=small_font, fill=text_color)
-
-        elif template_type == 'socialMediaPost':
-            main_font = get_robust_font(40, user_font_family)
-            sub_font = get_robust_font(30, user_font_family)
-            cta_font = get_robust_font(22, user_font_family)
-            
-            current_y = 20
-
-            # Header (Brand Name)
-            brand_name = main_text or 'Your Brand Name'
-            bbox_brand = d.textbbox((0,0), brand_name, font=sub_font)
-            brand_width = bbox_brand[2] - bbox_brand[0]
-            d.text((20 + (80 if logo_base64 else 0), current_y + (60 - sub_font.size) / 2), brand_name, font=sub_font, fill=text_color)
-            current_y += 80
-
-            # Main Content
-            content_center_y = image_height / 2
-            
-            # Sub Text (Product Launch)
-            bbox_sub = d.textbbox((0,0), sub_text or 'New Product Launch!', font=main_font)
-            sub_text_width = bbox_sub[2] - bbox_sub[0]
-            d.text(((image_width - sub_text_width) / 2, content_center_y - main_font.size - 15), sub_text or 'New Product Launch!', font=main_font, fill=text_color)
-
-            # Offer Details
-            if offer_details:
-                bbox_offer = d.textbbox((0,0), offer_details, font=sub_font)
-                offer_width = bbox_offer[2] - bbox_offer[0]
-                d.text(((image_width - offer_width) / 2, content_center_y + 15), offer_details, font=sub_font, fill='green')
-                
-            # Call to Action
-            cta_text = f"Shop Now: {website.replace('https://', '').replace('http://', '').replace('www.', '')}" if website else 'Learn More'
-            bbox_cta = d.textbbox((0,0), cta_text, font=cta_font)
-            cta_width = bbox_cta[2] - bbox_cta[0] + 40
-            cta_height = bbox_cta[3] - bbox_cta[1] + 20
-            
-            cta_x = (image_width - cta_width) / 2
-            cta_y = image_height - 80
-            d.rectangle([(cta_x, cta_y), (cta_x + cta_width, cta_y + cta_height)], fill=text_color, radius=5)
-            d.text((cta_x + 20, cta_y + 10), cta_text, font=cta_font, fill=bg_color)
-
-        elif template_type == 'eventTicket':
-            main_font = get_robust_font(35, user_font_family)
-            detail_font = get_robust_font(22, user_font_family)
-            small_font = get_robust_font(18, user_font_family)
-
-            # Left stripe
-            d.rectangle([(0, 0), (10, image_height)], fill=text_color)
-
-            current_y = 20
-
-            # Header (Event Name)
-            event_name = main_text or 'Event Name'
-            bbox_event = d.textbbox((0,0), event_name, font=main_font)
-            event_width = bbox_event[2] - bbox_event[0]
-            d.text((20, current_y), event_name, font=main_font, fill=text_color)
-            current_y += main_font.size + 15
-
-            # Details
-            d.text((20, current_y), f"Date: {sub_text or 'DD/MM/YYYY'}", font=detail_font, fill=text_color)
-            current_y += detail_font.size + 5
-            d.text((20, current_y), f"Time: {offer_details or 'HH:MM AM/PM'}", font=detail_font, fill=text_color)
-            current_y += detail_font.size + 5
-            d.text((20, current_y), f"Location: {website or 'Venue Address'}", font=detail_font, fill=text_color)
-            current_y += detail_font.size + 5
-
-            # Footer (Ticket ID)
-            ticket_id = f"Ticket ID: #GRG{datetime.now().microsecond % 9000 + 1000}"
-            bbox_id = d.textbbox((0,0), ticket_id, font=small_font)
-            id_width = bbox_id[2] - bbox_id[0]
-            d.text((image_width - 20 - id_width, image_height - 30), ticket_id, font=small_font, fill=text_color)
-
-        elif template_type == 'traditionalIndianBusinessCard':
-            top_bg_color = '#004d40'
-            top_text_color = '#ffeb3b'
-            bottom_bg_color = '#e0b973'
-            bottom_text_color = '#004d40'
-
-            d.rectangle([(0, 0), (image_width, image_height // 2)], fill=top_bg_color)
-            d.rectangle([(0, image_height // 2), (image_width, image_height)], fill=bottom_bg_color)
-
-            main_font = get_robust_font(28, user_font_family)
-            sub_font = get_robust_font(18, user_font_family)
-            small_font = get_robust_font(16, user_font_family)
-
-            main_text_content = main_text or 'Your Business Name'
-            bbox_main = d.textbbox((0,0), main_text_content, font=main_font)
-            main_text_width = bbox_main[2] - bbox_main[0]
-            main_text_x = image_width - main_text_width - 20
-            main_text_y = (image_height // 2) / 2 - main_font.size / 2 - 10
-            d.text((main_text_x, main_text_y), main_text_content, font=main_font, fill=top_text_color)
-
-            sub_text_content = sub_text or 'Crafting Excellence'
-            bbox_sub = d.textbbox((0,0), sub_text_content, font=sub_font)
-            sub_text_width = bbox_sub[2] - bbox_sub[0]
-            sub_text_x = image_width - sub_text_width - 20
-            sub_text_y = main_text_y + main_font.size + 5
-            d.text((sub_text_x, sub_text_y), sub_text_content, font=sub_font, fill=top_text_color)
-
-            contact_lines = []
-            if phone_number:
-                contact_lines.append(phone_number)
-            if email:
-                contact_lines.append(email)
-            if website:
-                contact_lines.append(website)
-            
-            if not contact_lines:
-                contact_lines.append('+91 98765 43210')
-                contact_lines.append('contact@indianbiz.com')
-
-            total_contact_height = sum([small_font.size * 1.3 for _ in contact_lines])
-            current_contact_y = (image_height // 2) + (image_height // 2) / 2 - total_contact_height / 2
-
-            for line in contact_lines:
-                bbox_line = d.textbbox((0,0), line, font=small_font)
-                line_width = bbox_line[2] - bbox_line[0]
-                d.text(((image_width - line_width) / 2, current_contact_y), line, font=small_font, fill=bottom_text_color)
-                current_contact_y += small_font.size * 1.3
-
-        elif template_type == 'productDiscountBanner':
-            main_font = get_robust_font(60, user_font_family)
-            sub_font = get_robust_font(35, user_font_family)
-            offer_font = get_robust_font(25, user_font_family)
-            website_font = get_robust_font(22, user_font_family)
-
-            content_width = image_width - 40
-            content_x_start = 20
-
-            current_y = image_height * 0.2
-
-            # Main Text
-            height_used = draw_text_wrapped(d, main_text or 'Flash Sale!', main_font, text_color, (content_x_start, current_y), content_width)
-            current_y += height_used + 10
-
-            # Sub Text
-            height_used = draw_text_wrapped(d, sub_text or 'Up to 70% Off!', sub_font, text_color, (content_x_start, current_y), content_width)
-            current_y += height_used + 10
-
-            # Offer Details
-            if offer_details:
-                height_used = draw_text_wrapped(d, offer_details, offer_font, 'red', (content_x_start, current_y), content_width)
-                current_y += height_used + 15
-
-            # Website/Call to Action
-            if website:
-                website_text = f"Shop Now: {website.replace('https://', '').replace('http://', '').replace('www.', '')}"
-                bbox_website = d.textbbox((0,0), website_text, font=website_font)
-                website_width = bbox_website[2] - bbox_website[0]
-                website_x = (image_width - website_width) / 2
-                d.text((website_x, current_y), website_text, font=website_font, fill=text_color)
-
-        elif template_type == 'inspirationalQuoteCard':
-            quote_font = get_robust_font(40, user_font_family)
-            author_font = get_robust_font(25, user_font_family)
-            website_font = get_robust_font(18, user_font_family)
-
-            # Quote
-            quote_text = f"\u201c{main_text or 'The only way to do great work is to love what you do.'}\u201d"
-            height_used = draw_text_wrapped(d, quote_text, quote_font, text_color, (50, image_height * 0.25), image_width - 100)
-            current_y = image_height * 0.25 + height_used + 20 # Position author below quote
-
-            # Author
-            author_text = f"\u2014 {sub_text or 'Steve Jobs'}"
-            bbox_author = d.textbbox((0,0), author_text, font=author_font)
-            author_width = bbox_author[2] - bbox_author[0]
-            author_x = (image_width - author_width) / 2
-            d.text((author_x, current_y), author_text, font=author_font, fill=text_color)
-            current_y += author_font.size + 15
-
-            # Website (optional)
-            if website:
-                website_display = website.replace('https://', '').replace('http://', '').replace('www.', '')
-                bbox_website = d.textbbox((0,0), website_display, font=website_font)
-                website_width = bbox_website[2] - bbox_website[0]
-                website_x = (image_width - website_width) / 2
-                d.text((website_x, current_y), website_display, font=website_font, fill=text_color)
-
-        elif template_type == 'eventInvitationCard':
-            title_font = get_robust_font(45, user_font_family)
-            event_name_font = get_robust_font(30, user_font_family)
-            detail_font = get_robust_font(22, user_font_family)
-            rsvp_font = get_robust_font(18, user_font_family)
-
-            current_y = 25
-
-            # Title
-            bbox_title = d.textbbox((0,0), main_text or 'You\'re Invited!', font=title_font)
-            d.text((25, current_y), main_text or 'You\'re Invited!', font=title_font, fill=text_color)
-            current_y += title_font.size + 10
-
-            # Event Name
-            bbox_event_name = d.textbbox((0,0), sub_text or 'Special Event Name', font=event_name_font)
-            d.text((25, current_y), sub_text or 'Special Event Name', font=event_name_font, fill=text_color)
-            current_y += event_name_font.size + 20
-
-            # Details
-            d.text((25, current_y), f"Date: {offer_details or 'October 26, 2025'}", font=detail_font, fill=text_color)
-            current_y += detail_font.size + 5
-            d.text((25, current_y), f"Time: {phone_number or '7:00 PM EST'}", font=detail_font, fill=text_color)
-            current_y += detail_font.size + 5
-            d.text((25, current_y), f"Location: {website or 'Virtual / Your Venue'}", font=detail_font, fill=text_color)
-            current_y += detail_font.size + 5
-
-            # RSVP
-            if email:
-                d.text((25, current_y + 10), f"RSVP: {email}", font=rsvp_font, fill=text_color)
-
-        elif template_type == 'productShowcasePost':
-            product_name_font = get_robust_font(50, user_font_family)
-            tagline_font = get_robust_font(28, user_font_family)
-            offer_font = get_robust_font(22, user_font_family)
-            cta_font = get_robust_font(24, user_font_family)
-
-            current_y = image_height * 0.3 # Start from 30% down
-
-            # Product Name
-            height_used = draw_text_wrapped(d, main_text or 'Amazing Product Name', product_name_font, text_color, (30, current_y), image_width - 60)
-            current_y += height_used + 10
-
-            # Tagline
-            height_used = draw_text_wrapped(d, sub_text or 'Discover unparalleled quality.', tagline_font, text_color, (30, current_y), image_width - 60)
-            current_y += height_used + 20
-
-            # Offer Details
-            if offer_details:
-                height_used = draw_text_wrapped(d, offer_details, offer_font, 'green', (30, current_y), image_width - 60)
-                current_y += height_used + 25
-
-            # Call to Action
-            cta_text = f"Buy Now: {website.replace('https://', '').replace('http://', '').replace('www.', '')}" if website else 'Learn More'
-            bbox_cta = d.textbbox((0,0), cta_text, font=cta_font)
-            cta_width = bbox_cta[2] - bbox_cta[0] + 50
-            cta_height = bbox_cta[3] - bbox_cta[1] + 30
-            
-            cta_x = (image_width - cta_width) / 2
-            cta_y = current_y + 10 # Add some space before CTA
-            d.rectangle([(cta_x, cta_y), (cta_x + cta_width, cta_y + cta_height)], fill=text_color, radius=5)
-            d.text((cta_x + 25, cta_y + 15), cta_text, font=cta_font, fill=bg_color)
-
-        elif template_type == 'limitedTimeOfferBanner':
-            main_font = get_robust_font(70, user_font_family)
-            sub_font = get_robust_font(35, user_font_family)
-            offer_font = get_robust_font(25, user_font_family)
-            cta_font = get_robust_font(22, user_font_family)
-
-            content_width = image_width - 40
-            content_x_start = 20
-
-            current_y = image_height * 0.2
-
-            # Main Text
-            height_used = draw_text_wrapped(d, main_text or 'Limited Time Offer!', main_font, '#dc3545', (content_x_start, current_y), content_width)
-            current_y += height_used + 5
-
-            # Sub Text
-            height_used = draw_text_wrapped(d, sub_text or 'Save Big Today!', sub_font, text_color, (content_x_start, current_y), content_width)
-            current_y += height_used + 10
-
-            # Offer Details
-            if offer_details:
-                height_used = draw_text_wrapped(d, offer_details, offer_font, '#dc3545', (content_x_start, current_y), content_width)
-                current_y += height_used + 10
-
-            # Call to Action
-            if website:
-                website_text = f"Claim Your Deal: {website.replace('https://', '').replace('http://', '').replace('www.', '')}"
-                bbox_cta = d.textbbox((0,0), website_text, font=cta_font)
-                cta_width = bbox_cta[2] - bbox_cta[0]
-                cta_x = (image_width - cta_width) / 2
-                d.text((cta_x, current_y + 10), cta_text, font=cta_font, fill='#007bff')
-
-        elif template_type == 'elegantContactCard':
-            name_font = get_robust_font(35, user_font_family)
-            title_font = get_robust_font(22, user_font_family)
-            contact_font = get_robust_font(18, user_font_family)
-
-            current_y = 25 + (60 if logo_base64 else 0)
-
-            # Name
-            bbox_name = d.textbbox((0,0), main_text or 'Your Name', font=name_font)
-            name_width = bbox_name[2] - bbox_name[0]
-            d.text(((image_width - name_width) / 2, current_y), main_text or 'Your Name', font=name_font, fill=text_color)
-            current_y += name_font.size + 5
-
-            # Title
-            bbox_title = d.textbbox((0,0), sub_text or 'Your Professional Title', font=title_font)
-            title_width = bbox_title[2] - bbox_title[0]
-            d.text(((image_width - title_width) / 2, current_y), sub_text or 'Your Professional Title', font=title_font, fill=text_color)
-            current_y += title_font.size + 20
-
-            # Separator Line
-            line_y = current_y
-            d.line([(image_width * 0.2, line_y), (image_width * 0.8, line_y)], fill=text_color, width=1)
-            current_y += 15
-
-            # Contact Info
-            contact_lines = []
-            if phone_number: contact_lines.append(phone_number)
-            if email: contact_lines.append(email)
-            if website: contact_lines.append(website)
-
-            for line in contact_lines:
-                bbox_line = d.textbbox((0,0), line, font=contact_font)
-                line_width = bbox_line[2] - bbox_line[0]
-                d.text(((image_width - line_width) / 2, current_y), line, font=contact_font, fill=text_color)
-                current_y += contact_font.size + 5
-
-        elif template_type == 'modernTechBusinessCard':
-            name_font = get_robust_font(35, user_font_family)
-            title_font = get_robust_font(22, user_font_family)
-            contact_font = get_robust_font(18, user_font_family)
-
-            # Left bar background
-            bar_width = image_width * 0.3
-            d.rectangle([(0, 0), (bar_width, image_height)], fill=text_color)
-
-            # Text content (right side)
-            text_start_x = bar_width + 20
-            current_y = (image_height - (name_font.size + title_font.size + contact_font.size * 3 + 30)) / 2
-
-            # Name
-            d.text((text_start_x, current_y), main_text or 'Tech Solutions Inc.', font=name_font, fill=text_color)
-            current_y += name_font.size + 5
-
-            # Title
-            d.text((text_start_x, current_y), sub_text or 'Innovating the Future', font=title_font, fill=text_color)
-            current_y += title_font.size + 20
-
-            # Contact Info
-            if phoneNumber:
-                d.text((text_start_x, current_y), phoneNumber, font=contact_font, fill=text_color)
-                current_y += contact_font.size + 5
-            if email:
-                d.text((text_start_x, current_y), email, font=contact_font, fill=text_color)
-                current_y += contact_font.size + 5
-            if website:
-                d.text((text_start_x, current_y), website, font=contact_font, fill=text_color)
-
-        elif template_type == 'minimalistQrCodeCard':
-            name_font = get_robust_font(30, user_font_family)
-            website_font = get_robust_font(18, user_font_family)
-            qr_text_font = get_robust_font(12, user_font_family)
-
-            # QR Code Placeholder
-            qr_size = 100
-            qr_x = (image_width - qr_size) / 2
-            qr_y = (image_height - qr_size) / 2 - 20
-            d.rectangle([(qr_x, qr_y), (qr_x + qr_size, qr_y + qr_size)], fill=text_color)
-            
-            # Text inside QR placeholder
-            qr_placeholder_text = "QR Code Here"
-            bbox_qr_text = d.textbbox((0,0), qr_placeholder_text, font=qr_text_font)
-            qr_text_width = bbox_qr_text[2] - bbox_qr_text[0]
-            qr_text_height = bbox_qr_text[3] - bbox_qr_text[1]
-            d.text((qr_x + (qr_size - qr_text_width) / 2, qr_y + (qr_size - qr_text_height) / 2), qr_placeholder_text, font=qr_text_font, fill=bg_color)
-
-            # Name below QR
-            current_y = qr_y + qr_size + 15
-            bbox_name = d.textbbox((0,0), main_text or 'Your Name', font=name_font)
-            name_width = bbox_name[2] - bbox_name[0]
-            d.text(((image_width - name_width) / 2, current_y), main_text or 'Your Name', font=name_font, fill=text_color)
-            current_y += name_font.size + 5
-
-            # Website below name
-            if website:
-                bbox_website = d.textbbox((0,0), website, font=website_font)
-                website_width = bbox_website[2] - bbox_website[0]
-                d.text(((image_width - website_width) / 2, current_y), website, font=website_font, fill=text_color)
-
-        # Convert to base64
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        return base64.b64encode(buffered.getvalue()).decode()
-    except Exception as e:
-        print(f"Error generating image: {e}")
-        img = Image.new('RGB', (image_width, image_height), color='red')
-        d = ImageDraw.Draw(img)
-        error_msg = f"Error: {e}"
-        error_font = ImageFont.load_default()
-        error_font.size = 20
-        bbox_error = d.textbbox((0,0), error_msg, font=error_font)
-        error_width = bbox_error[2] - bbox_error[0]
-        error_height = bbox_error[3] - bbox_error[1]
-        d.text(((image_width - error_width) / 2, (image_height - error_height) / 2), error_msg, fill='white', font=error_font)
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        return base64.b64encode(buffered.getvalue()).decode()
+# Flask renders in its request threads, so no worker pool is started; the engine
+# warms up in the background and /health reports not-ready until it is done
+start_engine(workers=False)
+threading.Thread(target=warm_up_engine, name="render-warm-up", daemon=True).start()
 
 # --- Web Scraping Endpoint (Portia-like) ---
 @app.route('/scrape-content', methods=['POST'])
@@ -828,31 +49,18 @@ def scrape_content():
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        main_text = ''
-        title_tag = soup.find(['h1', 'h2'])
-        if title_tag:
-            main_text = title_tag.get_text(strip=True)
-        elif soup.title:
-            main_text = soup.title.get_text(strip=True)
-
-        sub_text = ''
-        first_p = soup.find('p')
-        if first_p:
-            sub_text = first_p.get_text(strip=True)
-        else:
-            meta_description = soup.find('meta', attrs={'name': 'description'})
-            if meta_description and meta_description.get('content'):
-                sub_text = meta_description['content'].strip()
-
-        if main_text and len(main_text) > 100:
-            main_text = main_text[:97] + '...'
-        if sub_text and len(sub_text) > 200:
-            sub_text = sub_text[:197] + '...'
+        # Read only as much of the page as it takes to find its headline and first paragraph
+        extractor = ContentExtractor()
+        with requests.get(url, headers=headers, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            # requests assumes ISO-8859-1 for text without a charset; the extractor sniffs the page instead
+            declared = 'charset' in response.headers.get('Content-Type', '').lower()
+            extractor.begin(response.encoding if declared else None)
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if extractor.feed(chunk):
+                    break
+
+        main_text, sub_text = extractor.result()
 
         return jsonify({
             'main_text': main_text,
@@ -894,23 +102,40 @@ def generate_text():
 @app.route('/generate-design-image', methods=['POST'])
 def get_design_image():
     data = request.get_json()
-    design_data = data.get('design_data')
-    template_type = data.get('template_type', 'poster')
-    image_width = data.get('image_width', 800)
-    image_height = data.get('image_height', 1000)
-
-    if not design_data:
-        return jsonify({'error': 'Design data is required'}), 400
-
     try:
-        image_base64 = generate_image_from_design(design_data, template_type, image_width, image_height)
-        if image_base64:
-            return jsonify({'image': image_base64})
-        else:
-            return jsonify({'error': 'Failed to generate image'}), 500
+        call = DesignImageCall(
+            data.get('design_data'),
+            data.get('template_type', 'poster'),
+            data.get('image_width', 800),
+            data.get('image_height', 1000),
+            output_profile=data.get('output_profile'),
+            preview_scale=data.get('preview_scale'),
+            accept=request.headers.get('Accept'),
+        )
+        response = call.render(request.headers.get('If-None-Match'))
     except Exception as e:
-        print(f"Error in /generate-design-image: {e}")
-        return jsonify({'error': f'Server error generating image: {e}'}), 500
+        status, message, headers = error_response(e)
+        return jsonify({'error': message}), status, headers
+
+    if response.body is None:
+        return '', response.status, response.headers
+    if isinstance(response.body, dict):
+        flask_response = jsonify(response.body)
+        flask_response.headers.update(response.headers)
+        return flask_response
+    # WSGI needs a bytes body, so this is the one copy of an in-memory image; large ones stream
+    body = bytes(response.body) if isinstance(response.body, memoryview) else response.body
+    return Response(body, status=response.status, mimetype=response.media_type, headers=response.headers)
+
+@app.route('/metrics', methods=['GET'])
+def get_render_metrics():
+    """Render latency histograms per template, output size and stage."""
+    return jsonify(engine_metrics())
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    status = 200 if readiness.ready else 503
+    return jsonify({'status': 'healthy' if readiness.ready else 'warming', **engine_stats()}), status
 
 if __name__ == '__main__':
     os.makedirs('backend', exist_ok=True)
@@ -0,0 +1 @@
+# backend/benchmarks - Offline performance checks for the rendering helpers
@@ -0,0 +1,98 @@
+# backend/benchmarks/bench_base_layers.py - Per-template render cost with and without cached base layers
+#
+# Run from the backend directory:  python -m benchmarks.bench_base_layers
+import base64
+import io
+import time
+from collections import Counter
+
+from PIL import Image, ImageDraw
+
+from rendering import TEMPLATES, render_design
+from rendering.layers import base_layers
+
+WIDTH, HEIGHT = 1080, 1080
+REPEATS = 20
+DRAW_METHODS = ("rectangle", "rounded_rectangle", "line", "ellipse", "polygon", "text")
+
+
+def _sample_design():
+    logo = io.BytesIO()
+    Image.new('RGBA', (400, 400), (200, 40, 40, 255)).save(logo, format="PNG")
+    return {
+        'text': 'Grand Opening Sale',
+        'subText': 'Everything in store must go',
+        'offerDetails': '50% off all items this weekend only, while stocks last',
+        'phoneNumber': '555-123-4567',
+        'email': 'hello@example.com',
+        'website': 'https://shop.example.com',
+        'bgColor': '#fafafa',
+        'textColor': '#1d3557',
+        'logo': 'data:image/png;base64,' + base64.b64encode(logo.getvalue()).decode(),
+    }
+
+
+class DrawCallCounter:
+    """Counts ImageDraw primitives and Image.paste calls while active."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self._originals = {}
+
+    def _wrap(self, owner, name):
+        original = getattr(owner, name)
+        self._originals[(owner, name)] = original
+
+        def counted(*args, **kwargs):
+            self.calls[name] += 1
+            return original(*args, **kwargs)
+        setattr(owner, name, counted)
+
+    def __enter__(self):
+        for name in DRAW_METHODS:
+            self._wrap(ImageDraw.ImageDraw, name)
+        self._wrap(Image.Image, "paste")
+        return self
+
+    def __exit__(self, *exc):
+        for (owner, name), original in self._originals.items():
+            setattr(owner, name, original)
+
+    def total(self):
+        return sum(self.calls.values())
+
+
+def _measure(template_type, design, cold):
+    if not cold:
+        render_design(design, template_type, WIDTH, HEIGHT)  # build the base layer once
+    with DrawCallCounter() as counter:
+        if cold:
+            base_layers.clear()
+        render_design(design, template_type, WIDTH, HEIGHT)
+    elapsed = 0.0
+    for _ in range(REPEATS):
+        if cold:
+            base_layers.clear()
+        start = time.perf_counter()
+        render_design(design, template_type, WIDTH, HEIGHT)
+        elapsed += time.perf_counter() - start
+    return elapsed / REPEATS * 1000, counter.total()
+
+
+def main():
+    design = _sample_design()
+    render_design(design, 'poster', WIDTH, HEIGHT)  # intern the logo and warm the fonts
+
+    print(f"{'template':<30} {'cold ms':>8} {'cached ms':>9} {'speedup':>8} {'cold calls':>10} {'cached calls':>12}")
+    totals = [0.0, 0.0, 0, 0]
+    for template_type in TEMPLATES:
+        cold_ms, cold_calls = _measure(template_type, design, cold=True)
+        cached_ms, cached_calls = _measure(template_type, design, cold=False)
+        for i, value in enumerate((cold_ms, cached_ms, cold_calls, cached_calls)):
+            totals[i] += value
+        print(f"{template_type:<30} {cold_ms:>8.2f} {cached_ms:>9.2f} {cold_ms / cached_ms:>7.2f}x {cold_calls:>10} {cached_calls:>12}")
+    print(f"{'total':<30} {totals[0]:>8.2f} {totals[1]:>9.2f} {totals[0] / totals[1]:>7.2f}x {totals[2]:>10} {totals[3]:>12}")
+
+
+if __name__ == "__main__":
+    main()
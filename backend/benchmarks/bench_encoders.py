@@ -0,0 +1,50 @@
+# backend/benchmarks/bench_encoders.py - Encode time and output size of each output profile per template
+#
+# Run from the backend directory:  python -m benchmarks.bench_encoders [width height]
+import sys
+import time
+
+from rendering import ENCODER_PROFILES, TEMPLATES, render_design
+
+REPEATS = 5
+SAMPLE_DESIGN = {
+    'text': 'Grand Opening Sale',
+    'subText': 'Everything in store must go',
+    'offerDetails': '50% off all items this weekend only, while stocks last',
+    'phoneNumber': '555-123-4567',
+    'email': 'hello@example.com',
+    'website': 'https://shop.example.com',
+    'bgColor': '#fafafa',
+    'textColor': '#1d3557',
+}
+
+
+def _measure(profile, img):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        data = profile.encode(img)
+    return (time.perf_counter() - start) / REPEATS * 1000, len(data)
+
+
+def main():
+    width, height = (int(v) for v in sys.argv[1:3]) if len(sys.argv) >= 3 else (1080, 1080)
+    names = list(ENCODER_PROFILES)
+    print(f"{width}x{height}, ms / KB per encode")
+    print(f"{'template':<30}" + "".join(f"{name:>20}" for name in names))
+    totals = {name: [0.0, 0] for name in names}
+    for template_type in TEMPLATES:
+        img = render_design(SAMPLE_DESIGN, template_type, width, height)
+        cells = []
+        for name in names:
+            ms, size = _measure(ENCODER_PROFILES[name], img)
+            totals[name][0] += ms
+            totals[name][1] += size
+            cells.append(f"{ms:>9.1f} / {size / 1024:>6.1f}")
+        print(f"{template_type:<30}" + "".join(f"{cell:>20}" for cell in cells))
+    count = len(TEMPLATES)
+    means = (f"{totals[n][0] / count:>9.1f} / {totals[n][1] / count / 1024:>6.1f}" for n in names)
+    print(f"{'mean':<30}" + "".join(f"{cell:>20}" for cell in means))
+
+
+if __name__ == "__main__":
+    main()
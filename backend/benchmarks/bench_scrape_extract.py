@@ -0,0 +1,90 @@
+# backend/benchmarks/bench_scrape_extract.py - Compare the streaming ContentExtractor with download-then-parse
+#
+# Run from the backend directory:  python -m benchmarks.bench_scrape_extract
+#
+# The body arrives in the client's chunks, as it would from the network. The
+# old path joins the whole body into text and parses it into a BeautifulSoup
+# tree; ContentExtractor parses each chunk as it arrives and stops reading as
+# soon as it is done. Times are the best of REPEATS runs; memory is the
+# tracemalloc peak of one more, traced run.
+import time
+import tracemalloc
+
+from scraping import MAX_SCRAPE_BYTES, ContentExtractor, extract_content
+from scraping.client import STREAM_CHUNK_BYTES
+
+PAGE_SIZES_KIB = (256, 1024, 4096)
+REPEATS = 3
+
+HEAD = ('<!DOCTYPE html><html><head><title>Corner Bakery - Fresh bread daily</title>'
+        '<meta name="description" content="Sourdough, pastries and cakes baked every morning.">'
+        '<script>window.dataLayer = [];</script></head><body><nav><a href="/">Home</a><a href="/shop">Shop</a></nav>')
+HEADLINE = '<header><h1>Fresh bread, <em>baked</em> every morning</h1></header>'
+PARAGRAPH = '<p>Order before 10am and pick up your loaf warm, or have it delivered &amp; sliced.</p>'
+PRODUCT = ('<div class="product"><img src="/img/{0}.jpg" alt="Loaf {0}"><span class="name">Loaf {0}</span>'
+           '<span class="price">$4.{0:02d}</span><button data-id="{0}">Add to cart</button></div>\n')
+TAIL = '</body></html>'
+
+
+def build_page(size_kib, paragraph_first=True):
+    """A product listing of about ``size_kib``, with its first paragraph at the top or after the whole listing."""
+    products, size, index = [], 0, 0
+    while size < size_kib * 1024:
+        products.append(PRODUCT.format(index % 100))
+        size += len(products[-1])
+        index += 1
+    listing = ''.join(products)
+    body = HEADLINE + PARAGRAPH + listing if paragraph_first else HEADLINE + listing + PARAGRAPH
+    return (HEAD + body + TAIL).encode()
+
+
+def chunks_of(page):
+    for start in range(0, len(page), STREAM_CHUNK_BYTES):
+        yield page[start:start + STREAM_CHUNK_BYTES]
+
+
+def download_then_parse(page):
+    body = b''.join(chunks_of(page))
+    return extract_content(body.decode('utf-8', errors='replace')), len(body)
+
+
+def stream_extract(page):
+    extractor = ContentExtractor()
+    for chunk in chunks_of(page):
+        if extractor.feed(chunk):
+            break
+    return extractor.result(), extractor.bytes_fed
+
+
+def _measure(func, page):
+    best_ms = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result, bytes_read = func(page)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        best_ms = elapsed_ms if best_ms is None else min(best_ms, elapsed_ms)
+    tracemalloc.start()
+    func(page)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, bytes_read, best_ms, peak / (1024 * 1024)
+
+
+def main():
+    print(f"byte cap {MAX_SCRAPE_BYTES // 1024} KiB, chunks of {STREAM_CHUNK_BYTES // 1024} KiB")
+    print(f"{'page':>10} {'KiB':>6} {'read KiB':>9} {'legacy ms':>10} {'stream ms':>10} {'speedup':>8} "
+          f"{'legacy MiB':>11} {'stream MiB':>11}")
+    for paragraph_first in (True, False):
+        for size_kib in PAGE_SIZES_KIB:
+            page = build_page(size_kib, paragraph_first)
+            expected, _, legacy_ms, legacy_mib = _measure(download_then_parse, page)
+            result, bytes_read, stream_ms, stream_mib = _measure(stream_extract, page)
+            if bytes_read == len(page):
+                assert result == expected, (result, expected)  # same answer whenever the whole page was read
+            label = "p at top" if paragraph_first else "p at end"
+            print(f"{label:>10} {len(page) // 1024:>6} {bytes_read // 1024:>9} {legacy_ms:>10.1f} {stream_ms:>10.1f} "
+                  f"{legacy_ms / stream_ms:>7.1f}x {legacy_mib:>11.1f} {stream_mib:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
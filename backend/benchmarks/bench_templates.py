@@ -0,0 +1,329 @@
+# backend/benchmarks/bench_templates.py - Per-template latency, encode cost, size and memory, checked against a baseline
+#
+# Run from the backend directory:
+#   python -m benchmarks.bench_templates            compare with benchmarks/baselines/templates.json
+#   python -m benchmarks.bench_templates --update   record a new baseline
+#   python -m benchmarks.bench_templates --quick    smaller matrix for a fast local check
+#
+# Every template renders across canvas sizes x {no logo, logo} x {short, long
+# text}. Each template runs in a fresh worker process so its peak RSS is its
+# own. Every design names one font file as its fontFamily: the bundled
+# DejaVuSans.ttf, or the font registry's default when that file is absent, so
+# the numbers do not depend on which families a machine happens to have.
+# It exits with status 1 when any template regresses beyond the thresholds.
+#
+# The baseline records the machine and the setup it was measured with. Times
+# and peak RSS are only gated against a baseline from the same machine and
+# setup; output sizes and draw counts are gated against any baseline. Next to
+# every timed run a fixed Pillow-only calibration workload is timed too, and
+# times are compared relative to it, so a shared host running slower or faster
+# than when the baseline was recorded does not show up as a regression.
+import argparse
+import base64
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+
+import PIL
+from PIL import Image, ImageDraw, ImageFont
+
+from rendering import TEMPLATES, encode_image, font_registry, layout_design, prepare_design, render_prepared
+from rendering.fonts import BUNDLED_FONT_PATH, PILLOW_DEFAULT_FONT
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "templates.json")
+CANVAS_SIZES = ((800, 1000), (1080, 1080), (1080, 1920))
+QUICK_CANVAS_SIZES = ((800, 1000),)
+REPEATS = 7
+QUICK_REPEATS = 3
+PROFILE = "png"
+
+# Allowed growth over the baseline before a template counts as regressed. Calibrated
+# times of an unchanged tree stay within about 15% of each other between runs
+TIME_THRESHOLD = 0.25
+BYTES_THRESHOLD = 0.05
+DRAWS_THRESHOLD = 0.0
+RSS_THRESHOLD = 0.20
+
+# Times and memory depend on these; output sizes and draw counts are compared regardless
+OUTPUT_META = ("font", "pillow", "profile")
+MACHINE_META = ("machine", "cpu", "cpu_count", "python")
+# Metrics that do not depend on the machine the suite runs on
+MACHINE_INDEPENDENT = ("bytes", "draws")
+
+SHORT_TEXT = {
+    'text': 'Grand Opening',
+    'subText': 'This weekend',
+    'offerDetails': '50% off',
+    'phoneNumber': '555-1234',
+    'website': 'shop.example.com',
+}
+LONG_TEXT = {
+    'text': 'Grand Opening Celebration At Our Brand New Downtown Flagship Store',
+    'subText': 'Join us for a whole weekend of live music, tastings and exclusive launch-day surprises',
+    'offerDetails': ('50% off every item in store, free gift wrapping on all orders and a loyalty bonus '
+                     'for every customer who signs up during the opening weekend'),
+    'phoneNumber': '+1 (555) 123-4567',
+    'email': 'hello@downtown-flagship.example.com',
+    'website': 'https://www.downtown-flagship.example.com/opening-weekend',
+}
+
+
+def bench_font():
+    """The font file every benchmark design is set in."""
+    return BUNDLED_FONT_PATH if os.path.exists(BUNDLED_FONT_PATH) else font_registry.resolve_path()
+
+
+def cpu_model():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def _logo_data_url():
+    logo = io.BytesIO()
+    img = Image.new('RGBA', (400, 400), (0, 0, 0, 0))
+    img.paste((200, 40, 40, 255), (40, 40, 360, 360))
+    img.save(logo, format="PNG")
+    return 'data:image/png;base64,' + base64.b64encode(logo.getvalue()).decode()
+
+
+def _cases(canvas_sizes, font_path):
+    logo = _logo_data_url()
+    # A font path resolves as a family of its own; Pillow's built-in font has no file to name
+    font = {} if font_path == PILLOW_DEFAULT_FONT else {'fontFamily': font_path}
+    for width, height in canvas_sizes:
+        for with_logo in (False, True):
+            for text_name, text in (("short", SHORT_TEXT), ("long", LONG_TEXT)):
+                design = dict(text, bgColor='#fafafa', textColor='#1d3557', **font)
+                if with_logo:
+                    design['logo'] = logo
+                yield f"{width}x{height}/{'logo' if with_logo else 'nologo'}/{text_name}", design, width, height
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _calibration_ms(font_path):
+    """Time of a fixed Pillow-only draw and encode, none of this repository's code.
+
+    Measured next to every case, it tells how fast the host is running just
+    then, so a shared machine's drift is not mistaken for a regression.
+    """
+    font = ImageFont.load_default(size=24) if font_path == PILLOW_DEFAULT_FONT else ImageFont.truetype(font_path, 24)
+    start = time.perf_counter()
+    img = Image.new('RGB', (800, 1000), '#fafafa')
+    draw = ImageDraw.Draw(img)
+    for line in range(30):
+        draw.rectangle((20, 30 * line + 5, 780, 30 * line + 30), fill=(line * 8, 60, 120))
+        draw.text((40, 30 * line + 5), LONG_TEXT['subText'], font=font, fill='#1d3557')
+    img.save(io.BytesIO(), format="PNG")
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_template(job):
+    """Run one template's whole matrix; executed in a fresh process per template."""
+    template_type, canvas_sizes, repeats, font_path = job
+    cases = {}
+    render_all, encode_all = [], []
+    _calibration_ms(font_path)  # warm up
+    for key, design, width, height in _cases(canvas_sizes, font_path):
+        prepared = prepare_design(design)
+        render_prepared(prepared, template_type, width, height)  # warm fonts, logo and base layer
+        draws = len(layout_design(prepared, template_type, width, height)["elements"])
+        render_ms, encode_ms, calibration_ms = [], [], []
+        for _ in range(repeats):
+            calibration_ms.append(_calibration_ms(font_path))
+            start = time.perf_counter()
+            img = render_prepared(prepare_design(design), template_type, width, height)
+            render_ms.append((time.perf_counter() - start) * 1000)
+            data, ms = encode_image(img, PROFILE)
+            encode_ms.append(ms)
+        render_all.extend(render_ms)
+        encode_all.extend(encode_ms)
+        cases[key] = {
+            "min_ms": round(min(render_ms), 2),
+            "p50_ms": round(_percentile(render_ms, 0.50), 2),
+            "p95_ms": round(_percentile(render_ms, 0.95), 2),
+            "encode_min_ms": round(min(encode_ms), 2),
+            "encode_p50_ms": round(_percentile(encode_ms, 0.50), 2),
+            "calibration_ms": round(min(calibration_ms), 2),
+            "bytes": len(data),
+            "draws": draws,
+        }
+    summary = {
+        "p50_ms": round(_percentile(render_all, 0.50), 2),
+        "p95_ms": round(_percentile(render_all, 0.95), 2),
+        "encode_p50_ms": round(_percentile(encode_all, 0.50), 2),
+        "bytes": sum(case["bytes"] for case in cases.values()),
+        "draws": sum(case["draws"] for case in cases.values()),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    return template_type, {"summary": summary, "cases": cases}
+
+
+def run_suite(canvas_sizes=CANVAS_SIZES, repeats=REPEATS, templates=None):
+    font_path = bench_font()
+    jobs = [(name, canvas_sizes, repeats, font_path) for name in (templates or TEMPLATES)]
+    # One process per template, run one at a time so timings do not contend for cores
+    with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        results = dict(pool.imap(bench_template, jobs))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "machine": platform.machine(),
+            "cpu": cpu_model(),
+            "cpu_count": os.cpu_count(),
+            "font": os.path.basename(font_path),
+            "profile": PROFILE,
+            "canvas_sizes": [f"{w}x{h}" for w, h in canvas_sizes],
+            "repeats": repeats,
+        },
+        "templates": results,
+    }
+
+
+def _case_ratio(result, previous, metric):
+    """Geometric mean over the matrix of this run's per-case ``metric`` over the baseline's.
+
+    Each case's ratio is divided by that of its calibration time, so only
+    slowdowns beyond the host's own drift count.
+    """
+    ratios = []
+    for key, case in result["cases"].items():
+        base = previous["cases"].get(key)
+        if not base or not base[metric]:
+            continue
+        ratio = case[metric] / base[metric]
+        if base.get("calibration_ms"):
+            ratio /= case["calibration_ms"] / base["calibration_ms"]
+        ratios.append(ratio)
+    return math.exp(sum(math.log(r) for r in ratios) / len(ratios)) if ratios else 1.0
+
+
+def meta_changes(report, baseline, keys):
+    """``key old -> new`` for each of ``keys`` whose meta differs between the baseline and this run."""
+    return [
+        f"{key} {baseline['meta'].get(key)!r} -> {report['meta'].get(key)!r}"
+        for key in keys
+        if baseline["meta"].get(key) != report["meta"].get(key)
+    ]
+
+
+def compare(report, baseline, time_threshold=TIME_THRESHOLD, timings=True):
+    """Regressions of ``report`` against ``baseline``, as readable lines.
+
+    Render and encode times are gated on each case's best run, relative to
+    the calibration run next to it, compared case by case and combined as a
+    geometric mean: on a shared machine that is far steadier than any median
+    or tail, which are reported but not gated. Timings and peak RSS are
+    machine-specific, so without ``timings`` only the output sizes and draw
+    counts are gated.
+    """
+    regressions = []
+    for template_type, result in report["templates"].items():
+        previous = baseline["templates"].get(template_type)
+        if previous is None:
+            continue
+        checks = [
+            ("render time", _case_ratio(result, previous, "min_ms"), time_threshold),
+            ("encode time", _case_ratio(result, previous, "encode_min_ms"), time_threshold),
+            ("bytes", result["summary"]["bytes"] / previous["summary"]["bytes"], BYTES_THRESHOLD),
+            # Baselines recorded before draw counts existed have none to compare with
+            ("draws", result["summary"]["draws"] / previous["summary"].get("draws", result["summary"]["draws"]),
+             DRAWS_THRESHOLD),
+            ("peak_rss_mb", result["summary"]["peak_rss_mb"] / previous["summary"]["peak_rss_mb"], RSS_THRESHOLD),
+        ]
+        if not timings:
+            checks = [check for check in checks if check[0] in MACHINE_INDEPENDENT]
+        for metric, ratio, limit in checks:
+            if ratio > 1 + limit:
+                regressions.append(f"{template_type}: {metric} +{ratio - 1:.0%} over baseline (limit {limit:.0%})")
+    return regressions
+
+
+def _print_report(report, baseline):
+    previous = baseline["templates"] if baseline else {}
+    print(f"{'template':<30} {'p50 ms':>8} {'p95 ms':>8} {'enc ms':>8} {'KB':>8} {'RSS MB':>8} {'p50 vs base':>12}")
+    for template_type, result in report["templates"].items():
+        summary = result["summary"]
+        base = previous.get(template_type, {}).get("summary")
+        delta = f"{summary['p50_ms'] / base['p50_ms'] - 1:+.0%}" if base and base["p50_ms"] else "-"
+        print(f"{template_type:<30} {summary['p50_ms']:>8.2f} {summary['p95_ms']:>8.2f} "
+              f"{summary['encode_p50_ms']:>8.2f} {summary['bytes'] / 1024:>8.1f} {summary['peak_rss_mb']:>8.1f} {delta:>12}")
+
+
+def _write_json(path, report):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Template rendering benchmark and regression check")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare with or update")
+    parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    parser.add_argument("--quick", action="store_true", help="one canvas size and fewer repeats")
+    parser.add_argument("--threshold", type=float, default=TIME_THRESHOLD, help="allowed latency growth, e.g. 0.25")
+    parser.add_argument("--template", action="append", dest="templates", help="only run these templates")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        report = run_suite(QUICK_CANVAS_SIZES, QUICK_REPEATS, args.templates)
+    else:
+        report = run_suite(templates=args.templates)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    _print_report(report, baseline)
+    if args.output:
+        _write_json(args.output, report)
+
+    if args.update:
+        _write_json(args.baseline, report)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --update to record one")
+        return 0
+    if baseline["meta"]["canvas_sizes"] != report["meta"]["canvas_sizes"]:
+        print("Baseline was recorded with a different matrix; not comparing")
+        return 0
+    changes = meta_changes(report, baseline, OUTPUT_META + MACHINE_META)
+    if changes:
+        print(f"Baseline was recorded with a different setup or machine ({', '.join(changes)}); "
+              "only output sizes and draw counts are compared, record a baseline here with --update "
+              "to gate times and memory")
+
+    regressions = compare(report, baseline, args.threshold, timings=not changes)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"{len(regressions)} regression(s) against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
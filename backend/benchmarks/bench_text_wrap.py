@@ -0,0 +1,71 @@
+# backend/benchmarks/bench_text_wrap.py - Compare the wrapping engine with the old draw_text_wrapped
+#
+# Run from the backend directory:  python -m benchmarks.bench_text_wrap
+import random
+import time
+
+from PIL import Image, ImageDraw
+
+from rendering import draw_text_wrapped, get_robust_font
+
+WORD_COUNTS = (50, 100, 200, 500)
+REPEATS = 20
+VOCABULARY = (
+    "quality service growth brand launch offer discount premium customer support "
+    "handmade organic local community delivery exclusive limited seasonal event "
+    "experience innovation trusted family business quick easy affordable"
+).split()
+
+
+def legacy_draw_text_wrapped(draw, text, font, fill, xy, max_width, line_spacing_factor=1.2):
+    """The pre-engine implementation: re-measures the whole candidate line for every word."""
+    lines = []
+    words = text.split()
+    current_line = []
+
+    sample_text_bbox = draw.textbbox((0, 0), "Tg", font=font)
+    line_height = (sample_text_bbox[3] - sample_text_bbox[1]) * line_spacing_factor
+
+    for word in words:
+        test_line = ' '.join(current_line + [word])
+        bbox = draw.textbbox((0, 0), test_line, font=font)
+        if bbox[2] - bbox[0] <= max_width:
+            current_line.append(word)
+        else:
+            lines.append(' '.join(current_line))
+            current_line = [word]
+    lines.append(' '.join(current_line))
+
+    y_offset = 0
+    for line in lines:
+        bbox = draw.textbbox((0, 0), line, font=font)
+        line_width = bbox[2] - bbox[0]
+        draw.text((xy[0] + (max_width - line_width) / 2, xy[1] + y_offset), line, font=font, fill=fill)
+        y_offset += line_height
+    return y_offset
+
+
+def _time(func, draw, text, font):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        func(draw, text, font, '#333333', (30, 30), 740)
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main():
+    rng = random.Random(42)
+    font = get_robust_font(22)
+    img = Image.new('RGB', (800, 4000), color='#ffffff')
+    draw = ImageDraw.Draw(img)
+
+    print(f"{'words':>6} {'legacy ms':>10} {'engine ms':>10} {'speedup':>8}")
+    for count in WORD_COUNTS:
+        text = ' '.join(rng.choice(VOCABULARY) for _ in range(count))
+        draw_text_wrapped(draw, text, font, '#333333', (30, 30), 740)  # warm the width cache once
+        legacy_ms = _time(legacy_draw_text_wrapped, draw, text, font)
+        engine_ms = _time(draw_text_wrapped, draw, text, font)
+        print(f"{count:>6} {legacy_ms:>10.2f} {engine_ms:>10.2f} {legacy_ms / engine_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,60 @@
 import os
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, Dict, List, Any
 import asyncio
+import contextlib
 import uuid
 from datetime import datetime
 import logging
 from dotenv import load_dotenv
 
-# Imports for image generation and web scraping
-from PIL import Image, ImageDraw, ImageFont
-import base64
-import io
-import requests
-from bs4 import BeautifulSoup
+# Imports for web scraping
+from scraping import (
+    parse_batch_urls,
+    scrape_cache,
+    scrape_client,
+    scrape_error,
+    scrape_flights,
+    scrape_page,
+    stream_scrape_batch,
+)
+
+from rendering import (
+    BATCH_MEDIA_TYPES,
+    BULK_MEDIA_TYPES,
+    ENCODER_PROFILES,
+    EXPORT_SIZES,
+    NDJSON_MEDIA_TYPE,
+    ZIP_MEDIA_TYPE,
+    BatchTarget,
+    CanvasTooLarge,
+    DesignImageCall,
+    LogoNotFound,
+    RenderQueueFull,
+    bulk_jobs,
+    check_logo_asset,
+    decode_data_url,
+    encoder_stats,
+    engine_metrics,
+    engine_stats,
+    error_response,
+    get_export_size,
+    logo_store,
+    negotiate_media_type,
+    open_batch_stream,
+    parse_recipients,
+    readiness,
+    start_batch,
+    start_engine,
+    stop_engine,
+    stream_bulk,
+    validate_bulk_card,
+    validate_targets,
+    warm_up_engine_async,
+)
 
 # Portia imports
 from portia import (
@@ -52,6 +92,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Preview-Scale", "Server-Timing", "X-Bulk-Job"],
 )
 # Pydantic models for Business Analysis
 class BusinessIdeaRequest(BaseModel):
@@ -117,793 +158,6 @@ if not GOOGLE_API_KEY:
 genai.configure(api_key=GOOGLE_API_KEY)
 gemini_model = genai.GenerativeModel('gemini-pro')
 
-# --- Helper functions for image generation (from previous app.py) ---
-def get_robust_font(size, preferred_font_name=None):
-    if preferred_font_name:
-        try:
-            return ImageFont.truetype(preferred_font_name + ".ttf", size)
-        except IOError:
-            try:
-                return ImageFont.truetype(preferred_font_name, size)
-            except IOError:
-                pass
-
-    bundled_font_path = os.path.join(os.path.dirname(__file__), "DejaVuSans.ttf")
-    if os.path.exists(bundled_font_path):
-        try:
-            return ImageFont.truetype(bundled_font_path, size)
-        except IOError:
-            print(f"Warning: Could not load bundled font {bundled_font_path}. Trying system fonts.")
-    else:
-        print(f"Warning: Bundled font {bundled_font_path} not found. Trying system fonts.")
-
-    try:
-        return ImageFont.truetype("arial.ttf", size)
-    except IOError:
-        try:
-            return ImageFont.truetype("sans-serif.ttf", size)
-        except IOError:
-            print(f"Warning: Could not load any truetype font. Using default Pillow font.")
-            return ImageFont.load_default()
-
-def draw_text_wrapped(draw, text, font, fill, xy, max_width, line_spacing_factor=1.2):
-    lines = []
-    words = text.split()
-    current_line = []
-    
-    try:
-        sample_text_bbox = draw.textbbox((0,0), "Tg", font=font)
-        base_line_height = sample_text_bbox[3] - sample_text_bbox[1]
-        if base_line_height == 0: # Avoid division by zero or tiny height
-            base_line_height = font.size if hasattr(font, 'size') and font.size > 0 else 20
-    except Exception:
-        base_line_height = font.size if hasattr(font, 'size') and font.size > 0 else 20
-    
-    line_height = base_line_height * line_spacing_factor
-
-    for word in words:
-        test_line = ' '.join(current_line + [word])
-        bbox = draw.textbbox((0,0), test_line, font=font)
-        text_width = bbox[2] - bbox[0]
-        if text_width <= max_width:
-            current_line.append(word)
-        else:
-            lines.append(' '.join(current_line))
-            current_line = [word]
-    lines.append(' '.join(current_line))
-
-    y_start = xy[1]
-    y_offset = 0
-    for line in lines:
-        bbox = draw.textbbox((0,0), line, font=font)
-        line_width = bbox[2] - bbox[0]
-        draw.text((xy[0] + (max_width - line_width) / 2, y_start + y_offset), line, font=font, fill=fill)
-        y_offset += line_height
-    return y_offset # Return total height used by the wrapped text block
-
-def generate_image_from_design(design_data, template_type, image_width, image_height):
-    try:
-        bg_color = design_data.get('bgColor', '#ffffff')
-        text_color = design_data.get('textColor', '#333333')
-        user_font_family = design_data.get('fontFamily', 'Arial')
-        main_text = design_data.get('text', '')
-        sub_text = design_data.get('subText', '')
-        offer_details = design_data.get('offerDetails', '')
-        phone_number = design_data.get('phoneNumber', '')
-        email = design_data.get('email', '')
-        website = design_data.get('website', '')
-        logo_base64 = design_data.get('logo')
-        logo_position = design_data.get('logoPosition', {'x': 0, 'y': 0})
-
-        img = Image.new('RGB', (image_width, image_height), color=bg_color)
-        d = ImageDraw.Draw(img)
-
-        # Add logo if provided
-        if logo_base64:
-            try:
-                logo_data = base64.b64decode(logo_base64.split(',')[1])
-                logo_img = Image.open(io.BytesIO(logo_data)).convert("RGBA")
-                
-                logo_w, logo_h = 80, 80
-                logo_x, logo_y = 0, 0
-
-                if template_type == 'poster':
-                    logo_w, logo_h = 80, 80
-                    logo_x, logo_y = 20, 20
-                elif template_type == 'businessCard':
-                    logo_w, logo_h = 60, 60
-                    logo_x = (image_width - logo_w) // 2
-                    logo_y = 20
-                elif template_type == 'modernEventPoster':
-                    logo_w, logo_h = 70, 70
-                    logo_x = (image_width - logo_w) // 2
-                    logo_y = 30
-                elif template_type == 'minimalistBusinessCard':
-                    logo_w, logo_h = 50, 50
-                    logo_x, logo_y = 20, 20
-                elif template_type == 'vibrantOfferPoster':
-                    logo_w, logo_h = 60, 60
-                    logo_x = (image_width - logo_w) // 2
-                    logo_y = 25
-                elif template_type == 'professionalFlyer':
-                    logo_w, logo_h = 70, 70
-                    logo_x = image_width - logo_w - 30
-                    logo_y = 30
-                elif template_type == 'socialMediaPost':
-                    logo_w, logo_h = 60, 60
-                    logo_x, logo_y = 20, 20
-                elif template_type == 'eventTicket':
-                    logo_w, logo_h = 40, 40
-                    logo_x = image_width - logo_w - 20
-                    logo_y = 20
-                elif template_type == 'traditionalIndianBusinessCard':
-                    logo_w, logo_h = 60, 60
-                    logo_x, logo_y = 20, 20
-                elif template_type == 'productDiscountBanner':
-                    logo_w, logo_h = 70, 70
-                    logo_x, logo_y = 20, 20
-                elif template_type == 'inspirationalQuoteCard':
-                    logo_w, logo_h = 50, 50
-                    logo_x, logo_y = image_width - logo_w - 20, 20
-                elif template_type == 'eventInvitationCard':
-                    logo_w, logo_h = 60, 60
-                    logo_x, logo_y = image_width - logo_w - 25, 25
-                elif template_type == 'productShowcasePost':
-                    logo_w, logo_h = 80, 80
-                    logo_x, logo_y = (image_width - logo_w) // 2, 30
-                elif template_type == 'limitedTimeOfferBanner':
-                    logo_w, logo_h = 60, 60
-                    logo_x, logo_y = 20, 20
-                elif template_type == 'elegantContactCard':
-                    logo_w, logo_h = 60, 60
-                    logo_x, logo_y = (image_width - logo_w) // 2, 25
-                elif template_type == 'modernTechBusinessCard':
-                    logo_w, logo_h = 70, 70
-                    logo_x, logo_y = (image_width * 0.15) - (logo_w // 2), (image_height // 2) - (logo_h // 2)
-                elif template_type == 'minimalistQrCodeCard':
-                    logo_w, logo_h = 50, 50
-                    logo_x, logo_y = 20, 20
-
-                logo_img = logo_img.resize((logo_w, logo_h))
-                
-                final_logo_x = logo_x + logo_position['x']
-                final_logo_y = logo_y + logo_position['y']
-
-                img.paste(logo_img, (final_logo_x, final_logo_y), logo_img)
-            except Exception as e:
-                print(f"Error processing logo: {e}")
-
-        # --- Template-specific rendering logic ---
-        if template_type == 'poster':
-            main_font = get_robust_font(40, user_font_family)
-            sub_font = get_robust_font(25, user_font_family)
-            offer_font = get_robust_font(22, user_font_family)
-            small_font = get_robust_font(18, user_font_family)
-            
-            text_y_offset = 150 if logo_base64 else 50
-            
-            # Main Text
-            bbox_main = d.textbbox((0,0), main_text or 'Your Poster Title', font=main_font)
-            main_text_width = bbox_main[2] - bbox_main[0]
-            main_text_x = (image_width - main_text_width) / 2
-            main_text_y = text_y_offset
-            d.text((main_text_x, main_text_y), main_text or 'Your Poster Title', font=main_font, fill=text_color)
-
-            # Sub Text
-            bbox_sub = d.textbbox((0,0), sub_text or 'Catchy slogan or details here.', font=sub_font)
-            sub_text_width = bbox_sub[2] - bbox_sub[0]
-            sub_text_x = (image_width - sub_text_width) / 2
-            sub_text_y = main_text_y + main_font.size + 20
-            d.text((sub_text_x, sub_text_y), sub_text or 'Catchy slogan or details here.', font=sub_font, fill=text_color)
-
-            # Offer Details
-            if offer_details:
-                offer_font = get_robust_font(22, user_font_family)
-                bbox_offer = d.textbbox((0,0), offer_details, font=offer_font)
-                offer_width = bbox_offer[2] - bbox_offer[0]
-                offer_x = (image_width - offer_width) / 2
-                offer_y = sub_text_y + sub_font.size + 20
-                d.text((offer_x, offer_y), offer_details, font=offer_font, fill='red')
-
-            # Contact Info
-            contact_y = image_height - 80
-            if phone_number:
-                d.text((image_width - 20, contact_y), f"Call: {phone_number}", font=small_font, fill=text_color, anchor="ra")
-                contact_y += small_font.size + 5
-            if website:
-                d.text((image_width - 20, contact_y), f"Visit: {website}", font=small_font, fill=text_color, anchor="ra")
-            elif not phone_number:
-                d.text((image_width - 20, contact_y), "Grogent.com", font=small_font, fill=text_color, anchor="ra")
-
-        elif template_type == 'businessCard':
-            main_font = get_robust_font(30, user_font_family)
-            sub_font = get_robust_font(20, user_font_family)
-            small_font = get_robust_font(16, user_font_family)
-
-            current_y = 80 if logo_base64 else 40
-
-            # Main Text
-            bbox_main = d.textbbox((0,0), main_text or 'Your Business Name', font=main_font)
-            main_text_width = bbox_main[2] - bbox_main[0]
-            d.text(((image_width - main_text_width) / 2, current_y), main_text or 'Your Business Name', font=main_font, fill=text_color)
-            current_y += main_font.size + 10
-
-            # Sub Text
-            bbox_sub = d.textbbox((0,0), sub_text or 'Your Tagline / Name', font=sub_font)
-            sub_text_width = bbox_sub[2] - bbox_sub[0]
-            d.text(((image_width - sub_text_width) / 2, current_y), sub_text or 'Your Tagline / Name', font=sub_font, fill=text_color)
-            current_y += sub_font.size + 20
-
-            # Contact Info
-            d.text((image_width / 2, current_y), f"Contact: {phone_number or '123-456-7890'}", font=small_font, fill=text_color, anchor="mm")
-            current_y += small_font.size + 5
-            d.text((image_width / 2, current_y), f"Email: {email or 'info@example.com'}", font=small_font, fill=text_color, anchor="mm")
-            current_y += small_font.size + 5
-            if website:
-                d.text((image_width / 2, current_y), f"Web: {website}", font=small_font, fill=text_color, anchor="mm")
-
-        elif template_type == 'modernEventPoster':
-            header_height = image_height * 0.25
-
-            # Header
-            d.rectangle([(0, 0), (image_width, header_height)], fill=text_color)
-            
-            header_text_font = get_robust_font(50, user_font_family)
-            bbox_header_text = d.textbbox((0,0), main_text or 'Modern Event', font=header_text_font)
-            header_text_width = bbox_header_text[2] - bbox_header_text[0]
-            d.text(((image_width - header_text_width) / 2, header_height / 2 - header_text_font.size / 2 + (30 if logo_base64 else 0)),
-                   main_text or 'Modern Event', font=header_text_font, fill=bg_color)
-
-            # Body
-            body_main_font = get_robust_font(30, user_font_family)
-            small_font = get_robust_font(18, user_font_family)
-            
-            current_y = header_height + 50
-            
-            # Sub Text
-            bbox_sub = d.textbbox((0,0), sub_text or 'Join Us for an Exciting Experience!', font=body_main_font)
-            sub_text_width = bbox_sub[2] - bbox_sub[0]
-            d.text(((image_width - sub_text_width) / 2, current_y), sub_text or 'Join Us for an Exciting Experience!', font=body_main_font, fill=text_color)
-            current_y += body_main_font.size + 20
-
-            # Offer Details
-            if offer_details:
-                offer_font = get_robust_font(24, user_font_family)
-                bbox_offer = d.textbbox((0,0), offer_details, font=offer_font)
-                offer_width = bbox_offer[2] - bbox_offer[0]
-                d.text(((image_width - offer_width) / 2, current_y), offer_details, font=offer_font, fill='red')
-                current_y += offer_font.size + 30
-
-            # Call to Action
-            cta_text = website if website else 'Learn More at Grogent.com'
-            cta_font = get_robust_font(22, user_font_family)
-            bbox_cta = d.textbbox((0,0), cta_text, font=cta_font)
-            cta_width = bbox_cta[2] - bbox_cta[0] + 40
-            cta_height = bbox_cta[3] - bbox_cta[1] + 20
-            
-            cta_x = (image_width - cta_width) / 2
-            cta_y = current_y
-            d.rectangle([(cta_x, cta_y), (cta_x + cta_width, cta_y + cta_height)], fill=text_color, radius=5)
-            d.text((cta_x + 20, cta_y + 10), cta_text, font=cta_font, fill=bg_color)
-            current_y += cta_height + 20
-
-            if phone_number:
-                d.text((image_width / 2, current_y), f"Contact: {phone_number}", font=small_font, fill=text_color, anchor="mm")
-
-        elif template_type == 'minimalistBusinessCard':
-            main_font = get_robust_font(35, user_font_family)
-            sub_font = get_robust_font(22, user_font_family)
-            small_font = get_robust_font(18, user_font_family)
-
-            current_y = 30
-
-            # Main Text
-            bbox_main = d.textbbox((0,0), main_text or 'Your Name', font=main_font)
-            main_text_width = bbox_main[2] - bbox_main[0]
-            d.text((image_width - 20 - main_text_width, current_y), main_text or 'Your Name', font=main_font, fill=text_color)
-            current_y += main_font.size + 5
-
-            # Sub Text
-            bbox_sub = d.textbbox((0,0), sub_text or 'Your Professional Title', font=sub_font)
-            sub_text_width = bbox_sub[2] - bbox_sub[0]
-            d.text((image_width - 20 - sub_text_width, current_y), sub_text or 'Your Professional Title', font=sub_font, fill=text_color)
-            current_y += sub_font.size + 20
-
-            # Contact Info
-            contact_y = image_height - 20 - (small_font.size + 5) * (3 if website else (2 if email else 1))
-            if website:
-                bbox_web = d.textbbox((0,0), website, font=small_font)
-                web_width = bbox_web[2] - bbox_web[0]
-                d.text((image_width - 20 - web_width, contact_y), website, font=small_font, fill=text_color)
-                contact_y -= (small_font.size + 5)
-            if email:
-                bbox_email = d.textbbox((0,0), email, font=small_font)
-                email_width = bbox_email[2] - bbox_email[0]
-                d.text((image_width - 20 - email_width, contact_y), email, font=small_font, fill=text_color)
-                contact_y -= (small_font.size + 5)
-            if phone_number:
-                bbox_phone = d.textbbox((0,0), phone_number, font=small_font)
-                phone_width = bbox_phone[2] - bbox_phone[0]
-                d.text((image_width - 20 - phone_width, contact_y), phone_number, font=small_font, fill=text_color)
-            elif not (phone_number or email or website):
-                d.text((image_width - 20 - d.textbbox((0,0), '+1 (234) 567-8900', font=small_font)[2], contact_y), '+1 (234) 567-8900', font=small_font, fill=text_color)
-                contact_y -= (small_font.size + 5)
-                d.text((image_width - 20 - d.textbbox((0,0), 'email@example.com', font=small_font)[2], contact_y), 'email@example.com', font=small_font, fill=text_color)
-                contact_y -= (small_font.size + 5)
-                d.text((image_width - 20 - d.textbbox((0,0), 'yourwebsite.com', font=small_font)[2], contact_y), 'yourwebsite.com', font=small_font, fill=text_color)
-
-        elif template_type == 'vibrantOfferPoster':
-            header_height = image_height * 0.25
-
-            # Header
-            d.rectangle([(0, 0), (image_width, header_height)], fill=text_color)
-            
-            header_text_font = get_robust_font(50, user_font_family)
-            bbox_header_text = d.textbbox((0,0), main_text or 'BIG SALE!', font=header_text_font)
-            header_text_width = bbox_header_text[2] - bbox_header_text[0]
-            d.text(((image_width - header_text_width) / 2, header_height / 2 - header_text_font.size / 2 + (30 if logo_base64 else 0)),
-                   main_text or 'BIG SALE!', font=header_text_font, fill=bg_color)
-
-            # Body
-            body_main_font = get_robust_font(35, user_font_family)
-            small_font = get_robust_font(18, user_font_family)
-            
-            current_y = header_height + 50
-            
-            # Sub Text
-            bbox_sub = d.textbbox((0,0), sub_text or 'Up to 50% Off Everything!', font=body_main_font)
-            sub_text_width = bbox_sub[2] - bbox_sub[0]
-            d.text(((image_width - sub_text_width) / 2, current_y), sub_text or 'Up to 50% Off Everything!', font=body_main_font, fill=text_color)
-            current_y += body_main_font.size + 20
-
-            # Offer Details
-            if offer_details:
-                offer_font = get_robust_font(28, user_font_family)
-                bbox_offer = d.textbbox((0,0), offer_details, font=offer_font)
-                offer_width = bbox_offer[2] - bbox_offer[0]
-                d.text(((image_width - offer_width) / 2, current_y), offer_details, font=offer_font, fill='darkred')
-                current_y += offer_font.size + 30
-
-            # Call to Action
-            cta_text = website if website else 'Shop Now!'
-            cta_font = get_robust_font(26, user_font_family)
-            bbox_cta = d.textbbox((0,0), cta_text, font=cta_font)
-            cta_width = bbox_cta[2] - bbox_cta[0] + 50
-            cta_height = bbox_cta[3] - bbox_cta[1] + 30
-            
-            cta_x = (image_width - cta_width) / 2
-            cta_y = current_y
-            d.rounded_rectangle([(cta_x, cta_y), (cta_x + cta_width, cta_y + cta_height)], radius=50, fill='red')
-            d.text((cta_x + 25, cta_y + 15), cta_text, font=cta_font, fill='white')
-            current_y += cta_height + 20
-
-            if phone_number:
-                d.text((image_width / 2, image_height - 80), f"Call: {phone_number}", font=small_font, fill=text_color, anchor="mm")
-            
-            d.text((image_width / 2, image_height - 30), "Limited Time Offer", font=small_font, fill=text_color, anchor="mm")
-
-        elif template_type == 'professionalFlyer':
-            main_font = get_robust_font(55, user_font_family)
-            sub_font = get_robust_font(30, user_font_family)
-            body_font = get_robust_font(22, user_font_family)
-            small_font = get_robust_font(20, user_font_family)
-
-            current_y = 30
-
-            # Main Text
-            height_used = draw_text_wrapped(d, main_text or 'Professional Service', main_font, text_color, (30, current_y), image_width - 60 - (100 if logo_base64 else 0))
-            current_y += height_used + 15
-
-            # Sub Text
-            height_used = draw_text_wrapped(d, sub_text or 'Your Tagline Goes Here', sub_font, text_color, (30, current_y), image_width - 60)
-            current_y += height_used + 25
-
-            # Offer Details / Body Text
-            height_used = draw_text_wrapped(d, offer_details or 'Discover how our solutions can help your business grow. We offer unparalleled quality and dedicated support.', body_font, text_color, (30, current_y), image_width - 60)
-            current_y += height_used + 30
-
-            # Contact Section
-            d.line([(30, current_y), (image_width - 30, current_y)], fill=text_color, width=1)
-            current_y += 20
-
-            if phone_number:
-                d.text((30, current_y), f"Phone: {phone_number}", font=small_font, fill=text_color)
-                current_y += small_font.size + 5
-            if email:
-                d.text((30, current_y), f"Email: {email}", font=small_font, fill=text_color)
-                current_y += small_font.size + 5
-            if website:
-                d.text((30, current_y), f"Website: {website}", font=small_font, fill=text_color)
-            elif not (phone_number or email):
-                d.text((30, current_y), "Learn more at Grogent.com", font=small_font, fill=text_color)
-
-        elif template_type == 'socialMediaPost':
-            main_font = get_robust_font(40, user_font_family)
-            sub_font = get_robust_font(30, user_font_family)
-            cta_font = get_robust_font(22, user_font_family)
-            
-            current_y = 20
-
-            # Header (Brand Name)
-            brand_name = main_text or 'Your Brand Name'
-            bbox_brand = d.textbbox((0,0), brand_name, font=sub_font)
-            brand_width = bbox_brand[2] - bbox_brand[0]
-            d.text((20 + (80 if logo_base64 else 0), current_y + (60 - sub_font.size) / 2), brand_name, font=sub_font, fill=text_color)
-            current_y += 80
-
-            # Main Content
-            content_center_y = image_height / 2
-            
-            # Sub Text (Product Launch)
-            bbox_sub = d.textbbox((0,0), sub_text or 'New Product Launch!', font=main_font)
-            sub_text_width = bbox_sub[2] - bbox_sub[0]
-            d.text(((image_width - sub_text_width) / 2, content_center_y - main_font.size - 15), sub_text or 'New Product Launch!', font=main_font, fill=text_color)
-
-            # Offer Details
-            if offer_details:
-                bbox_offer = d.textbbox((0,0), offer_details, font=sub_font)
-                offer_width = bbox_offer[2] - bbox_offer[0]
-                d.text(((image_width - offer_width) / 2, content_center_y + 15), offer_details, font=sub_font, fill='green')
-                
-            # Call to Action
-            cta_text = f"Shop Now: {website.replace('https://', '').replace('http://', '').replace('www.', '')}" if website else 'Learn More'
-            bbox_cta = d.textbbox((0,0), cta_text, font=cta_font)
-            cta_width = bbox_cta[2] - bbox_cta[0] + 40
-            cta_height = bbox_cta[3] - bbox_cta[1] + 20
-            
-            cta_x = (image_width - cta_width) / 2
-            cta_y = image_height - 80
-            d.rectangle([(cta_x, cta_y), (cta_x + cta_width, cta_y + cta_height)], fill=text_color, radius=5)
-            d.text((cta_x + 20, cta_y + 10), cta_text, font=cta_font, fill=bg_color)
-
-        elif template_type == 'eventTicket':
-            main_font = get_robust_font(35, user_font_family)
-            detail_font = get_robust_font(22, user_font_family)
-            small_font = get_robust_font(18, user_font_family)
-
-            # Left stripe
-            d.rectangle([(0, 0), (10, image_height)], fill=text_color)
-
-            current_y = 20
-
-            # Header (Event Name)
-            event_name = main_text or 'Event Name'
-            bbox_event = d.textbbox((0,0), event_name, font=main_font)
-            event_width = bbox_event[2] - bbox_event[0]
-            d.text((20, current_y), event_name, font=main_font, fill=text_color)
-            current_y += main_font.size + 15
-
-            # Details
-            d.text((20, current_y), f"Date: {sub_text or 'DD/MM/YYYY'}", font=detail_font, fill=text_color)
-            current_y += detail_font.size + 5
-            d.text((20, current_y), f"Time: {offer_details or 'HH:MM AM/PM'}", font=detail_font, fill=text_color)
-            current_y += detail_font.size + 5
-            d.text((20, current_y), f"Location: {website or 'Venue Address'}", font=detail_font, fill=text_color)
-            current_y += detail_font.size + 5
-
-            # Footer (Ticket ID)
-            ticket_id = f"Ticket ID: #GRG{datetime.now().microsecond % 9000 + 1000}"
-            bbox_id = d.textbbox((0,0), ticket_id, font=small_font)
-            id_width = bbox_id[2] - bbox_id[0]
-            d.text((image_width - 20 - id_width, image_height - 30), ticket_id, font=small_font, fill=text_color)
-
-        elif template_type == 'traditionalIndianBusinessCard':
-            top_bg_color = '#004d40'
-            top_text_color = '#ffeb3b'
-            bottom_bg_color = '#e0b973'
-            bottom_text_color = '#004d40'
-
-            d.rectangle([(0, 0), (image_width, image_height // 2)], fill=top_bg_color)
-            d.rectangle([(0, image_height // 2), (image_width, image_height)], fill=bottom_bg_color)
-
-            main_font = get_robust_font(28, user_font_family)
-            sub_font = get_robust_font(18, user_font_family)
-            small_font = get_robust_font(16, user_font_family)
-
-            main_text_content = main_text or 'Your Business Name'
-            bbox_main = d.textbbox((0,0), main_text_content, font=main_font)
-            main_text_width = bbox_main[2] - bbox_main[0]
-            main_text_x = image_width - main_text_width - 20
-            main_text_y = (image_height // 2) / 2 - main_font.size / 2 - 10
-            d.text((main_text_x, main_text_y), main_text_content, font=main_font, fill=top_text_color)
-
-            sub_text_content = sub_text or 'Crafting Excellence'
-            bbox_sub = d.textbbox((0,0), sub_text_content, font=sub_font)
-            sub_text_width = bbox_sub[2] - bbox_sub[0]
-            sub_text_x = image_width - sub_text_width - 20
-            sub_text_y = main_text_y + main_font.size + 5
-            d.text((sub_text_x, sub_text_y), sub_text_content, font=sub_font, fill=top_text_color)
-
-            contact_lines = []
-            if phone_number:
-                contact_lines.append(phone_number)
-            if email:
-                contact_lines.append(email)
-            if website:
-                contact_lines.append(website)
-            
-            if not contact_lines:
-                contact_lines.append('+91 98765 43210')
-                contact_lines.append('contact@indianbiz.com')
-
-            total_contact_height = sum([small_font.size * 1.3 for _ in contact_lines])
-            current_contact_y = (image_height // 2) + (image_height // 2) / 2 - total_contact_height / 2
-
-            for line in contact_lines:
-                bbox_line = d.textbbox((0,0), line, font=small_font)
-                line_width = bbox_line[2] - bbox_line[0]
-                d.text(((image_width - line_width) / 2, current_contact_y), line, font=small_font, fill=bottom_text_color)
-                current_contact_y += small_font.size * 1.3
-
-        elif template_type == 'productDiscountBanner':
-            main_font = get_robust_font(60, user_font_family)
-            sub_font = get_robust_font(35, user_font_family)
-            offer_font = get_robust_font(25, user_font_family)
-            website_font = get_robust_font(22, user_font_family)
-
-            content_width = image_width - 40
-            content_x_start = 20
-
-            current_y = image_height * 0.2
-
-            # Main Text
-            height_used = draw_text_wrapped(d, main_text or 'Flash Sale!', main_font, text_color, (content_x_start, current_y), content_width)
-            current_y += height_used + 10
-
-            # Sub Text
-            height_used = draw_text_wrapped(d, sub_text or 'Up to 70% Off!', sub_font, text_color, (content_x_start, current_y), content_width)
-            current_y += height_used + 10
-
-            # Offer Details
-            if offer_details:
-                height_used = draw_text_wrapped(d, offer_details, offer_font, 'red', (content_x_start, current_y), content_width)
-                current_y += height_used + 15
-
-            # Website/Call to Action
-            if website:
-                website_text = f"Shop Now: {website.replace('https://', '').replace('http://', '').replace('www.', '')}"
-                bbox_website = d.textbbox((0,0), website_text, font=website_font)
-                website_width = bbox_website[2] - bbox_website[0]
-                website_x = (image_width - website_width) / 2
-                d.text((website_x, current_y), website_text, font=website_font, fill=text_color)
-
-        elif template_type == 'inspirationalQuoteCard':
-            quote_font = get_robust_font(40, user_font_family)
-            author_font = get_robust_font(25, user_font_family)
-            website_font = get_robust_font(18, user_font_family)
-
-            # Quote
-            quote_text = f"\u201c{main_text or 'The only way to do great work is to love what you do.'}\u201d"
-            height_used = draw_text_wrapped(d, quote_text, quote_font, text_color, (50, image_height * 0.25), image_width - 100)
-            current_y = image_height * 0.25 + height_used + 20 # Position author below quote
-
-            # Author
-            author_text = f"\u2014 {sub_text or 'Steve Jobs'}"
-            bbox_author = d.textbbox((0,0), author_text, font=author_font)
-            author_width = bbox_author[2] - bbox_author[0]
-            author_x = (image_width - author_width) / 2
-            d.text((author_x, current_y), author_text, font=author_font, fill=text_color)
-            current_y += author_font.size + 15
-
-            # Website (optional)
-            if website:
-                website_display = website.replace('https://', '').replace('http://', '').replace('www.', '')
-                bbox_website = d.textbbox((0,0), website_display, font=website_font)
-                website_width = bbox_website[2] - bbox_website[0]
-                website_x = (image_width - website_width) / 2
-                d.text((website_x, current_y), website_display, font=website_font, fill=text_color)
-
-        elif template_type == 'eventInvitationCard':
-            title_font = get_robust_font(45, user_font_family)
-            event_name_font = get_robust_font(30, user_font_family)
-            detail_font = get_robust_font(22, user_font_family)
-            rsvp_font = get_robust_font(18, user_font_family)
-
-            current_y = 25
-
-            # Title
-            bbox_title = d.textbbox((0,0), main_text or 'You\'re Invited!', font=title_font)
-            d.text((25, current_y), main_text or 'You\'re Invited!', font=title_font, fill=text_color)
-            current_y += title_font.size + 10
-
-            # Event Name
-            bbox_event_name = d.textbbox((0,0), sub_text or 'Special Event Name', font=event_name_font)
-            d.text((25, current_y), sub_text or 'Special Event Name', font=event_name_font, fill=text_color)
-            current_y += event_name_font.size + 20
-
-            # Details
-            d.text((25, current_y), f"Date: {offer_details or 'October 26, 2025'}", font=detail_font, fill=text_color)
-            current_y += detail_font.size + 5
-            d.text((25, current_y), f"Time: {phone_number or '7:00 PM EST'}", font=detail_font, fill=text_color)
-            current_y += detail_font.size + 5
-            d.text((25, current_y), f"Location: {website or 'Virtual / Your Venue'}", font=detail_font, fill=text_color)
-            current_y += detail_font.size + 5
-
-            # RSVP
-            if email:
-                d.text((25, current_y + 10), f"RSVP: {email}", font=rsvp_font, fill=text_color)
-
-        elif template_type == 'productShowcasePost':
-            product_name_font = get_robust_font(50, user_font_family)
-            tagline_font = get_robust_font(28, user_font_family)
-            offer_font = get_robust_font(22, user_font_family)
-            cta_font = get_robust_font(24, user_font_family)
-
-            current_y = image_height * 0.3 # Start from 30% down
-
-            # Product Name
-            height_used = draw_text_wrapped(d, main_text or 'Amazing Product Name', product_name_font, text_color, (30, current_y), image_width - 60)
-            current_y += height_used + 10
-
-            # Tagline
-            height_used = draw_text_wrapped(d, sub_text or 'Discover unparalleled quality.', tagline_font, text_color, (30, current_y), image_width - 60)
-            current_y += height_used + 20
-
-            # Offer Details
-            if offer_details:
-                height_used = draw_text_wrapped(d, offer_details, offer_font, 'green', (30, current_y), image_width - 60)
-                current_y += height_used + 25
-
-            # Call to Action
-            cta_text = f"Buy Now: {website.replace('https://', '').replace('http://', '').replace('www.', '')}" if website else 'Learn More'
-            bbox_cta = d.textbbox((0,0), cta_text, font=cta_font)
-            cta_width = bbox_cta[2] - bbox_cta[0] + 50
-            cta_height = bbox_cta[3] - bbox_cta[1] + 30
-            
-            cta_x = (image_width - cta_width) / 2
-            cta_y = current_y + 10 # Add some space before CTA
-            d.rectangle([(cta_x, cta_y), (cta_x + cta_width, cta_y + cta_height)], fill=text_color, radius=5)
-            d.text((cta_x + 25, cta_y + 15), cta_text, font=cta_font, fill=bg_color)
-
-        elif template_type == 'limitedTimeOfferBanner':
-            main_font = get_robust_font(70, user_font_family)
-            sub_font = get_robust_font(35, user_font_family)
-            offer_font = get_robust_font(25, user_font_family)
-            cta_font = get_robust_font(22, user_font_family)
-
-            content_width = image_width - 40
-            content_x_start = 20
-
-            current_y = image_height * 0.2
-
-            # Main Text
-            height_used = draw_text_wrapped(d, main_text or 'Limited Time Offer!', main_font, '#dc3545', (content_x_start, current_y), content_width)
-            current_y += height_used + 5
-
-            # Sub Text
-            height_used = draw_text_wrapped(d, sub_text or 'Save Big Today!', sub_font, text_color, (content_x_start, current_y), content_width)
-            current_y += height_used + 10
-
-            # Offer Details
-            if offer_details:
-                height_used = draw_text_wrapped(d, offer_details, offer_font, '#dc3545', (content_x_start, current_y), content_width)
-                current_y += height_used + 10
-
-            # Call to Action
-            if website:
-                website_text = f"Claim Your Deal: {website.replace('https://', '').replace('http://', '').replace('www.', '')}"
-                bbox_cta = d.textbbox((0,0), website_text, font=cta_font)
-                cta_width = bbox_cta[2] - bbox_cta[0]
-                cta_x = (image_width - cta_width) / 2
-                d.text((cta_x, current_y + 10), website_text, font=cta_font, fill='#007bff') # Changed cta_text to website_text
-
-        elif template_type == 'elegantContactCard':
-            name_font = get_robust_font(35, user_font_family)
-            title_font = get_robust_font(22, user_font_family)
-            contact_font = get_robust_font(18, user_font_family)
-
-            current_y = 25 + (60 if logo_base64 else 0)
-
-            # Name
-            bbox_name = d.textbbox((0,0), main_text or 'Your Name', font=name_font)
-            name_width = bbox_name[2] - bbox_name[0]
-            d.text(((image_width - name_width) / 2, current_y), main_text or 'Your Name', font=name_font, fill=text_color)
-            current_y += name_font.size + 5
-
-            # Title
-            bbox_title = d.textbbox((0,0), sub_text or 'Your Professional Title', font=title_font)
-            title_width = bbox_title[2] - bbox_title[0]
-            d.text(((image_width - title_width) / 2, current_y), sub_text or 'Your Professional Title', font=title_font, fill=text_color)
-            current_y += title_font.size + 20
-
-            # Separator Line
-            line_y = current_y
-            d.line([(image_width * 0.2, line_y), (image_width * 0.8, line_y)], fill=text_color, width=1)
-            current_y += 15
-
-            # Contact Info
-            contact_lines = []
-            if phone_number: contact_lines.append(phone_number)
-            if email: contact_lines.append(email)
-            if website: contact_lines.append(website)
-
-            for line in contact_lines:
-                bbox_line = d.textbbox((0,0), line, font=contact_font)
-                line_width = bbox_line[2] - bbox_line[0]
-                d.text(((image_width - line_width) / 2, current_y), line, font=contact_font, fill=text_color)
-                current_y += contact_font.size + 5
-
-        elif template_type == 'modernTechBusinessCard':
-            name_font = get_robust_font(35, user_font_family)
-            title_font = get_robust_font(22, user_font_family)
-            contact_font = get_robust_font(18, user_font_family)
-
-            # Left bar background
-            bar_width = image_width * 0.3
-            d.rectangle([(0, 0), (bar_width, image_height)], fill=text_color)
-
-            # Text content (right side)
-            text_start_x = bar_width + 20
-            current_y = (image_height - (name_font.size + title_font.size + contact_font.size * 3 + 30)) / 2
-
-            # Name
-            d.text((text_start_x, current_y), main_text or 'Tech Solutions Inc.', font=name_font, fill=text_color)
-            current_y += name_font.size + 5
-
-            # Title
-            d.text((text_start_x, current_y), sub_text or 'Innovating the Future', font=title_font, fill=text_color)
-            current_y += title_font.size + 20
-
-            # Contact Info
-            if phone_number:
-                d.text((text_start_x, current_y), phone_number, font=contact_font, fill=text_color)
-                current_y += contact_font.size + 5
-            if email:
-                d.text((text_start_x, current_y), email, font=contact_font, fill=text_color)
-                current_y += contact_font.size + 5
-            if website:
-                d.text((text_start_x, current_y), website, font=contact_font, fill=text_color)
-
-        elif template_type == 'minimalistQrCodeCard':
-            name_font = get_robust_font(30, user_font_family)
-            website_font = get_robust_font(18, user_font_family)
-            qr_text_font = get_robust_font(12, user_font_family)
-
-            # QR Code Placeholder
-            qr_size = 100
-            qr_x = (image_width - qr_size) / 2
-            qr_y = (image_height - qr_size) / 2 - 20
-            d.rectangle([(qr_x, qr_y), (qr_x + qr_size, qr_y + qr_size)], fill=text_color)
-            
-            # Text inside QR placeholder
-            qr_placeholder_text = "QR Code Here"
-            bbox_qr_text = d.textbbox((0,0), qr_placeholder_text, font=qr_text_font)
-            qr_text_width = bbox_qr_text[2] - bbox_qr_text[0]
-            qr_text_height = bbox_qr_text[3] - bbox_qr_text[1]
-            d.text((qr_x + (qr_size - qr_text_width) / 2, qr_y + (qr_size - qr_text_height) / 2), qr_placeholder_text, font=qr_text_font, fill=bg_color)
-
-            # Name below QR
-            current_y = qr_y + qr_size + 15
-            bbox_name = d.textbbox((0,0), main_text or 'Your Name', font=name_font)
-            name_width = bbox_name[2] - bbox_name[0]
-            d.text(((image_width - name_width) / 2, current_y), main_text or 'Your Name', font=name_font, fill=text_color)
-            current_y += name_font.size + 5
-
-            # Website below name
-            if website:
-                bbox_website = d.textbbox((0,0), website, font=website_font)
-                website_width = bbox_website[2] - bbox_website[0]
-                d.text(((image_width - website_width) / 2, current_y), website, font=website_font, fill=text_color)
-
-        # Convert to base64
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        return base64.b64encode(buffered.getvalue()).decode()
-    except Exception as e:
-        print(f"Error generating image: {e}")
-        img = Image.new('RGB', (image_width, image_height), color='red')
-        d = ImageDraw.Draw(img)
-        error_msg = f"Error: {e}"
-        error_font = ImageFont.load_default()
-        error_font.size = 20
-        bbox_error = d.textbbox((0,0), error_msg, font=error_font)
-        error_width = bbox_error[2] - bbox_error[0]
-        error_height = bbox_error[3] - bbox_error[1]
-        d.text(((image_width - error_width) / 2, (image_height - error_height) / 2), error_msg, fill='white', font=error_font)
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        return base64.b64encode(buffered.getvalue()).decode()
-
 class BusinessAnalyzer:
     def __init__(self):
         """Initialize the Portia agent for business analysis"""
@@ -1375,86 +629,294 @@ class BusinessAnalyzer:
 # Initialize analyzer
 analyzer = BusinessAnalyzer()
 
+@app.on_event("startup")
+async def start_rendering_engine():
+    """Start the render worker pool and warm it up in the background; /health reports ready once warm"""
+    start_engine()
+    app.state.warm_up_task = asyncio.create_task(warm_up_engine_async())
+
+@app.on_event("shutdown")
+async def stop_render_workers():
+    warm_up_task = app.state.warm_up_task
+    if not warm_up_task.done():
+        warm_up_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await warm_up_task
+    stop_engine()
+    await scrape_client.aclose()
+
 # --- Pydantic models for Design and Scrape Endpoints ---
 class DesignDataRequest(BaseModel):
     design_data: Dict[str, Any]
     template_type: str = 'poster'
     image_width: int = 800
     image_height: int = 1000
+    output_profile: Optional[str] = None  # see /output-profiles; PNG when omitted
+    preview_scale: Optional[float] = None  # e.g. 0.25 for a fast, laid-out-identically live preview
+
+class DesignTarget(BaseModel):
+    template_type: str = 'poster'
+    image_width: int = 800
+    image_height: int = 1000
+    format: str = 'png'
+    relative: bool = False  # treat the template's offsets as relative units, scaled to this size
+
+class DesignBatchRequest(BaseModel):
+    design_data: Dict[str, Any]
+    targets: List[DesignTarget]
+
+class DesignExportRequest(BaseModel):
+    design_data: Dict[str, Any]
+    template_type: str = 'poster'
+    sizes: Optional[List[str]] = None  # names from /export-sizes; all of them when omitted
+    format: str = 'png'
+
+class BulkCardsRequest(BaseModel):
+    design_data: Dict[str, Any]
+    template_type: str = 'poster'
+    image_width: int = 800
+    image_height: int = 1000
+    format: str = 'png'
+    recipients: Optional[List[Dict[str, Any]]] = None  # per-card design_data field overrides, plus a 'name'
+    recipients_csv: Optional[str] = None  # or the same as CSV text with a header row
+
+class LogoAssetRequest(BaseModel):
+    logo: str  # data URL or bare base64 of the image file
 
 class ScrapeURLRequest(BaseModel):
     url: str
 
+class ScrapeBatchRequest(BaseModel):
+    urls: List[str]
+
 class GenerateTextRequest(BaseModel):
     prompt: str
 
 # --- API Endpoints for Design Generation and Web Scraping ---
 
+def require_logo_asset(design_data):
+    """404 when design_data references a logo id the store does not hold (never uploaded, or evicted)."""
+    try:
+        check_logo_asset(design_data)
+    except LogoNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.post('/logo-assets')
+async def upload_logo_asset(logo_request: LogoAssetRequest):
+    """Stores a logo once and returns the id designs can reference as design_data['logoId']."""
+    try:
+        logo_id = logo_store.put(decode_data_url(logo_request.logo))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logo = logo_store.get(logo_id)
+    return {"logo_id": logo_id, "width": logo.width, "height": logo.height}
+
+@app.get('/logo-assets/{logo_id}')
+async def get_logo_asset(logo_id: str):
+    """Tells the client whether a logo is still stored, so it only re-uploads evicted ones."""
+    logo = logo_store.get(logo_id)
+    if logo is None:
+        raise HTTPException(status_code=404, detail="Logo not found")
+    return {"logo_id": logo_id, "width": logo.width, "height": logo.height}
+
 @app.post('/generate-design-image')
-async def get_design_image_endpoint(design_request: DesignDataRequest):
-    """Generates a design image based on provided data and template type."""
+async def get_design_image_endpoint(design_request: DesignDataRequest,
+                                    if_none_match: Optional[str] = Header(None),
+                                    accept: Optional[str] = Header(None)):
+    """Generates a design image based on provided data and template type.
+
+    Clients that prefer the output profile's image type (image/png unless
+    another profile is asked for) in their Accept header get the raw bytes;
+    everyone else gets the original {"image": <base64>} JSON body.
+
+    With a preview_scale the image is rendered that much smaller with a fast
+    encoder, and the JSON body adds the full-size layout of its elements.
+    Rendering is CPU-bound, so it runs in the worker pool instead of on the event loop.
+    """
     try:
-        image_base64 = generate_image_from_design(
+        call = DesignImageCall(
             design_request.design_data,
             design_request.template_type,
             design_request.image_width,
-            design_request.image_height
+            design_request.image_height,
+            output_profile=design_request.output_profile,
+            preview_scale=design_request.preview_scale,
+            accept=accept,
         )
-        if image_base64:
-            return {"image": image_base64}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to generate image")
+        response = await call.render_async(if_none_match)
     except Exception as e:
-        logger.error(f"Error in /generate-design-image: {e}")
-        raise HTTPException(status_code=500, detail=f"Server error generating image: {e}")
+        status, detail, headers = error_response(e)
+        raise HTTPException(status_code=status, detail=detail, headers=headers or None)
+
+    if response.body is None:
+        return Response(status_code=response.status, headers=response.headers)
+    if isinstance(response.body, dict):
+        return JSONResponse(response.body, headers=response.headers)
+    if isinstance(response.body, (bytes, memoryview)):
+        return Response(content=response.body, media_type=response.media_type, headers=response.headers)
+    return StreamingResponse(response.body, media_type=response.media_type, headers=response.headers)
+
+@app.get('/metrics')
+async def render_metrics_endpoint():
+    """Render latency histograms per template, output size and stage, with each series' slowest stage."""
+    return engine_metrics()
+
+@app.get('/output-profiles')
+async def list_output_profiles():
+    """Lists the output profiles with the encode time and size measured per template so far."""
+    measured = encoder_stats.stats()
+    return {
+        name: {
+            "media_type": profile.media_type,
+            "extension": profile.extension,
+            "measured": measured.get(name, {}),
+        }
+        for name, profile in ENCODER_PROFILES.items()
+    }
+
+@app.post('/generate-design-batch')
+async def generate_design_batch_endpoint(batch_request: DesignBatchRequest,
+                                         accept: Optional[str] = Header(None)):
+    """Renders one design to several templates and sizes in a single call.
+
+    The images are streamed as a ZIP archive (or multipart/mixed when the
+    Accept header asks for it) in the order they finish rendering, so the
+    client can use the first one before the last is done.
+    """
+    targets = [
+        BatchTarget(t.template_type, t.image_width, t.image_height, t.format.lower(), relative=t.relative)
+        for t in batch_request.targets
+    ]
+    return await stream_design_targets(batch_request.design_data, targets, accept, "designs.zip")
+
+@app.post('/export-design')
+async def export_design_endpoint(export_request: DesignExportRequest,
+                                 accept: Optional[str] = Header(None)):
+    """Exports one design at the standard print and social sizes in a single call.
+
+    The layout is solved in relative units, so every size shows the same
+    design; the sizes render concurrently and stream back like a batch.
+    """
+    try:
+        sizes = [get_export_size(name) for name in (export_request.sizes or EXPORT_SIZES)]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    targets = [
+        BatchTarget(export_request.template_type, size.width, size.height, export_request.format.lower(),
+                    name=size.name, relative=True, dpi=size.dpi)
+        for size in sizes
+    ]
+    return await stream_design_targets(export_request.design_data, targets, accept, "export.zip")
+
+@app.get('/export-sizes')
+async def list_export_sizes():
+    return {name: size._asdict() for name, size in EXPORT_SIZES.items()}
+
+async def stream_design_targets(design_data, targets, accept, filename):
+    """Validates the targets and streams their renders as ZIP or multipart/mixed, per the Accept header.
+
+    A target that fails is reported in a ``.error.json`` member; a batch the
+    render workers have no room for is answered with 503 and Retry-After.
+    """
+    try:
+        validate_targets(targets)
+    except CanvasTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    require_logo_asset(design_data)
+
+    media_type = negotiate_media_type(accept, BATCH_MEDIA_TYPES)
+    stream = open_batch_stream(media_type)
+    headers = {"Vary": "Accept"}
+    if media_type == ZIP_MEDIA_TYPE:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    try:
+        body = await start_batch(design_data, targets, stream)
+    except RenderQueueFull as e:
+        status, detail, error_headers = error_response(e)
+        raise HTTPException(status_code=status, detail=detail, headers=error_headers)
+    return StreamingResponse(body,
+                             media_type=stream.media_type, headers=headers)
+
+@app.post('/generate-bulk-cards')
+async def generate_bulk_cards_endpoint(bulk_request: BulkCardsRequest,
+                                       accept: Optional[str] = Header(None)):
+    """Renders one personalized card per recipient of a customer list.
+
+    Each recipient overrides the design's text fields (text, subText,
+    offerDetails, phoneNumber, email, website, qrUrl). The cards render
+    across the worker pool and stream back as a ZIP archive, or as NDJSON
+    with the progress on every line when the Accept header asks for it. The X-Bulk-Job
+    header names the job, whose progress /bulk-jobs/{job_id} reports.
+    """
+    format = bulk_request.format.lower()
+    try:
+        recipients = parse_recipients(bulk_request.recipients, bulk_request.recipients_csv)
+        validate_bulk_card(bulk_request.image_width, bulk_request.image_height, format)
+    except CanvasTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    require_logo_asset(bulk_request.design_data)
+
+    media_type = negotiate_media_type(accept, BULK_MEDIA_TYPES)
+    job = bulk_jobs.create(len(recipients))
+    headers = {"Vary": "Accept", "X-Bulk-Job": job.id}
+    if media_type == ZIP_MEDIA_TYPE:
+        headers["Content-Disposition"] = 'attachment; filename="cards.zip"'
+    cards = stream_bulk(bulk_request.design_data, bulk_request.template_type, bulk_request.image_width,
+                        bulk_request.image_height, recipients, job, media_type, format)
+    return StreamingResponse(cards, media_type=media_type, headers=headers)
+
+@app.get('/bulk-jobs/{job_id}')
+async def get_bulk_job(job_id: str):
+    """Progress of a /generate-bulk-cards job: cards done and failed, elapsed time and throughput."""
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    return job.stats()
 
 @app.post('/scrape-content')
 async def scrape_content_endpoint(scrape_request: ScrapeURLRequest):
-    """Scrapes content (main text, sub text, URL) from a given URL."""
+    """Scrapes content (main text, sub text, URL) from a given URL.
+
+    The page is fetched over the shared connection pool without blocking the
+    event loop, and parsed in a thread; a fetch past its deadline is a 504.
+    Results are cached per normalized URL and revalidated with the page's
+    ETag/Last-Modified once stale, so an unchanged page is not parsed again.
+    Concurrent requests for the same URL share a single fetch.
+    """
     url = scrape_request.url
     if not url:
         raise HTTPException(status_code=400, detail="URL is required")
 
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        main_text = ''
-        title_tag = soup.find(['h1', 'h2'])
-        if title_tag:
-            main_text = title_tag.get_text(strip=True)
-        elif soup.title:
-            main_text = soup.title.get_text(strip=True)
-
-        sub_text = ''
-        first_p = soup.find('p')
-        if first_p:
-            sub_text = first_p.get_text(strip=True)
-        else:
-            meta_description = soup.find('meta', attrs={'name': 'description'})
-            if meta_description and meta_description.get('content'):
-                sub_text = meta_description['content'].strip()
-
-        if main_text and len(main_text) > 100:
-            main_text = main_text[:97] + '...'
-        if sub_text and len(sub_text) > 200:
-            sub_text = sub_text[:197] + '...'
-
-        return {
-            'main_text': main_text,
-            'sub_text': sub_text,
-            'url': url
-        }
-
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=500, detail=f'Failed to fetch URL: {e}')
+        main_text, sub_text = await scrape_page(url)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f'Failed to parse content: {e}')
+        status, message = scrape_error(e)
+        raise HTTPException(status_code=status, detail=message)
+
+    return {
+        'main_text': main_text,
+        'sub_text': sub_text,
+        'url': url
+    }
+
+@app.post('/scrape-batch')
+async def scrape_batch_endpoint(batch_request: ScrapeBatchRequest):
+    """Scrapes a list of URLs concurrently, streaming NDJSON as each page completes.
+
+    Pages are fetched side by side, under a cap on the whole batch and on each
+    host, so the batch takes about as long as its slowest page. Every URL gets
+    a line with its main and sub text, or with the status and error
+    /scrape-content would have answered; a last line summarizes the batch.
+    """
+    try:
+        urls = parse_batch_urls(batch_request.urls)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(stream_scrape_batch(urls), media_type=NDJSON_MEDIA_TYPE)
 
 @app.post('/generate-text')
 async def generate_text_endpoint(text_request: GenerateTextRequest):
@@ -1553,14 +1015,19 @@ async def delete_analysis(analysis_id: str):
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now(),
+    """Health check endpoint, 503 until the renderer has warmed up"""
+    health = {
+        "status": "healthy" if readiness.ready else "warming",
+        "timestamp": datetime.now().isoformat(),
         "portia_available": analyzer.portia is not None,
         "browser_tool_available": analyzer.browser_tool is not None,
-        "google_api_key_set": GOOGLE_API_KEY is not None
+        "google_api_key_set": GOOGLE_API_KEY is not None,
+        "scrape_client": scrape_client.stats(),
+        "scrape_cache": scrape_cache.stats(),
+        "scrape_flights": scrape_flights.stats(),
+        **engine_stats()
     }
+    return JSONResponse(health, status_code=200 if readiness.ready else 503)
 
 if __name__ == "__main__":
     # Ensure the 'backend' directory exists for font loading
@@ -0,0 +1,249 @@
+# backend/rendering - Shared design rendering helpers for the Flask and FastAPI servers
+from .assets import LogoAssetStore, decode_data_url, logo_store
+from .batch import (
+    MAX_BATCH_TARGETS,
+    BatchTarget,
+    MultipartStream,
+    ZipStream,
+    open_batch_stream,
+    render_batch,
+    start_batch,
+    stream_batch,
+    validate_targets,
+)
+from .budget import (
+    MAX_CANVAS_PIXELS,
+    SPOOL_THRESHOLD_PIXELS,
+    CanvasTooLarge,
+    MemoryBudget,
+    SpooledImage,
+    check_canvas,
+    estimate_render_bytes,
+    render_budget,
+)
+from .bulk import (
+    BULK_CHUNK_SIZE,
+    MAX_BULK_RECIPIENTS,
+    RECIPIENT_FIELDS,
+    BulkJob,
+    BulkJobs,
+    Recipient,
+    bulk_jobs,
+    encode_recipients,
+    parse_recipients,
+    render_bulk,
+    stream_bulk,
+    validate_bulk_card,
+)
+from .cache import RenderedImageCache, design_cache_key, etag_matches, image_cache
+from .encoders import (
+    DEFAULT_PROFILE,
+    ENCODER_PROFILES,
+    EncoderProfile,
+    EncoderStats,
+    encode_image,
+    encoder_stats,
+    get_encoder_profile,
+)
+from .engine import (
+    DesignImageCall,
+    DesignRequestInvalid,
+    EngineResponse,
+    LogoNotFound,
+    check_logo_asset,
+    engine_metrics,
+    engine_stats,
+    error_response,
+    start_engine,
+    stop_engine,
+    warm_up_engine,
+    warm_up_engine_async,
+)
+from .executor import RenderExecutor, RenderQueueFull, render_executor
+from .fallback import FALLBACK_FONT_FILES, CoverageIndex, FontFallback, font_fallback, read_cmap
+from .fonts import COMMON_FONT_SIZES, FontRegistry, font_registry, get_robust_font
+from .http import (
+    BATCH_MEDIA_TYPES,
+    BULK_MEDIA_TYPES,
+    DESIGN_IMAGE_MEDIA_TYPES,
+    JSON_MEDIA_TYPE,
+    MULTIPART_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    PNG_MEDIA_TYPE,
+    ZIP_MEDIA_TYPE,
+    negotiate_media_type,
+)
+from .preview import (
+    MAX_PREVIEW_SCALE,
+    MIN_PREVIEW_SCALE,
+    PREVIEW_PROFILE,
+    LayoutRecorder,
+    ScaledDraw,
+    validate_preview_scale,
+)
+from .renderer import (
+    DesignRender,
+    PreparedDesign,
+    RenderedImage,
+    RenderPlan,
+    base64_image,
+    compile_plan,
+    encode_design,
+    encode_design_bytes,
+    encode_design_layout,
+    encode_prepared,
+    encode_prepared_bytes,
+    encode_prepared_file,
+    generate_image_from_design,
+    layout_design,
+    prepare_design,
+    render_design,
+    render_design_png,
+    render_prepared,
+)
+from .qr import draw_qr, qr_matrix, qr_payload
+from .sizes import EXPORT_SIZES, REFERENCE_WIDTH, ExportSize, get_export_size, relative_canvas
+from .templates import TEMPLATES, TemplateSpec, get_template, register_template
+from .text import FallbackDraw, TextBlock, WrappedLine, draw_text_wrapped, measure_text, wrap_text
+from .timing import (
+    LATENCY_BUCKETS_MS,
+    LatencyHistogram,
+    RenderMetrics,
+    StageTimer,
+    render_metrics,
+    server_timing_header,
+)
+from .warmup import WARM_UP_SIZES, Readiness, process_warm_up, readiness, warm_process, warm_up_design
+
+__all__ = [
+    "BATCH_MEDIA_TYPES",
+    "BULK_CHUNK_SIZE",
+    "BULK_MEDIA_TYPES",
+    "BatchTarget",
+    "BulkJob",
+    "BulkJobs",
+    "COMMON_FONT_SIZES",
+    "CanvasTooLarge",
+    "CoverageIndex",
+    "DEFAULT_PROFILE",
+    "DESIGN_IMAGE_MEDIA_TYPES",
+    "DesignImageCall",
+    "DesignRender",
+    "DesignRequestInvalid",
+    "ENCODER_PROFILES",
+    "EXPORT_SIZES",
+    "EncoderProfile",
+    "EncoderStats",
+    "EngineResponse",
+    "ExportSize",
+    "FALLBACK_FONT_FILES",
+    "FallbackDraw",
+    "FontFallback",
+    "FontRegistry",
+    "JSON_MEDIA_TYPE",
+    "LATENCY_BUCKETS_MS",
+    "LatencyHistogram",
+    "LayoutRecorder",
+    "LogoAssetStore",
+    "LogoNotFound",
+    "MAX_BATCH_TARGETS",
+    "MAX_BULK_RECIPIENTS",
+    "MAX_CANVAS_PIXELS",
+    "MAX_PREVIEW_SCALE",
+    "MIN_PREVIEW_SCALE",
+    "MULTIPART_MEDIA_TYPE",
+    "MemoryBudget",
+    "MultipartStream",
+    "NDJSON_MEDIA_TYPE",
+    "PNG_MEDIA_TYPE",
+    "PREVIEW_PROFILE",
+    "PreparedDesign",
+    "RECIPIENT_FIELDS",
+    "REFERENCE_WIDTH",
+    "Readiness",
+    "Recipient",
+    "RenderExecutor",
+    "RenderMetrics",
+    "RenderPlan",
+    "RenderQueueFull",
+    "RenderedImage",
+    "RenderedImageCache",
+    "SPOOL_THRESHOLD_PIXELS",
+    "ScaledDraw",
+    "SpooledImage",
+    "StageTimer",
+    "TEMPLATES",
+    "TemplateSpec",
+    "TextBlock",
+    "WARM_UP_SIZES",
+    "WrappedLine",
+    "ZIP_MEDIA_TYPE",
+    "ZipStream",
+    "base64_image",
+    "bulk_jobs",
+    "check_canvas",
+    "check_logo_asset",
+    "compile_plan",
+    "decode_data_url",
+    "design_cache_key",
+    "draw_qr",
+    "draw_text_wrapped",
+    "encode_design",
+    "encode_design_bytes",
+    "encode_design_layout",
+    "encode_image",
+    "encode_prepared",
+    "encode_prepared_bytes",
+    "encode_prepared_file",
+    "encode_recipients",
+    "encoder_stats",
+    "engine_metrics",
+    "engine_stats",
+    "error_response",
+    "estimate_render_bytes",
+    "etag_matches",
+    "font_fallback",
+    "font_registry",
+    "generate_image_from_design",
+    "get_encoder_profile",
+    "get_export_size",
+    "get_robust_font",
+    "get_template",
+    "image_cache",
+    "layout_design",
+    "logo_store",
+    "measure_text",
+    "negotiate_media_type",
+    "open_batch_stream",
+    "parse_recipients",
+    "prepare_design",
+    "process_warm_up",
+    "qr_matrix",
+    "qr_payload",
+    "read_cmap",
+    "readiness",
+    "register_template",
+    "relative_canvas",
+    "render_batch",
+    "render_budget",
+    "render_bulk",
+    "render_design",
+    "render_design_png",
+    "render_executor",
+    "render_metrics",
+    "render_prepared",
+    "server_timing_header",
+    "start_batch",
+    "start_engine",
+    "stop_engine",
+    "stream_batch",
+    "stream_bulk",
+    "validate_bulk_card",
+    "validate_preview_scale",
+    "validate_targets",
+    "warm_process",
+    "warm_up_design",
+    "warm_up_engine",
+    "warm_up_engine_async",
+    "wrap_text",
+]
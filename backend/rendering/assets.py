@@ -0,0 +1,98 @@
+# backend/rendering/assets.py - Content-addressed store of decoded logos and their resized variants
+import base64
+import binascii
+import hashlib
+import io
+import os
+import threading
+
+from PIL import Image
+
+from .cache import ImageLRU
+
+DEFAULT_LOGO_STORE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_LOGO_VARIANTS_MAX_BYTES = 32 * 1024 * 1024
+MAX_LOGO_PIXELS = 4096 * 4096
+# Image.resize's own default for RGBA, so cached variants match what renders used to produce
+DEFAULT_RESAMPLE = Image.Resampling.BICUBIC
+
+
+def decode_data_url(data_url):
+    """Bytes of a ``data:<type>;base64,<payload>`` URL (a bare base64 payload is accepted too)."""
+    payload = data_url.split(',', 1)[1] if ',' in data_url else data_url
+    try:
+        return base64.b64decode(payload)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Logo is not valid base64: {e}")
+
+
+class LogoAssetStore:
+    """Decodes each distinct logo once and keeps pre-resized RGBA variants of it.
+
+    Logos are identified by the SHA-256 of their encoded bytes, so uploading the
+    same file twice, or sending it inline in several designs, decodes it once.
+    Variants are keyed by ``(logo_id, width, height, resample)``. Both tiers are
+    LRUs bounded by decoded size; an evicted logo has to be uploaded again.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_LOGO_STORE_MAX_BYTES, max_variant_bytes=DEFAULT_LOGO_VARIANTS_MAX_BYTES):
+        self._originals = ImageLRU(max_bytes)
+        self._variants = ImageLRU(max_variant_bytes)
+        self._lock = threading.Lock()
+
+    def put(self, data):
+        """Decode ``data`` (encoded image bytes) unless already stored; returns its logo id."""
+        logo_id = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if logo_id in self._originals:
+                return logo_id
+        try:
+            img = Image.open(io.BytesIO(data))
+            if img.width * img.height > MAX_LOGO_PIXELS:
+                raise ValueError(f"Logo is {img.width}x{img.height}, larger than {MAX_LOGO_PIXELS} pixels")
+            img = img.convert("RGBA")
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Logo is not a readable image: {e}")
+        with self._lock:
+            self._originals.put(logo_id, img)
+            if logo_id not in self._originals:
+                raise ValueError(f"Logo is {img.width}x{img.height}, too large for the logo store")
+        return logo_id
+
+    def put_data_url(self, data_url):
+        return self.put(decode_data_url(data_url))
+
+    def get(self, logo_id):
+        with self._lock:
+            return self._originals.get(logo_id)
+
+    def __contains__(self, logo_id):
+        with self._lock:
+            return logo_id in self._originals
+
+    def variant(self, logo_id, size, resample=DEFAULT_RESAMPLE):
+        """The logo resized to ``size``, or None when the logo is not stored."""
+        key = (logo_id, size[0], size[1], resample)
+        with self._lock:
+            img = self._variants.get(key)
+            if img is not None:
+                return img
+            original = self._originals.get(logo_id)
+        if original is None:
+            return None
+        img = original.resize(size, resample)
+        with self._lock:
+            self._variants.put(key, img)
+        return img
+
+    def stats(self):
+        with self._lock:
+            return {"logos": self._originals.stats(), "variants": self._variants.stats()}
+
+
+logo_store = LogoAssetStore(
+    int(os.getenv("LOGO_STORE_MAX_BYTES", DEFAULT_LOGO_STORE_MAX_BYTES)),
+    int(os.getenv("LOGO_VARIANTS_MAX_BYTES", DEFAULT_LOGO_VARIANTS_MAX_BYTES)),
+)
@@ -0,0 +1,257 @@
+# backend/rendering/batch.py - Renders one design to many targets and streams the results
+import asyncio
+import io
+import json
+import logging
+import os
+import time
+import uuid
+import zipfile
+from contextlib import aclosing
+from typing import NamedTuple, Optional
+
+from .budget import SpooledImage, check_canvas
+from .executor import RenderQueueFull, render_executor
+from .encoders import DEFAULT_PROFILE, ENCODER_PROFILES
+from .http import JSON_MEDIA_TYPE, MULTIPART_MEDIA_TYPE, ZIP_MEDIA_TYPE
+from .renderer import DesignRender, prepare_design
+from .sizes import relative_canvas
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_TARGETS = 16
+DEFAULT_BATCH_QUEUE_WAIT_S = 30
+
+# How long a batch target waits for room in the worker pool before it gives up
+BATCH_QUEUE_WAIT_S = float(os.getenv("BATCH_QUEUE_WAIT_S", DEFAULT_BATCH_QUEUE_WAIT_S))
+
+
+class BatchTarget(NamedTuple):
+    template_type: str
+    image_width: int
+    image_height: int
+    format: str = DEFAULT_PROFILE  # an output profile name
+    name: Optional[str] = None  # label for the file name, the template type when None
+    relative: bool = False  # lay out in relative units (see sizes.py) instead of canvas pixels
+    dpi: Optional[int] = None  # resolution written into the image, for print sizes
+
+    @property
+    def profile(self):
+        return ENCODER_PROFILES[self.format]
+
+    def canvas(self):
+        """``(layout_width, layout_height, scale)`` the target is laid out on and painted at."""
+        if self.relative:
+            return relative_canvas(self.image_width, self.image_height)
+        return self.image_width, self.image_height, 1.0
+
+    def filename(self, index, ok=True):
+        suffix = "" if ok else "-error"
+        return f"{self._stem(index)}{suffix}.{self.profile.extension}"
+
+    def error_filename(self, index):
+        """Name of the member reporting why the target could not be rendered."""
+        return f"{self._stem(index)}.error.json"
+
+    def _stem(self, index):
+        label = self.name or self.template_type
+        return f"{index:02d}-{label}-{self.image_width}x{self.image_height}"
+
+
+def validate_targets(targets):
+    """Raise ValueError unless ``targets`` is a non-empty list the batch can render."""
+    if not targets:
+        raise ValueError("At least one target is required")
+    if len(targets) > MAX_BATCH_TARGETS:
+        raise ValueError(f"At most {MAX_BATCH_TARGETS} targets are allowed per batch")
+    for target in targets:
+        if target.format not in ENCODER_PROFILES:
+            raise ValueError(f"Unsupported format '{target.format}', expected one of {sorted(ENCODER_PROFILES)}")
+        check_canvas(target.image_width, target.image_height)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStream:
+    """Incremental ZIP writer: each ``add`` returns the bytes of one complete member.
+
+    The sink is unseekable, so zipfile writes data descriptors after each member
+    instead of patching local headers, and the archive can be sent as it grows.
+    Images are already compressed, so members are stored rather than deflated.
+    """
+
+    media_type = ZIP_MEDIA_TYPE
+
+    def __init__(self):
+        self._sink = _ChunkSink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_STORED)
+
+    def add(self, name, data, media_type=None, headers=None):
+        self._zip.writestr(name, data)
+        return self._sink.drain()
+
+    def add_chunks(self, name, chunks, size, media_type=None, headers=None):
+        """Like ``add`` for a member read in chunks, yielding its bytes as they are written."""
+        with self._zip.open(name, "w") as member:
+            for chunk in chunks:
+                member.write(chunk)
+                yield self._sink.drain()
+        yield self._sink.drain()
+
+    def close(self):
+        self._zip.close()
+        return self._sink.drain()
+
+
+class MultipartStream:
+    """multipart/mixed writer: each ``add`` returns one complete body part."""
+
+    def __init__(self, boundary=None):
+        self.boundary = boundary or uuid.uuid4().hex
+        self.media_type = f"{MULTIPART_MEDIA_TYPE}; boundary={self.boundary}"
+
+    def _head(self, name, size, media_type, headers):
+        part_headers = {
+            "Content-Type": media_type,
+            "Content-Disposition": f'attachment; filename="{name}"',
+            "Content-Length": str(size),
+            **(headers or {}),
+        }
+        head = "".join(f"{key}: {value}\r\n" for key, value in part_headers.items())
+        return f"--{self.boundary}\r\n{head}\r\n".encode("latin-1")
+
+    def add(self, name, data, media_type, headers=None):
+        return b"".join((self._head(name, len(data), media_type, headers), data, b"\r\n"))
+
+    def add_chunks(self, name, chunks, size, media_type, headers=None):
+        """Like ``add`` for a part read in chunks, yielding its bytes as they come."""
+        yield self._head(name, size, media_type, headers)
+        yield from chunks
+        yield b"\r\n"
+
+    def close(self):
+        return f"--{self.boundary}--\r\n".encode("latin-1")
+
+
+def open_batch_stream(media_type):
+    return MultipartStream() if media_type == MULTIPART_MEDIA_TYPE else ZipStream()
+
+
+async def _render_target(prepared, job, deadline):
+    # Targets of a batch that is already streaming wait for pool capacity, until the deadline
+    while True:
+        try:
+            return await job.render_in(render_executor, prepared)
+        except RenderQueueFull as e:
+            if time.monotonic() + e.retry_after > deadline:
+                raise
+            await asyncio.sleep(e.retry_after)
+
+
+async def render_batch(design_data, targets, queue_wait=BATCH_QUEUE_WAIT_S):
+    """Render ``design_data`` to every target in parallel, yielding ``(index, target, rendered, error)`` as each finishes.
+
+    The design is prepared once (fields parsed, logo decoded) and each target is
+    shipped to the workers with its logo already resized; targets already in
+    the image cache are yielded before anything is rendered. A target that
+    failed is yielded with ``rendered`` None and the exception in ``error``;
+    one still waiting for the worker pool after ``queue_wait`` seconds fails
+    with RenderQueueFull.
+    """
+    deadline = time.monotonic() + queue_wait
+    pending = {}
+    prepared = None
+    for index, target in enumerate(targets):
+        layout_width, layout_height, scale = target.canvas()
+        job = DesignRender(design_data, target.template_type, layout_width, layout_height,
+                           representation=target.format, profile=target.format, scale=scale, dpi=target.dpi)
+        rendered = await job.cached_async()
+        if rendered is not None:
+            yield index, target, rendered, None
+            continue
+        if prepared is None:
+            prepared = await asyncio.to_thread(prepare_design, design_data)
+        task = asyncio.ensure_future(_render_target(prepared, job, deadline))
+        pending[task] = (index, target)
+
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, target = pending.pop(task)
+                try:
+                    rendered, error = task.result(), None
+                except Exception as e:
+                    logger.error(f"Error rendering batch target {target}: {e}")
+                    rendered, error = None, e
+                yield index, target, rendered, error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def stream_batch(design_data, targets, stream):
+    """Encode the results of render_batch into ``stream``'s container as they arrive.
+
+    A target that failed gets a ``<name>.error.json`` member in place of its
+    image. If the first target to finish could not get into the worker pool,
+    RenderQueueFull is raised instead, before anything is written.
+    """
+    started = False
+    async with aclosing(render_batch(design_data, targets)) as results:
+        async for index, target, rendered, error in results:
+            if error is not None:
+                if isinstance(error, RenderQueueFull) and not started:
+                    raise error
+                report = {"index": index, "target": target._asdict(), "error": str(error)}
+                yield stream.add(target.error_filename(index), json.dumps(report).encode(), JSON_MEDIA_TYPE)
+            else:
+                ok = rendered.etag is not None
+                headers = {"ETag": rendered.etag} if ok else {}
+                name, data, media_type = target.filename(index, ok), rendered.data, target.profile.media_type
+                if isinstance(data, SpooledImage):
+                    for chunk in stream.add_chunks(name, data.iter_chunks(), len(data), media_type, headers):
+                        yield chunk
+                else:
+                    yield stream.add(name, data, media_type, headers)
+            started = True
+    yield stream.close()
+
+
+async def start_batch(design_data, targets, stream):
+    """stream_batch, run up to its first chunk so a batch the worker pool has no room for fails before responding.
+
+    Raises RenderQueueFull when the first target waited BATCH_QUEUE_WAIT_S for
+    the pool in vain; the caller can still answer 503.
+    """
+    chunks = stream_batch(design_data, targets, stream)
+    try:
+        first = await anext(chunks)
+    except BaseException:
+        stream.close()
+        raise
+
+    async def resumed():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return resumed()
@@ -0,0 +1,162 @@
+# backend/rendering/budget.py - Canvas size limits, memory admission control and spooled large outputs
+#
+# An RGB canvas costs 3 bytes per pixel, and an in-memory render holds the
+# cached base layer, the copy it draws on and the encoded buffer at once.
+# Renders reserve their estimated peak from a process-wide budget before they
+# start, and large canvases are encoded straight into a temporary file that is
+# streamed to the client, so one print-size request cannot balloon the server.
+import base64
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from .executor import RenderQueueFull
+
+DEFAULT_MAX_CANVAS_PIXELS = 40_000_000  # A2 at 300 DPI is about 35 megapixels
+DEFAULT_MEMORY_BUDGET_BYTES = 512 * 1024 * 1024
+# From this size on, renders skip the base layer cache and encode to disk
+DEFAULT_SPOOL_THRESHOLD_PIXELS = 4_000_000
+SPOOL_CHUNK_SIZE = 3 * 64 * 1024  # a multiple of 3, so chunks base64-encode independently
+BUDGET_RETRY_AFTER_S = 1
+
+MAX_CANVAS_PIXELS = int(os.getenv("MAX_CANVAS_PIXELS", DEFAULT_MAX_CANVAS_PIXELS))
+SPOOL_THRESHOLD_PIXELS = int(os.getenv("SPOOL_THRESHOLD_PIXELS", DEFAULT_SPOOL_THRESHOLD_PIXELS))
+SPOOL_DIR = os.getenv("RENDER_SPOOL_DIR") or None
+
+
+class CanvasTooLarge(ValueError):
+    """Raised for an output canvas over MAX_CANVAS_PIXELS."""
+
+
+def check_canvas(width, height):
+    if width <= 0 or height <= 0:
+        raise ValueError("Image dimensions must be positive")
+    if width * height > MAX_CANVAS_PIXELS:
+        raise CanvasTooLarge(f"{width}x{height} is over the {MAX_CANVAS_PIXELS:,} pixel limit")
+
+
+def should_spool(width, height):
+    return width * height >= SPOOL_THRESHOLD_PIXELS
+
+
+def estimate_render_bytes(width, height):
+    """Estimated peak memory of rendering and encoding a ``width`` x ``height`` canvas."""
+    canvas = width * height * 3
+    # Spooled renders draw on a fresh layer and encode to disk; the others also
+    # hold the cached layer and, at worst, an encoded buffer the size of the canvas
+    return canvas if should_spool(width, height) else canvas * 3
+
+
+class MemoryBudget:
+    """Admission control on the estimated memory of the renders in flight.
+
+    A render that would take the total over ``max_bytes`` is refused with
+    RenderQueueFull, unless nothing else is in flight: a single render larger
+    than the budget still runs, just on its own.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MEMORY_BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self.in_use = 0
+        self.peak = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def reserve(self, nbytes):
+        with self._lock:
+            if self.in_use and self.in_use + nbytes > self.max_bytes:
+                self.rejected += 1
+                raise RenderQueueFull(BUDGET_RETRY_AFTER_S)
+            self.in_use += nbytes
+            self.peak = max(self.peak, self.in_use)
+            self.admitted += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_use -= nbytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_bytes": self.max_bytes,
+                "in_use_bytes": self.in_use,
+                "peak_bytes": self.peak,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "max_canvas_pixels": MAX_CANVAS_PIXELS,
+                "spool_threshold_pixels": SPOOL_THRESHOLD_PIXELS,
+            }
+
+
+def spool_encode(img, profile):
+    """Encode ``img`` with ``profile`` into a new temporary file and return its path.
+
+    Pillow writes to the file descriptor in chunks, so the encoded image never
+    sits in memory as a whole. Worker processes hand the path back to the server.
+    """
+    with tempfile.NamedTemporaryFile(prefix="render-", suffix=f".{profile.extension}", dir=SPOOL_DIR,
+                                     delete=False) as f:
+        try:
+            profile.encode_to(img, f)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+        return f.name
+
+
+class SpooledImage:
+    """An encoded image in a temporary file, read back in chunks as it is sent.
+
+    The file is unlinked as soon as it is open, so it goes away once the
+    response is done with it, however the response ends.
+    """
+
+    def __init__(self, file, size):
+        self.file = file
+        self.size = size
+
+    @classmethod
+    def open(cls, path):
+        file = open(path, "rb")
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # Windows keeps open files; the temp dir cleaner gets it
+        return cls(file, os.fstat(file.fileno()).st_size)
+
+    def __len__(self):
+        return self.size
+
+    def iter_chunks(self, chunk_size=SPOOL_CHUNK_SIZE):
+        try:
+            self.file.seek(0)
+            while chunk := self.file.read(chunk_size):
+                yield chunk
+        finally:
+            self.close()
+
+    def iter_base64_json(self, **fields):
+        """A JSON object streamed chunk by chunk: {"image": <base64>, **fields}."""
+        yield b'{"image": "'
+        for chunk in self.iter_chunks():
+            yield base64.b64encode(chunk)
+        yield b'"'
+        for name, value in fields.items():
+            yield f", {json.dumps(name)}: {json.dumps(value)}".encode()
+        yield b"}"
+
+    def read(self):
+        """The whole encoded image, for callers that need it in memory after all."""
+        return b"".join(self.iter_chunks())
+
+    def close(self):
+        self.file.close()
+
+
+render_budget = MemoryBudget(int(os.getenv("RENDER_MEMORY_BUDGET_BYTES", DEFAULT_MEMORY_BUDGET_BYTES)))
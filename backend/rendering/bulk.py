@@ -0,0 +1,310 @@
+# backend/rendering/bulk.py - Personalized cards: one design rendered once per recipient
+#
+# A customer list turns into thousands of renders of one design that only
+# differ in their text. The design is prepared once (logo decoded and resized
+# for the workers) and the recipients go to the worker pool in chunks, so the
+# pickling and scheduling overhead is paid per chunk, and every card of a chunk
+# reuses the worker's fonts, compiled plan and cached base layer: only the
+# text is drawn per card.
+import asyncio
+import base64
+import csv
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import replace
+from datetime import datetime
+from typing import Mapping, NamedTuple, Optional
+
+from .batch import BATCH_QUEUE_WAIT_S, ZipStream
+from .budget import CanvasTooLarge, check_canvas, estimate_render_bytes, render_budget, should_spool
+from .encoders import DEFAULT_PROFILE, ENCODER_PROFILES
+from .executor import RenderQueueFull, render_executor
+from .http import NDJSON_MEDIA_TYPE
+from .renderer import compile_plan, encode_prepared, prepare_design
+from .templates import get_template
+from .timing import render_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BULK_RECIPIENTS = 5000
+BULK_CHUNK_SIZE = 25  # cards per worker task
+CHUNKS_PER_WORKER = 2  # chunks in flight per worker, so a worker never idles between chunks
+MAX_TRACKED_JOBS = 64
+
+MAX_BULK_RECIPIENTS = int(os.getenv("MAX_BULK_RECIPIENTS", DEFAULT_MAX_BULK_RECIPIENTS))
+
+# Recipient fields and the DesignFields attributes they override
+RECIPIENT_FIELDS = {
+    'text': 'text',
+    'subText': 'sub_text',
+    'offerDetails': 'offer_details',
+    'phoneNumber': 'phone_number',
+    'email': 'email',
+    'website': 'website',
+    'qrUrl': 'qr_url',
+}
+NAME_FIELD = 'name'  # labels the card's file name, it is not drawn
+
+
+class Recipient(NamedTuple):
+    name: Optional[str]
+    overrides: Mapping[str, str]  # DesignFields attribute -> value
+
+    def filename(self, index, extension, ok=True):
+        label = re.sub(r"[^\w.-]+", "-", self.name or "").strip("-.")[:60] or "card"
+        suffix = "" if ok else "-error"
+        return f"{index:05d}-{label}{suffix}.{extension}"
+
+
+def parse_recipients(recipients=None, recipients_csv=None):
+    """Recipients from a list of objects, or from CSV text with a header row.
+
+    Keys are design_data field names (text, subText, offerDetails, phoneNumber,
+    email, website, qrUrl) plus an optional ``name`` for the file name; fields left
+    out or blank keep the design's value. Raises ValueError.
+    """
+    if (recipients is None) == (recipients_csv is None):
+        raise ValueError("Send either recipients or recipients_csv")
+    if recipients_csv is not None:
+        recipients = list(csv.DictReader(io.StringIO(recipients_csv.lstrip("\ufeff"))))
+    if not recipients:
+        raise ValueError("At least one recipient is required")
+    if len(recipients) > MAX_BULK_RECIPIENTS:
+        raise ValueError(f"At most {MAX_BULK_RECIPIENTS} recipients are allowed per bulk job")
+
+    parsed = []
+    for row in recipients:
+        if not isinstance(row, Mapping):
+            raise ValueError("Each recipient must be an object of field values")
+        # Unnamed CSV columns (trailing commas, ragged rows) are ignored
+        row = {key.strip(): value for key, value in row.items() if isinstance(key, str) and key.strip()}
+        unknown = set(row) - set(RECIPIENT_FIELDS) - {NAME_FIELD}
+        if unknown:
+            raise ValueError(f"Unknown recipient fields {sorted(unknown)}, expected {[NAME_FIELD, *RECIPIENT_FIELDS]}")
+        overrides = {RECIPIENT_FIELDS[key]: str(value) for key, value in row.items()
+                     if key in RECIPIENT_FIELDS and value not in (None, "")}
+        name = row.get(NAME_FIELD)
+        parsed.append(Recipient(str(name) if name not in (None, "") else None, overrides))
+    return parsed
+
+
+def validate_bulk_card(image_width, image_height, format=DEFAULT_PROFILE):
+    """Raise ValueError unless the cards can be rendered; CanvasTooLarge for sizes that would be spooled."""
+    if format not in ENCODER_PROFILES:
+        raise ValueError(f"Unsupported format '{format}', expected one of {sorted(ENCODER_PROFILES)}")
+    check_canvas(image_width, image_height)
+    if should_spool(image_width, image_height):
+        raise CanvasTooLarge(f"{image_width}x{image_height} is too large for bulk cards, use /export-design")
+
+
+def encode_recipients(prepared, overrides, template_type, image_width, image_height, profile=DEFAULT_PROFILE):
+    """Render and encode ``prepared`` once per mapping of field overrides; returns ``[(bytes, ok, stages)]``.
+
+    Meant for worker processes, where the cards share the fonts, compiled plan and cached base layer.
+    """
+    results = []
+    for fields in overrides:
+        card = replace(prepared, fields=replace(prepared.fields, **fields))
+        data, ok, stages = encode_prepared(card, template_type, image_width, image_height, profile)
+        results.append((bytes(data), ok, stages))
+    return results
+
+
+class BulkJob:
+    """Progress of one bulk render, readable from /bulk-jobs while its cards stream."""
+
+    def __init__(self, total):
+        self.id = uuid.uuid4().hex
+        self.total = total
+        self.done = 0
+        self.failed = []  # indices of the cards that did not render
+        self.status = "running"
+        self.started_at = datetime.now()
+        self.finished_at = None
+        self._start = time.perf_counter()
+        self._elapsed_ms = None
+
+    @property
+    def elapsed_ms(self):
+        if self._elapsed_ms is not None:
+            return self._elapsed_ms
+        return (time.perf_counter() - self._start) * 1000
+
+    def advance(self, index, ok):
+        self.done += 1
+        if not ok:
+            self.failed.append(index)
+
+    def finish(self, status):
+        self.status = status
+        self.finished_at = datetime.now()
+        self._elapsed_ms = (time.perf_counter() - self._start) * 1000
+
+    def stats(self):
+        elapsed_ms = self.elapsed_ms
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "failed": len(self.failed),
+            "progress": round(self.done / self.total, 4) if self.total else 1.0,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "elapsed_ms": round(elapsed_ms, 2),
+            "cards_per_second": round(self.done / elapsed_ms * 1000, 1) if elapsed_ms else 0.0,
+        }
+
+
+class BulkJobs:
+    """The most recent bulk jobs by id; older ones are forgotten."""
+
+    def __init__(self, max_jobs=MAX_TRACKED_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, total):
+        job = BulkJob(total)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "tracked": len(jobs),
+            "running": sum(job.status == "running" for job in jobs),
+            "cards_rendered": sum(job.done for job in jobs),
+        }
+
+
+bulk_jobs = BulkJobs()
+
+
+def _prepare_for_workers(design_data, plan):
+    return prepare_design(design_data).for_worker(plan)
+
+
+async def _render_chunk(executor, args, memory_estimate, deadline):
+    # Chunks of a bulk job that is already streaming wait for pool capacity, until the deadline
+    while True:
+        try:
+            with render_budget.reserve(memory_estimate):
+                return await executor.submit(encode_recipients, *args)
+        except RenderQueueFull as e:
+            if time.monotonic() + e.retry_after > deadline:
+                raise
+            await asyncio.sleep(e.retry_after)
+
+
+async def render_bulk(design_data, template_type, image_width, image_height, recipients, job,
+                      profile=DEFAULT_PROFILE, executor=render_executor, chunk_size=BULK_CHUNK_SIZE,
+                      queue_wait=BATCH_QUEUE_WAIT_S):
+    """Render one card per recipient in the worker pool, yielding ``(index, recipient, data, ok)`` as chunks finish.
+
+    Only CHUNKS_PER_WORKER chunks per worker are in flight, so finished cards
+    never pile up faster than they are sent. The cards of a chunk that failed
+    as a whole are yielded with ``data`` None. Once a chunk has waited
+    ``queue_wait`` seconds for the worker pool, no more chunks are submitted
+    and every card not yet rendered is yielded as failed.
+    """
+    plan = compile_plan(template_type, image_width, image_height)
+    # Decoding and resizing an inline logo would block the event loop
+    prepared = await asyncio.to_thread(_prepare_for_workers, design_data, plan)
+    template_name = get_template(template_type).name
+    memory_estimate = estimate_render_bytes(image_width, image_height)
+    starts = iter(range(0, len(recipients), chunk_size))
+    pending = {}
+    saturated = False
+
+    def submit_next_chunk():
+        start = None if saturated else next(starts, None)
+        if start is not None:
+            overrides = [recipient.overrides for recipient in recipients[start:start + chunk_size]]
+            args = (prepared, overrides, template_type, image_width, image_height, profile)
+            deadline = time.monotonic() + queue_wait
+            pending[asyncio.ensure_future(_render_chunk(executor, args, memory_estimate, deadline))] = start
+
+    for _ in range(executor.max_workers * CHUNKS_PER_WORKER):
+        submit_next_chunk()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                start = pending.pop(task)
+                chunk = recipients[start:start + chunk_size]
+                try:
+                    results = task.result()
+                except RenderQueueFull:
+                    logger.error(f"Worker pool still full after {queue_wait}s, failing bulk cards from {start} on")
+                    saturated = True
+                    results = [(None, False, None)] * len(chunk)
+                except Exception as e:
+                    logger.error(f"Error rendering bulk cards {start}-{start + len(chunk) - 1}: {e}")
+                    results = [(None, False, None)] * len(chunk)
+                submit_next_chunk()
+                for index, recipient, (data, ok, stages) in zip(range(start, start + len(chunk)), chunk, results):
+                    if ok:
+                        render_metrics.record(template_name, image_width, image_height,
+                                              dict(stages, total=sum(stages.values())))
+                    job.advance(index, ok)
+                    yield index, recipient, data, ok
+        # Left over only when the pool stayed full: these cards were never submitted
+        for start in starts:
+            for index, recipient in zip(range(start, start + chunk_size), recipients[start:start + chunk_size]):
+                job.advance(index, False)
+                yield index, recipient, None, False
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def stream_bulk(design_data, template_type, image_width, image_height, recipients, job, media_type,
+                      profile=DEFAULT_PROFILE):
+    """Stream the cards of render_bulk as a ZIP archive, or as NDJSON with progress on every line.
+
+    NDJSON lines are ``{"index", "name", "ok", "done", "total", "image", "media_type"}``
+    (``"error"`` instead of the image when a card failed) and a last
+    ``{"summary": ...}`` line. The ZIP ends with a manifest.json of the job and its failed cards.
+    """
+    encoder = ENCODER_PROFILES[profile]
+    cards = render_bulk(design_data, template_type, image_width, image_height, recipients, job, profile)
+    try:
+        if media_type == NDJSON_MEDIA_TYPE:
+            async for index, recipient, data, ok in cards:
+                line = {"index": index, "name": recipient.name, "ok": ok, "done": job.done, "total": job.total}
+                if data is None:
+                    line["error"] = "Rendering failed"
+                else:
+                    line["image"] = base64.b64encode(data).decode()
+                    line["media_type"] = encoder.media_type
+                yield (json.dumps(line) + "\n").encode()
+            job.finish("completed")
+            yield (json.dumps({"summary": job.stats()}) + "\n").encode()
+        else:
+            archive = ZipStream()
+            async for index, recipient, data, ok in cards:
+                if data is not None:
+                    yield archive.add(recipient.filename(index, encoder.extension, ok), data)
+            job.finish("completed")
+            manifest = {**job.stats(), "failed_indices": sorted(job.failed)}
+            yield archive.add("manifest.json", json.dumps(manifest, indent=2))
+            yield archive.close()
+    finally:
+        if job.finished_at is None:
+            job.finish("cancelled")  # the client hung up before the end
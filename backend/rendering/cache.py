@@ -0,0 +1,146 @@
+# backend/rendering/cache.py - Content-addressed cache of encoded design images
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def design_cache_key(design_data, template_type, image_width, image_height, profile=None, scale=1.0):
+    """Canonical SHA-256 of everything that determines an encoded image."""
+    canonical = json.dumps(
+        {
+            "design_data": design_data,
+            "template_type": template_type,
+            "image_width": image_width,
+            "image_height": image_height,
+            "profile": profile,
+            "scale": scale,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def make_etag(cache_key, representation=None):
+    """Strong ETag for a cache key; each representation of the same design gets its own tag."""
+    return f'"{cache_key}-{representation}"' if representation else f'"{cache_key}"'
+
+
+def etag_matches(if_none_match, etag):
+    """Evaluate an If-None-Match header against ``etag`` (weak comparison, per RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def image_nbytes(img):
+    return img.width * img.height * len(img.getbands())
+
+
+class SizedLRU:
+    """LRU bounded by the total ``size`` of its values, with hit and miss counters.
+
+    Not locked; owners hold their own lock.
+    """
+
+    def __init__(self, max_bytes, size=len):
+        self.max_bytes = max_bytes
+        self._size = size
+        self._entries = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        size = self._size(value)
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= self._size(previous)
+        self._entries[key] = value
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= self._size(evicted)
+            self.evictions += 1
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class ImageLRU(SizedLRU):
+    """SizedLRU of decoded PIL images, bounded by their pixel size."""
+
+    def __init__(self, max_bytes):
+        super().__init__(max_bytes, image_nbytes)
+
+
+def encoded_nbytes(data):
+    return data.nbytes if isinstance(data, memoryview) else len(data)
+
+
+class RenderedImageCache:
+    """LRU of encoded images (bytes or memoryviews) bounded by their total size, shared across threads."""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self._entries = SizedLRU(max_bytes, encoded_nbytes)  # cache key -> encoded bytes
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self):
+        return self._entries.max_bytes
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key, data):
+        with self._lock:
+            self._entries.put(key, data)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return self._entries.stats()
+
+
+image_cache = RenderedImageCache(int(os.getenv("RENDER_CACHE_MAX_BYTES", DEFAULT_CACHE_MAX_BYTES)))
@@ -0,0 +1,105 @@
+# backend/rendering/encoders.py - Output profiles trading encode speed against file size
+import io
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Mapping, NamedTuple
+
+from PIL import Image, features
+
+
+class EncoderProfile(NamedTuple):
+    name: str
+    format: str  # Pillow format name
+    media_type: str
+    extension: str
+    options: Mapping[str, Any]  # keyword arguments for Image.save
+    palette: bool = False  # quantize to 256 colours first; flat designs lose nothing visible
+
+    def encode_to(self, img, fp):
+        """Encode ``img`` into the binary file object ``fp``."""
+        if self.palette:
+            img = img.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+        elif self.format == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.save(fp, format=self.format, **self.options)
+
+    def encode(self, img):
+        """Encode ``img`` and return a memoryview over the encoder's buffer, without copying it."""
+        buffered = io.BytesIO()
+        self.encode_to(img, buffered)
+        return buffered.getbuffer()
+
+    def at_dpi(self, dpi):
+        """This profile writing ``dpi`` as the image's resolution, so print tools size it correctly."""
+        return self._replace(options={**self.options, "dpi": (dpi, dpi)})
+
+
+DEFAULT_PROFILE = "png"
+
+ENCODER_PROFILES = {
+    profile.name: profile
+    for profile in (
+        # Pillow's defaults, as every render used before profiles existed
+        EncoderProfile("png", "PNG", "image/png", "png", {}),
+        EncoderProfile("png-fast", "PNG", "image/png", "png", {"compress_level": 1}),
+        EncoderProfile("png-optimized", "PNG", "image/png", "png", {"optimize": True}),
+        EncoderProfile("png-palette", "PNG", "image/png", "png", {"optimize": True}, palette=True),
+        EncoderProfile("webp-lossless", "WEBP", "image/webp", "webp", {"lossless": True, "method": 4}),
+        EncoderProfile("webp", "WEBP", "image/webp", "webp", {"quality": 85, "method": 4}),
+        EncoderProfile("jpeg-progressive", "JPEG", "image/jpeg", "jpg",
+                       {"quality": 88, "progressive": True, "optimize": True}),
+    )
+    # Pillow can be built without WebP support
+    if profile.format != "WEBP" or features.check("webp")
+}
+
+
+def get_encoder_profile(name):
+    """The profile called ``name`` (the default when None); raises ValueError for unknown names.
+
+    An EncoderProfile, such as one from ``at_dpi``, is returned as it is.
+    """
+    if isinstance(name, EncoderProfile):
+        return name
+    profile = ENCODER_PROFILES.get(name or DEFAULT_PROFILE)
+    if profile is None:
+        raise ValueError(f"Unknown output profile '{name}', expected one of {sorted(ENCODER_PROFILES)}")
+    return profile
+
+
+def encode_image(img, profile_name=DEFAULT_PROFILE):
+    """Encode ``img`` with a profile; returns ``(data, encode_ms)``."""
+    start = time.perf_counter()
+    data = get_encoder_profile(profile_name).encode(img)
+    return data, (time.perf_counter() - start) * 1000
+
+
+class EncoderStats:
+    """Running encode time and output size per (profile, template), as measured on real renders."""
+
+    def __init__(self):
+        self._totals = defaultdict(lambda: [0, 0.0, 0])  # (profile, template) -> [count, ms, bytes]
+        self._lock = threading.Lock()
+
+    def record(self, profile_name, template_type, encode_ms, nbytes):
+        with self._lock:
+            totals = self._totals[(profile_name, template_type)]
+            totals[0] += 1
+            totals[1] += encode_ms
+            totals[2] += nbytes
+
+    def stats(self):
+        with self._lock:
+            snapshot = {key: list(totals) for key, totals in self._totals.items()}
+        report = {}
+        for (profile_name, template_type), (count, total_ms, total_bytes) in sorted(snapshot.items()):
+            report.setdefault(profile_name, {})[template_type] = {
+                "renders": count,
+                "mean_encode_ms": round(total_ms / count, 2),
+                "mean_bytes": round(total_bytes / count),
+            }
+        return report
+
+
+encoder_stats = EncoderStats()
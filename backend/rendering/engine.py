@@ -0,0 +1,211 @@
+# backend/rendering/engine.py - The design image endpoint, shared by the Flask and FastAPI servers
+#
+# Both servers import this one engine, so they share the process-wide warm
+# state (font registry, compiled template plans, logo store, base layer and
+# image caches) and behave the same way. Each server only adapts an
+# EngineResponse to its own response type and maps errors with error_response.
+import asyncio
+import logging
+from typing import Any, Mapping, NamedTuple, Optional
+
+from .assets import logo_store
+from .budget import CanvasTooLarge, SpooledImage, render_budget
+from .bulk import bulk_jobs
+from .cache import image_cache
+from .encoders import encoder_stats, get_encoder_profile
+from .executor import RenderQueueFull, render_executor
+from .fallback import font_fallback
+from .fonts import font_registry
+from .http import JSON_MEDIA_TYPE, negotiate_media_type
+from .layers import base_layers
+from .preview import PREVIEW_PROFILE, validate_preview_scale
+from .renderer import DesignRender, base64_image, layout_design, prepare_design
+from .timing import render_metrics, server_timing_header
+from .warmup import process_warm_up, readiness, warm_process
+
+logger = logging.getLogger(__name__)
+
+
+class DesignRequestInvalid(ValueError):
+    """Raised for /generate-design-image parameters that cannot be rendered; answered with 400."""
+
+
+class LogoNotFound(LookupError):
+    """Raised when design_data['logoId'] is not in the logo store (never uploaded, or evicted)."""
+
+
+def check_logo_asset(design_data):
+    logo_id = design_data.get('logoId')
+    if logo_id and logo_id not in logo_store:
+        raise LogoNotFound(f"Unknown logoId '{logo_id}', upload the logo to /logo-assets again")
+
+
+def error_response(error):
+    """``(status, message, headers)`` for an error raised while serving a design request."""
+    if isinstance(error, CanvasTooLarge):
+        return 413, str(error), {}
+    if isinstance(error, DesignRequestInvalid):
+        return 400, str(error), {}
+    if isinstance(error, LogoNotFound):
+        return 404, str(error), {}
+    if isinstance(error, RenderQueueFull):
+        return 503, "Render queue or memory budget is full, please retry", {"Retry-After": str(error.retry_after)}
+    logger.error(f"Error in /generate-design-image: {error}")
+    return 500, f"Server error generating image: {error}", {}
+
+
+class EngineResponse(NamedTuple):
+    status: int
+    headers: Mapping[str, str]
+    media_type: Optional[str]
+    # None (304), a dict to send as JSON, encoded bytes, or an iterator of byte chunks to stream
+    body: Any
+
+
+class DesignImageCall:
+    """One /generate-design-image request, from its parameters to its response.
+
+    Clients that prefer the output profile's image type in their Accept header
+    get the raw bytes; everyone else gets the {"image": <base64>} JSON body.
+    A ``preview_scale`` renders that much smaller with a fast encoder and adds
+    the full-size layout to the JSON body. Invalid parameters raise DesignRequestInvalid.
+    """
+
+    def __init__(self, design_data, template_type='poster', image_width=800, image_height=1000,
+                 output_profile=None, preview_scale=None, accept=None):
+        if not design_data:
+            raise DesignRequestInvalid("Design data is required")
+        if not isinstance(design_data, dict):
+            raise DesignRequestInvalid("Design data must be an object")
+        for name, value in (("image_width", image_width), ("image_height", image_height)):
+            if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+                raise DesignRequestInvalid(f"{name} must be a positive integer")
+        self.design_data = design_data
+        self.preview = preview_scale is not None
+        try:
+            self.scale = validate_preview_scale(preview_scale) if self.preview else 1.0
+            self.profile = get_encoder_profile(output_profile or (PREVIEW_PROFILE if self.preview else None))
+        except (ValueError, TypeError) as e:
+            raise DesignRequestInvalid(str(e)) from e
+        self.binary = negotiate_media_type(accept, (JSON_MEDIA_TYPE, self.profile.media_type)) != JSON_MEDIA_TYPE
+        self.job = DesignRender(design_data, template_type, image_width, image_height,
+                                representation=self.profile.name if self.binary else None,
+                                profile=self.profile.name, scale=self.scale,
+                                layout=self.preview and not self.binary)
+
+    def render(self, if_none_match=None):
+        """Serve from the caches or render in this thread."""
+        rendered = self.job.cached(if_none_match)
+        if rendered is None:
+            check_logo_asset(self.design_data)
+            rendered = self.job.render()
+        return self.response(rendered)
+
+    async def render_async(self, if_none_match=None, executor=render_executor):
+        """Serve from the caches or render in ``executor``'s worker pool, off the event loop."""
+        rendered = await self.job.cached_async(if_none_match)
+        if rendered is None:
+            check_logo_asset(self.design_data)
+            rendered = await self.job.render_in(executor)
+        if self.binary or rendered.not_modified:
+            return self.response(rendered)
+        # The base64 copy, and the layout of a preview served from the cache, are built off the event loop
+        return await asyncio.to_thread(self.response, rendered)
+
+    def response(self, rendered):
+        headers = {"Vary": "Accept"}
+        if rendered.etag:
+            headers["ETag"] = rendered.etag
+        if self.preview:
+            headers["X-Preview-Scale"] = str(self.scale)
+        if rendered.not_modified:
+            return EngineResponse(304, headers, None, None)
+        headers["Server-Timing"] = server_timing_header(rendered.timings)
+
+        if self.binary:
+            # The encoded image is sent as-is, without the base64/JSON copies
+            if isinstance(rendered.data, SpooledImage):
+                headers["Content-Length"] = str(len(rendered.data))
+                return EngineResponse(200, headers, self.profile.media_type, rendered.data.iter_chunks())
+            return EngineResponse(200, headers, self.profile.media_type, rendered.data)
+
+        fields = {"media_type": self.profile.media_type}
+        if self.preview:
+            fields["scale"] = self.scale
+            fields["layout"] = rendered.layout
+            if fields["layout"] is None:  # served from the image cache: the render laid it out otherwise
+                fields["layout"] = layout_design(prepare_design(self.design_data), *self.job.args[1:4])
+        if isinstance(rendered.data, SpooledImage):
+            # Large images stream from their temporary file, base64-encoded chunk by chunk
+            return EngineResponse(200, headers, JSON_MEDIA_TYPE, rendered.data.iter_base64_json(**fields))
+        body = {"image": base64_image(rendered, *self.job.args[1:4], self.scale), **fields}
+        headers["Server-Timing"] = server_timing_header(rendered.timings)  # now with the base64 stage
+        return EngineResponse(200, headers, JSON_MEDIA_TYPE, body)
+
+
+def start_engine(workers=True):
+    """Start the render worker pool, if the server uses one; each worker warms itself up as it starts."""
+    if workers:
+        render_executor.start(initializer=warm_process)
+
+
+def warm_up_engine():
+    """Warm up this process, rendering every template once, then mark the server ready."""
+    readiness.begin()
+    try:
+        timings = {"server": warm_process()}
+    except Exception as e:
+        readiness.finish(error=e)
+        return
+    readiness.finish(timings)
+
+
+async def warm_up_engine_async(executor=render_executor):
+    """Warm up the server process and every pool worker, then mark the server ready.
+
+    Renders happen in the workers, so this process only loads fonts and
+    compiles plans, in a thread to keep the event loop serving /health.
+    """
+    readiness.begin()
+    try:
+        server = await asyncio.to_thread(warm_process, render=False)
+        workers = {result["pid"]: result for result in await executor.run_on_workers(process_warm_up)}
+    except Exception as e:
+        readiness.finish(error=e)
+        return
+    readiness.finish({"server": server, "workers": list(workers.values())})
+
+
+def stop_engine():
+    render_executor.shutdown()
+
+
+def engine_stats():
+    """Cache, pool and budget statistics of the engine, for the servers' /health endpoints."""
+    return {
+        "warm_up": readiness.stats(),
+        "font_cache": font_registry.stats(),
+        "font_fallback": font_fallback.stats(),
+        "image_cache": image_cache.stats(),
+        "logo_store": logo_store.stats(),
+        "base_layers": base_layers.stats(),
+        "render_executor": render_executor.stats(),
+        "render_budget": render_budget.stats(),
+        "bulk_jobs": bulk_jobs.stats(),
+    }
+
+
+def engine_metrics():
+    """Render latency histograms per template, output size and stage, with each series' slowest stage.
+
+    Stages: prepare (field parsing, logo decode and resize), queue (waiting for
+    a render worker), logo, base (static layer), fonts, draw, encode, base64,
+    and cache for responses served from the image cache.
+    """
+    return {
+        "render_stages": render_metrics.stats(),
+        "encoders": encoder_stats.stats(),
+        "render_executor": render_executor.stats(),
+        "render_budget": render_budget.stats(),
+        "image_cache": image_cache.stats(),
+    }
@@ -0,0 +1,134 @@
+# backend/rendering/executor.py - Process pool that keeps CPU-bound renders off the event loop
+import asyncio
+import math
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .fonts import font_registry
+
+LATENCY_WINDOW = 512
+
+# Workers are started once the server already runs threads; forking then could copy a held lock
+# (logging's, the font registry's) into a worker that would wait on it forever
+MP_CONTEXT = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class RenderQueueFull(Exception):
+    """Raised when a render is submitted while the bounded queue is full."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Render queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _preload_fonts():
+    font_registry.preload()
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[max(index, 0)]
+
+
+class RenderExecutor:
+    """Runs render functions in a process pool sized to the cores, with backpressure.
+
+    At most ``max_workers + max_queue`` renders may be in flight; further
+    submissions fail fast with RenderQueueFull instead of piling up behind the
+    pool. Counters are only touched from the event loop thread.
+    """
+
+    def __init__(self, max_workers=None, max_queue=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = self.max_workers * 4 if max_queue is None else max_queue
+        self._pool = None
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._latencies_ms = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def capacity(self):
+        return self.max_workers + self.max_queue
+
+    @property
+    def queue_depth(self):
+        """Renders waiting for a free worker."""
+        return max(0, self.in_flight - self.max_workers)
+
+    def start(self, initializer=None):
+        """Create the pool; each worker runs ``initializer`` (font preloading by default) before taking renders."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context(MP_CONTEXT),
+                                             initializer=initializer or _preload_fonts)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _retry_after(self):
+        """Seconds until a slot is likely to free up, from the recent mean latency."""
+        mean_s = (sum(self._latencies_ms) / len(self._latencies_ms) / 1000) if self._latencies_ms else 1.0
+        return max(1, math.ceil(mean_s * (self.queue_depth + 1) / self.max_workers))
+
+    async def submit(self, fn, *args):
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise RenderQueueFull(self._retry_after())
+
+        self.start()
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        self.completed += 1
+        self._latencies_ms.append((time.perf_counter() - start) * 1000)
+        return result
+
+    async def run_on_workers(self, fn):
+        """Run ``fn`` once per worker slot, concurrently, so every worker is spawned and initialized.
+
+        Bypasses the queue accounting; a worker may run ``fn`` more than once.
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(loop.run_in_executor(self._pool, fn) for _ in range(self.max_workers)))
+
+    def stats(self):
+        latencies = sorted(self._latencies_ms)
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "latency_ms": {
+                "p50": round(_percentile(latencies, 0.50), 2),
+                "p95": round(_percentile(latencies, 0.95), 2),
+                "max": round(latencies[-1], 2) if latencies else 0.0,
+                "samples": len(latencies),
+            },
+        }
+
+
+def _env_int(name):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+render_executor = RenderExecutor(_env_int("RENDER_WORKERS"), _env_int("RENDER_QUEUE_SIZE"))
@@ -0,0 +1,319 @@
+# backend/rendering/fallback.py - Per-run font fallback for emoji and non-Latin text
+#
+# A single TrueType font covers a few scripts at best; every other character
+# comes out as a box. Each font's cmap table is read once into codepoint
+# ranges, and the ranges of a chain (the design's font, then the fallback
+# fonts) are merged into a coverage index that maps a codepoint to the first
+# font with a glyph for it. Splitting text into same-font runs is then a
+# bisection per character instead of trial rendering, and the runs are cached
+# per (font, size, text).
+import io
+import logging
+import os
+import struct
+import threading
+import unicodedata
+from bisect import bisect_right
+from collections import OrderedDict
+
+from PIL import ImageFont
+
+from .fonts import BACKEND_DIR, PILLOW_DEFAULT_FONT, PRELOAD_FAMILIES, font_registry
+
+logger = logging.getLogger(__name__)
+
+# Fallback fonts in priority order, looked up by file name in FONT_DIRS.
+# Color bitmap emoji fonts (CBDT/sbix) only render at fixed sizes and are skipped.
+FALLBACK_FONT_FILES = (
+    "NotoSans-Regular.ttf",
+    "NotoSansDevanagari-Regular.ttf",
+    "NotoSansBengali-Regular.ttf",
+    "NotoSansGujarati-Regular.ttf",
+    "NotoSansGurmukhi-Regular.ttf",
+    "NotoSansTamil-Regular.ttf",
+    "NotoSansTelugu-Regular.ttf",
+    "NotoSansKannada-Regular.ttf",
+    "NotoSansMalayalam-Regular.ttf",
+    "NotoSansArabic-Regular.ttf",
+    "NotoSansHebrew-Regular.ttf",
+    "NotoSansThai-Regular.ttf",
+    "NotoSansCJK-Regular.ttc",
+    "NotoSansSymbols-Regular.ttf",
+    "NotoSansSymbols2-Regular.ttf",
+    "NotoEmoji-Regular.ttf",
+    "DejaVuSans.ttf",
+    "Symbola.ttf",
+    "seguiemj.ttf",  # Windows
+    "Nirmala.ttf",  # Windows, Indic scripts
+)
+FONT_DIRS = (
+    os.path.join(BACKEND_DIR, "fonts"),
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+    os.path.expanduser("~/.fonts"),
+    "/Library/Fonts",
+    "/System/Library/Fonts",
+    os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+)
+DEFAULT_MAX_CACHED_RUNS = 8192
+
+# os.pathsep-separated font files, used instead of looking FALLBACK_FONT_FILES up
+FALLBACK_FONTS_ENV = os.getenv("RENDER_FALLBACK_FONTS")
+
+# Joiners, variation selectors and emoji modifiers stay in the run of the character they modify
+_JOINERS = {0x200C, 0x200D, 0x20E3} | set(range(0xFE00, 0xFE10)) | set(range(0x1F3FB, 0x1F400))
+
+
+def _ranges(codepoints):
+    """Sorted, merged ``[(first, last)]`` ranges of an iterable of codepoints."""
+    ranges = []
+    for cp in sorted(set(codepoints)):
+        if ranges and cp == ranges[-1][1] + 1:
+            ranges[-1][1] = cp
+        else:
+            ranges.append([cp, cp])
+    return [tuple(r) for r in ranges]
+
+
+def _format4_codepoints(data, offset):
+    seg_count = struct.unpack_from(">H", data, offset + 6)[0] // 2
+    ends_at = offset + 14
+    starts_at = ends_at + seg_count * 2 + 2  # after reservedPad
+    deltas_at = starts_at + seg_count * 2
+    range_offsets_at = deltas_at + seg_count * 2
+    ends = struct.unpack_from(f">{seg_count}H", data, ends_at)
+    starts = struct.unpack_from(f">{seg_count}H", data, starts_at)
+    deltas = struct.unpack_from(f">{seg_count}h", data, deltas_at)
+    range_offsets = struct.unpack_from(f">{seg_count}H", data, range_offsets_at)
+    for i, (start, end, delta, range_offset) in enumerate(zip(starts, ends, deltas, range_offsets)):
+        if start == 0xFFFF:
+            continue
+        if range_offset == 0:
+            yield from (cp for cp in range(start, end + 1) if (cp + delta) & 0xFFFF)
+            continue
+        glyphs_at = range_offsets_at + i * 2 + range_offset
+        glyphs = struct.unpack_from(f">{end - start + 1}H", data, glyphs_at)
+        yield from (cp for cp, glyph in zip(range(start, end + 1), glyphs) if glyph and (glyph + delta) & 0xFFFF)
+
+
+def _format12_codepoints(data, offset):
+    num_groups = struct.unpack_from(">I", data, offset + 12)[0]
+    for start, end, start_glyph in struct.iter_unpack(">III", data[offset + 16:offset + 16 + num_groups * 12]):
+        yield from range(start + (start_glyph == 0), end + 1)
+
+
+def read_cmap(data):
+    """Codepoint ranges a TrueType/OpenType font (the first of a collection) has glyphs for.
+
+    Reads the Unicode cmap subtable: format 12 for fonts beyond the BMP, else format 4.
+    Raises ValueError for fonts without one.
+    """
+    try:
+        offset = struct.unpack_from(">I", data, 12)[0] if data[:4] == b"ttcf" else 0
+        num_tables = struct.unpack_from(">H", data, offset + 4)[0]
+        tables = dict(struct.unpack_from(">4s4xI4x", data, offset + 12 + i * 16) for i in range(num_tables))
+        if b"cmap" not in tables:
+            raise ValueError("The font has no cmap table")
+        cmap_at = tables[b"cmap"]
+        subtables = {}
+        for i in range(struct.unpack_from(">H", data, cmap_at + 2)[0]):
+            platform, encoding, sub_offset = struct.unpack_from(">HHI", data, cmap_at + 4 + i * 8)
+            fmt = struct.unpack_from(">H", data, cmap_at + sub_offset)[0]
+            subtables[(platform, encoding, fmt)] = cmap_at + sub_offset
+    except struct.error as e:
+        raise ValueError(f"Unreadable font: {e}")
+    for key in ((3, 10, 12), (0, 4, 12), (0, 6, 12)):
+        if key in subtables:
+            return _ranges(_format12_codepoints(data, subtables[key]))
+    for key in ((3, 1, 4), (0, 3, 4), (0, 1, 4), (0, 0, 4)):
+        if key in subtables:
+            return _ranges(_format4_codepoints(data, subtables[key]))
+    raise ValueError("The font has no Unicode cmap subtable")
+
+
+class CoverageIndex:
+    """Maps a codepoint to the first font of a chain with a glyph for it.
+
+    ``coverages`` holds each font's cmap ranges, in chain order. They are
+    merged once into disjoint ranges tagged with their font's slot in the
+    chain, so a lookup is one bisection.
+    """
+
+    def __init__(self, coverages):
+        self._coverages = [(tuple(first for first, _ in ranges), ranges) for ranges in coverages]
+        # Between two consecutive range boundaries every font either covers all codepoints or none
+        bounds = sorted({cp for ranges in coverages for first, last in ranges for cp in (first, last + 1)})
+        self._starts, self._ends, self._slots = [], [], []
+        for first, end in zip(bounds, bounds[1:]):
+            slot = next((slot for slot in range(len(coverages)) if self.covers(slot, first)), None)
+            if slot is None:
+                continue
+            if self._ends and first == self._ends[-1] + 1 and slot == self._slots[-1]:
+                self._ends[-1] = end - 1
+            else:
+                self._starts.append(first)
+                self._ends.append(end - 1)
+                self._slots.append(slot)
+        self.codepoints = sum(end - start + 1 for start, end in zip(self._starts, self._ends))
+        # Pure ASCII text is a single run of the first font whenever that font covers printable ASCII
+        self.ascii_in_primary = all(self.covers(0, cp) for cp in range(0x20, 0x7F))
+
+    def covers(self, slot, cp):
+        starts, ranges = self._coverages[slot]
+        i = bisect_right(starts, cp) - 1
+        return i >= 0 and cp <= ranges[i][1]
+
+    def slot_for(self, cp):
+        """The chain slot of the first font covering ``cp``, None when no font does."""
+        i = bisect_right(self._starts, cp) - 1
+        if i >= 0 and cp <= self._ends[i]:
+            return self._slots[i]
+        return None
+
+
+def _find_font_files(names, dirs=FONT_DIRS):
+    """Paths of the font files named ``names`` found under ``dirs``, in the order of ``names``."""
+    wanted = {name.lower(): name for name in names}
+    found = {}
+    for font_dir in dirs:
+        for root, _, files in os.walk(font_dir):
+            for file in files:
+                name = wanted.get(file.lower())
+                if name is not None and name not in found:
+                    found[name] = os.path.join(root, file)
+    return [found[name] for name in names if name in found]
+
+
+class FontFallback:
+    """Splits text into runs, each drawn with the first font of its chain that covers it.
+
+    A chain is the design's font followed by the fallback fonts: the files in
+    RENDER_FALLBACK_FONTS, or else those of FALLBACK_FONT_FILES found in FONT_DIRS.
+    Characters no font covers stay in the current run and count as uncovered.
+    """
+
+    def __init__(self, registry=font_registry, max_runs=DEFAULT_MAX_CACHED_RUNS):
+        self.registry = registry
+        self.max_runs = max_runs
+        self._fallback_paths = None
+        self._coverage = {}  # font path -> cmap ranges
+        self._indexes = {}  # primary font path -> (chain of font paths, CoverageIndex)
+        self._runs = OrderedDict()  # (primary font path, size, text) -> runs
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.uncovered = 0
+
+    def _load_coverage(self, path):
+        if path == PILLOW_DEFAULT_FONT:
+            font = ImageFont.load_default(size=10)
+            if isinstance(getattr(font, "path", None), io.BytesIO):
+                return read_cmap(font.path.getvalue())
+            return [(0x20, 0x7E)]  # the bitmap default font
+        return read_cmap(self.registry.font_bytes(path))
+
+    def _usable_coverage(self, path):
+        """The cmap ranges of the font at ``path``, None when it cannot serve as a fallback."""
+        if path not in self._coverage:
+            try:
+                if path != PILLOW_DEFAULT_FONT:
+                    ImageFont.truetype(io.BytesIO(self.registry.font_bytes(path)), 20)  # scalable at any size
+                self._coverage[path] = self._load_coverage(path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping fallback font {path}: {e}")
+                self._coverage[path] = None
+        return self._coverage[path]
+
+    def fallback_paths(self):
+        with self._lock:
+            if self._fallback_paths is None:
+                if FALLBACK_FONTS_ENV:
+                    paths = [path for path in FALLBACK_FONTS_ENV.split(os.pathsep) if path]
+                else:
+                    paths = _find_font_files(FALLBACK_FONT_FILES)
+                self._fallback_paths = [os.path.abspath(path) for path in paths]
+            return self._fallback_paths
+
+    def index_for(self, path):
+        """``(chain, CoverageIndex)`` for the font at ``path``, built on first use."""
+        entry = self._indexes.get(path)
+        if entry is not None:
+            return entry
+        with self._lock:
+            entry = self._indexes.get(path)
+            if entry is None:
+                chain = [path]
+                chain += [p for p in self.fallback_paths() if p != path and self._usable_coverage(p) is not None]
+                coverages = [self._usable_coverage(path) or []] + [self._coverage[p] for p in chain[1:]]
+                entry = self._indexes[path] = (tuple(chain), CoverageIndex(coverages))
+            return entry
+
+    def build(self, families=PRELOAD_FAMILIES):
+        """Read the fallback fonts and build the coverage index of each of ``families`` ahead of the first render."""
+        for family in families:
+            self.index_for(self.registry.resolve_path(family))
+
+    def runs(self, font, text):
+        """``((text, font), ...)`` runs of ``text``; a single run of ``font`` when it covers everything."""
+        path = self.registry.path_of(font)
+        if path is None:
+            return ((text, font),)  # not a registry font, so there is no chain to fall back on
+        chain, index = self.index_for(path)
+        if text.isascii() and index.ascii_in_primary:
+            return ((text, font),)
+
+        key = (path, font.size, text)
+        with self._lock:
+            runs = self._runs.get(key)
+            if runs is not None:
+                self._runs.move_to_end(key)
+                self.hits += 1
+                return runs
+            self.misses += 1
+
+        runs = tuple((run_text, font if slot == 0 else self.registry.get_file(chain[slot], font.size))
+                     for run_text, slot in self._segment(text, index))
+        with self._lock:
+            self._runs[key] = runs
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+        return runs
+
+    def _segment(self, text, index):
+        runs = []
+        current = None
+        start = 0
+        for i, char in enumerate(text):
+            cp = ord(char)
+            # Spaces, combining marks and joiners stay with the run they belong to
+            if current is not None and (char.isspace() or cp in _JOINERS or unicodedata.category(char)[0] == "M") \
+                    and index.covers(current, cp):
+                continue
+            slot = index.slot_for(cp)
+            if slot is None:
+                self.uncovered += 1
+                slot = 0 if current is None else current
+            if slot != current:
+                if current is not None:
+                    runs.append((text[start:i], current))
+                current, start = slot, i
+        runs.append((text[start:], 0 if current is None else current))
+        return runs
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "fallback_fonts": [os.path.basename(path) for path in self._fallback_paths or ()
+                                   if self._coverage.get(path) is not None],
+                "chains": len(self._indexes),
+                "indexed_codepoints": max((index.codepoints for _, index in self._indexes.values()), default=0),
+                "cached_runs": len(self._runs),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "uncovered_chars": self.uncovered,
+            }
+
+
+font_fallback = FontFallback()
@@ -0,0 +1,146 @@
+# backend/rendering/fonts.py - Process-wide font registry for design rendering
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from weakref import WeakKeyDictionary
+
+from PIL import ImageFont
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLED_FONT_PATH = os.path.join(BACKEND_DIR, "DejaVuSans.ttf")
+SYSTEM_FALLBACK_FONTS = ("arial.ttf", "sans-serif.ttf", "DejaVuSans.ttf")
+
+# Sizes used by the design templates; preloaded so first renders skip FreeType setup
+COMMON_FONT_SIZES = (12, 16, 18, 20, 22, 24, 25, 26, 28, 30, 35, 40, 45, 50, 55, 60, 70)
+
+# Families resolved at startup; 'Arial' is the editor's default fontFamily
+PRELOAD_FAMILIES = (None, "Arial")
+
+# Marker path for Pillow's built-in font when no TrueType file can be found
+PILLOW_DEFAULT_FONT = "<pillow-default>"
+
+
+class FontRegistry:
+    """Resolves font families to files once and keeps parsed fonts in an LRU.
+
+    Font files are read into memory the first time they are resolved, so a
+    cache miss for a new size parses from bytes instead of touching the disk.
+    """
+
+    def __init__(self, max_fonts=256, max_families=256):
+        self.max_fonts = max_fonts
+        self.max_families = max_families
+        self._paths = OrderedDict()  # family -> resolved font path; families come from clients, so bounded too
+        self._font_bytes = {}  # font path -> raw file contents
+        self._fonts = OrderedDict()  # (font path, size) -> FreeTypeFont
+        self._font_paths = WeakKeyDictionary()  # FreeTypeFont -> font path, for fonts loaded here
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def _candidates(self, family):
+        if family:
+            yield family + ".ttf"
+            yield family
+        if os.path.exists(BUNDLED_FONT_PATH):
+            yield BUNDLED_FONT_PATH
+        yield from SYSTEM_FALLBACK_FONTS
+
+    def resolve_path(self, family=None):
+        """Return the font file used for ``family``, probing the filesystem only once."""
+        with self._lock:
+            path = self._paths.get(family)
+            if path is not None:
+                self._paths.move_to_end(family)
+                return path
+
+            path = PILLOW_DEFAULT_FONT
+            for candidate in self._candidates(family):
+                try:
+                    probe = ImageFont.truetype(candidate, 10)
+                except (OSError, ValueError):
+                    continue
+                path = os.path.abspath(probe.path) if isinstance(probe.path, str) else candidate
+                break
+            else:
+                logger.warning(f"Could not load any truetype font for '{family}'. Using default Pillow font.")
+
+            self._paths[family] = path
+            while len(self._paths) > self.max_families:
+                self._paths.popitem(last=False)
+            return path
+
+    def font_bytes(self, path):
+        """Raw contents of the font file at ``path``, read from disk only once."""
+        with self._lock:
+            return self._read_font_bytes(path)
+
+    def _read_font_bytes(self, path):
+        data = self._font_bytes.get(path)
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+            self._font_bytes[path] = data
+        return data
+
+    def _load(self, path, size):
+        if path == PILLOW_DEFAULT_FONT:
+            return ImageFont.load_default(size=size)
+        return ImageFont.truetype(io.BytesIO(self._read_font_bytes(path)), size)
+
+    def get(self, size, family=None):
+        """Return a parsed font for ``family`` at ``size``, loading it on a cache miss."""
+        return self.get_file(self.resolve_path(family), size)
+
+    def get_file(self, path, size):
+        """Return the font file at ``path`` (or PILLOW_DEFAULT_FONT) parsed at ``size``."""
+        key = (path, size)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self._fonts.move_to_end(key)
+                self.hits += 1
+                return font
+            self.misses += 1
+
+            font = self._load(path, size)
+            self._fonts[key] = font
+            self._font_paths[font] = path
+            while len(self._fonts) > self.max_fonts:
+                self._fonts.popitem(last=False)
+            return font
+
+    def path_of(self, font):
+        """The font path ``font`` was loaded from, None for fonts not loaded by this registry."""
+        return self._font_paths.get(font)
+
+    def preload(self, families=PRELOAD_FAMILIES, sizes=COMMON_FONT_SIZES):
+        """Resolve ``families`` and parse them at ``sizes`` ahead of the first render."""
+        for family in families:
+            for size in sizes:
+                self.get(size, family)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "cached_fonts": len(self._fonts),
+                "max_fonts": self.max_fonts,
+                "resolved_families": len(self._paths),
+                "max_families": self.max_families,
+                "font_files_loaded": len(self._font_bytes),
+            }
+
+
+font_registry = FontRegistry()
+
+
+def get_robust_font(size, preferred_font_name=None):
+    return font_registry.get(size, preferred_font_name)
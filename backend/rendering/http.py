@@ -0,0 +1,62 @@
+# backend/rendering/http.py - HTTP helpers shared by the Flask and FastAPI design endpoints
+
+# Representations of /generate-design-image, in server preference order
+JSON_MEDIA_TYPE = "application/json"
+PNG_MEDIA_TYPE = "image/png"
+DESIGN_IMAGE_MEDIA_TYPES = (JSON_MEDIA_TYPE, PNG_MEDIA_TYPE)
+
+# Containers /generate-design-batch can stream its images in
+ZIP_MEDIA_TYPE = "application/zip"
+MULTIPART_MEDIA_TYPE = "multipart/mixed"
+BATCH_MEDIA_TYPES = (ZIP_MEDIA_TYPE, MULTIPART_MEDIA_TYPE)
+
+# Containers /generate-bulk-cards can stream its cards in
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+BULK_MEDIA_TYPES = (ZIP_MEDIA_TYPE, NDJSON_MEDIA_TYPE)
+
+
+def _parse_accept(accept):
+    ranges = []
+    for part in accept.split(","):
+        media_range, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((media_range.strip().lower(), quality))
+    return ranges
+
+
+def negotiate_media_type(accept, offers=DESIGN_IMAGE_MEDIA_TYPES):
+    """Pick the offer the Accept header ranks highest.
+
+    The most specific matching media range decides each offer's quality, and
+    ties go to the earlier offer, so clients sending no Accept header or
+    ``*/*`` keep getting the first (JSON) representation.
+    """
+    if not accept:
+        return offers[0]
+    ranges = _parse_accept(accept)
+
+    def quality(offer):
+        major = offer.split("/", 1)[0]
+        best = (-1, 0.0)  # (specificity, q)
+        for media_range, q in ranges:
+            if media_range == offer:
+                specificity = 2
+            elif media_range == f"{major}/*":
+                specificity = 1
+            elif media_range == "*/*":
+                specificity = 0
+            else:
+                continue
+            if specificity > best[0]:
+                best = (specificity, q)
+        return best[1]
+
+    chosen = max(offers, key=quality)
+    return chosen if quality(chosen) > 0 else offers[0]
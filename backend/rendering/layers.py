@@ -0,0 +1,41 @@
+# backend/rendering/layers.py - Cache of the static base layer each render starts from
+import os
+import threading
+
+from .cache import ImageLRU
+
+DEFAULT_BASE_LAYER_MAX_BYTES = 64 * 1024 * 1024
+
+
+class BaseLayerCache:
+    """Per-process LRU of precomposited base layers: background, static shapes and logo.
+
+    A base layer only depends on the template, the canvas size, the two colours
+    and the logo, so a render copies it and draws just its text on top. Each
+    render worker keeps its own cache.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_BASE_LAYER_MAX_BYTES):
+        self._layers = ImageLRU(max_bytes)
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        """A private copy of the layer stored under ``key``, building and storing it on a miss."""
+        with self._lock:
+            layer = self._layers.get(key)
+        if layer is None:
+            layer = build()
+            with self._lock:
+                self._layers.put(key, layer)
+        return layer.copy()
+
+    def clear(self):
+        with self._lock:
+            self._layers.clear()
+
+    def stats(self):
+        with self._lock:
+            return self._layers.stats()
+
+
+base_layers = BaseLayerCache(int(os.getenv("BASE_LAYER_CACHE_MAX_BYTES", DEFAULT_BASE_LAYER_MAX_BYTES)))
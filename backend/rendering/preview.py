@@ -0,0 +1,105 @@
+# backend/rendering/preview.py - Draw stand-ins for scaled previews and layout metadata
+#
+# Layouts always run in full-size canvas coordinates, measuring text with the
+# full-size fonts. ScaledDraw paints those same positions onto a smaller canvas,
+# so a preview has exactly the layout of the export it stands for.
+from PIL import Image
+
+from .fonts import font_registry, get_robust_font
+
+MIN_PREVIEW_SCALE = 0.1
+MAX_PREVIEW_SCALE = 1.0
+# Previews are thrown away after a glance, so they favour encode speed over size
+PREVIEW_PROFILE = "png-fast"
+
+
+def validate_preview_scale(scale):
+    """Return ``scale`` as a float; raises ValueError outside [MIN_PREVIEW_SCALE, MAX_PREVIEW_SCALE]."""
+    scale = float(scale)
+    if not MIN_PREVIEW_SCALE <= scale <= MAX_PREVIEW_SCALE:
+        raise ValueError(f"preview_scale must be between {MIN_PREVIEW_SCALE} and {MAX_PREVIEW_SCALE}")
+    return scale
+
+
+def scaled_size(width, height, scale):
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def scale_coords(xy, scale):
+    """Scale ``(x, y)``, ``[(x0, y0), (x1, y1)]`` or ``[x0, y0, x1, y1]`` by ``scale``."""
+    if xy and isinstance(xy[0], (tuple, list)):
+        return [tuple(v * scale for v in point) for point in xy]
+    return tuple(v * scale for v in xy)
+
+
+def _flat_box(xy):
+    if isinstance(xy[0], (tuple, list)):
+        xs = [point[0] for point in xy]
+        ys = [point[1] for point in xy]
+        return [min(xs), min(ys), max(xs), max(ys)]
+    return list(xy)
+
+
+class ScaledDraw:
+    """ImageDraw stand-in taking full-size coordinates and painting at ``scale``."""
+
+    def __init__(self, draw, scale, font_family=None):
+        self.draw = draw
+        self.scale = scale
+        self.font_family = font_family
+
+    def _font(self, font):
+        # FreeType takes fractional sizes, so glyphs keep their full-size proportions
+        size = max(1.0, font.size * self.scale)
+        path = font_registry.path_of(font)  # the same file, so fallback runs keep their font
+        return font_registry.get_file(path, size) if path else get_robust_font(size, self.font_family)
+
+    def _width(self, width):
+        return max(1, round(width * self.scale)) if width else width
+
+    def text(self, xy, text, fill=None, font=None, anchor=None, **kwargs):
+        self.draw.text(scale_coords(xy, self.scale), text, fill=fill, font=self._font(font), anchor=anchor, **kwargs)
+
+    def line(self, xy, fill=None, width=0, **kwargs):
+        self.draw.line(scale_coords(xy, self.scale), fill=fill, width=self._width(width), **kwargs)
+
+    def rectangle(self, xy, fill=None, outline=None, width=1):
+        self.draw.rectangle(scale_coords(xy, self.scale), fill=fill, outline=outline, width=self._width(width))
+
+    def rounded_rectangle(self, xy, radius=0, fill=None, outline=None, width=1, **kwargs):
+        self.draw.rounded_rectangle(scale_coords(xy, self.scale), radius=radius * self.scale, fill=fill,
+                                    outline=outline, width=self._width(width), **kwargs)
+
+    def bitmap(self, xy, bitmap, fill=None):
+        # Nearest-neighbour keeps hard module edges on QR codes
+        bitmap = bitmap.resize(scaled_size(bitmap.width, bitmap.height, self.scale), Image.Resampling.NEAREST)
+        x, y = scale_coords(xy, self.scale)
+        self.draw.bitmap((round(x), round(y)), bitmap, fill=fill)
+
+
+class LayoutRecorder:
+    """ImageDraw stand-in that paints nothing and records where each element lands, in canvas pixels."""
+
+    def __init__(self):
+        self.elements = []
+
+    def _record(self, kind, box, **extra):
+        self.elements.append({"type": kind, "box": [round(v, 1) for v in box], **extra})
+
+    def text(self, xy, text, fill=None, font=None, anchor=None, **kwargs):
+        left, top, right, bottom = font.getbbox(text, anchor=anchor)
+        x, y = xy
+        self._record("text", (x + left, y + top, x + right, y + bottom), text=text, font_size=font.size)
+
+    def line(self, xy, fill=None, width=0, **kwargs):
+        self._record("line", _flat_box(xy), width=width)
+
+    def rectangle(self, xy, fill=None, outline=None, width=1):
+        self._record("box", _flat_box(xy))
+
+    def rounded_rectangle(self, xy, radius=0, fill=None, outline=None, width=1, **kwargs):
+        self._record("box", _flat_box(xy), radius=radius)
+
+    def bitmap(self, xy, bitmap, fill=None):
+        x, y = xy
+        self._record("bitmap", (x, y, x + bitmap.width, y + bitmap.height))
@@ -0,0 +1,84 @@
+# backend/rendering/qr.py - QR codes for the contact templates, encoded once per payload
+#
+# Encoding a payload (Reed-Solomon, masking) is the expensive part, so module
+# matrices are cached per payload and the scaled bitmaps per (payload, size).
+# A render then paints the whole code with a single bitmap draw instead of one
+# rectangle per module.
+import re
+from functools import lru_cache
+
+import segno
+from PIL import Image
+
+ERROR_LEVELS = ("m", "l")  # M recovers from ~15% damage; L only when an M code would not fit its box
+QUIET_ZONE = 4  # light modules around the code, as the QR spec asks for
+MIN_MODULE_PX = 2  # below this phones cannot resolve the modules, so no code is drawn
+MAX_QR_PAYLOAD = 512  # characters; longer payloads never fit a template's box anyway
+
+
+def _with_scheme(url):
+    # Bare domains get a scheme so phones open them; free text is encoded as is
+    return url if "://" in url or " " in url else f"https://{url}"
+
+
+def qr_payload(fields, contact_fallback=True):
+    """What the design's QR code encodes: its qrUrl, else (with ``contact_fallback``) the website,
+    phone number or email; None if none is set."""
+    qr_url = fields.qr_url.strip()
+    if qr_url:
+        return _with_scheme(qr_url)
+    if not contact_fallback:
+        return None
+    website = fields.website.strip()
+    if website:
+        return _with_scheme(website)
+    phone = re.sub(r"[^\d+]", "", fields.phone_number)
+    if phone:
+        return f"tel:{phone}"
+    email = fields.email.strip()
+    if email:
+        return f"mailto:{email}"
+    return None
+
+
+@lru_cache(maxsize=1024)
+def qr_matrix(payload, error=ERROR_LEVELS[0]):
+    """Rows of booleans for ``payload``, quiet zone included, True for a dark module; None when it does not fit a QR code."""
+    try:
+        code = segno.make(payload, error=error, micro=False)
+    except segno.DataOverflowError:
+        return None
+    margin = (False,) * QUIET_ZONE
+    rows = tuple(margin + tuple(bool(dark) for dark in row) + margin for row in code.matrix)
+    blank = (False,) * len(rows[0])
+    return (blank,) * QUIET_ZONE + rows + (blank,) * QUIET_ZONE
+
+
+@lru_cache(maxsize=256)
+def qr_bitmap(payload, size):
+    """An 'L' mask of the code at whole pixels per module, as large as fits in ``size`` x ``size``.
+
+    None when even the lowest error level would leave modules smaller than
+    MIN_MODULE_PX, as such a code cannot be scanned.
+    """
+    if len(payload) > MAX_QR_PAYLOAD:
+        return None
+    for error in ERROR_LEVELS:
+        matrix = qr_matrix(payload, error)
+        if matrix is not None and size // len(matrix) >= MIN_MODULE_PX:
+            break
+    else:
+        return None
+    modules, module = len(matrix), size // len(matrix)
+    mask = Image.frombytes('L', (modules, modules), bytes(255 if dark else 0 for row in matrix for dark in row))
+    return mask.resize((modules * module, modules * module), Image.NEAREST)  # nearest-neighbour upscale
+
+
+def draw_qr(draw, x, y, size, payload, fill):
+    """Draw the QR code for ``payload`` centred in the ``size`` box at ``(x, y)``; False when it cannot fit."""
+    bitmap = qr_bitmap(payload, int(size))
+    if bitmap is None:
+        return False
+    offset = (size - bitmap.width) / 2
+    draw.bitmap((round(x + offset), round(y + offset)), bitmap, fill=fill)
+    return True
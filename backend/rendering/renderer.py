@@ -0,0 +1,448 @@
+# backend/rendering/renderer.py - Renders designs from compiled template plans
+import asyncio
+import base64
+import logging
+import time
+from dataclasses import dataclass, field, replace
+from functools import cached_property, lru_cache, partial
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple, Union
+
+from PIL import Image, ImageDraw
+
+from .assets import logo_store
+from .budget import SpooledImage, check_canvas, estimate_render_bytes, render_budget, should_spool, spool_encode
+from .cache import design_cache_key, etag_matches, image_cache, make_etag
+from .encoders import DEFAULT_PROFILE, encode_image, encoder_stats, get_encoder_profile
+from .fonts import get_robust_font
+from .layers import base_layers
+from .preview import PREVIEW_PROFILE, LayoutRecorder, ScaledDraw, scale_coords, scaled_size, validate_preview_scale
+from .templates import DesignFields, RenderContext, TemplateSpec, get_template
+from .text import FallbackDraw
+from .timing import StageTimer, render_metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RenderPlan:
+    """A template resolved against one canvas size; every static coordinate is precomputed."""
+    template: TemplateSpec
+    width: int
+    height: int
+    logo_box: Tuple[int, int, int, int]  # x, y, w, h
+    shapes: Tuple[Tuple[Tuple[float, float, float, float], str], ...]  # (box, fill)
+
+    def fonts_for(self, family):
+        return {role: get_robust_font(size, family) for role, size in self.template.fonts.items()}
+
+    def logo_size(self, scale=1.0):
+        return scaled_size(*self.logo_box[2:], scale)
+
+
+@lru_cache(maxsize=512)
+def compile_plan(template_type, image_width, image_height):
+    template = get_template(template_type)
+    return RenderPlan(
+        template=template,
+        width=image_width,
+        height=image_height,
+        logo_box=template.logo.resolve(image_width, image_height),
+        shapes=tuple((shape.resolve(image_width, image_height), shape.fill) for shape in template.shapes),
+    )
+
+
+def _paste_logo(img, plan, logo_img, logo_position, scale=1.0):
+    try:
+        logo_x, logo_y, _, _ = plan.logo_box
+        final_logo_x = logo_x + int(logo_position['x'])
+        final_logo_y = logo_y + int(logo_position['y'])
+        img.paste(logo_img, (round(final_logo_x * scale), round(final_logo_y * scale)), logo_img)
+    except Exception as e:
+        logger.error(f"Error processing logo: {e}")
+
+
+@dataclass(frozen=True)
+class PreparedDesign:
+    """The size-independent part of a design, worked out once and shared by every target."""
+    fields: DesignFields
+    logo_id: Optional[str]  # key into logo_store, None when the design has no usable logo
+    # Logo variants resolved up front, for worker processes whose own logo_store is empty
+    logos: Mapping[Tuple[int, int], Optional[Image.Image]] = field(default_factory=dict)
+
+    def logo(self, size):
+        if size in self.logos:
+            return self.logos[size]
+        return logo_store.variant(self.logo_id, size) if self.logo_id else None
+
+    def for_worker(self, *plans, scale=1.0):
+        """A copy carrying the logo variants ``plans`` need at ``scale``, resized in this process.
+
+        The inline base64 logo is swapped for its id, as the variants replace it.
+        """
+        if not self.logo_id:
+            return self
+        sizes = {plan.logo_size(scale) for plan in plans}
+        return replace(
+            self,
+            fields=replace(self.fields, logo=None, logo_id=self.logo_id),
+            logos={size: logo_store.variant(self.logo_id, size) for size in sizes},
+        )
+
+
+def prepare_design(design_data):
+    fields = DesignFields.from_design_data(design_data)
+    logo_id = fields.logo_id
+    if not logo_id and fields.logo:
+        # Inline logos are interned too, so a logo repeated across requests is decoded once
+        try:
+            logo_id = logo_store.put_data_url(fields.logo)
+        except ValueError as e:
+            logger.error(f"Error processing logo: {e}")
+    return PreparedDesign(fields, logo_id)
+
+
+def _build_base_layer(plan, fields, logo_img, scale):
+    colors = {'text': fields.text_color, 'bg': fields.bg_color}
+    img = Image.new('RGB', scaled_size(plan.width, plan.height, scale), color=fields.bg_color)
+    d = ImageDraw.Draw(img)
+
+    # Static shapes sit behind the logo and the text
+    for box, fill in plan.shapes:
+        d.rectangle(scale_coords(box, scale), fill=colors.get(fill, fill))
+
+    if logo_img is not None:
+        _paste_logo(img, plan, logo_img, fields.logo_position, scale)
+    return img
+
+
+def render_prepared(prepared, template_type, image_width, image_height, scale=1.0, timer=None):
+    """Render a prepared design: copy the cached base layer, then draw the text on it.
+
+    With a ``scale`` below 1 the canvas, fonts and logo shrink, but the layout
+    is still worked out at full size, so the preview matches the export.
+    Stage times go to ``timer`` when one is given.
+    """
+    timer = timer or StageTimer()
+    plan = compile_plan(template_type, image_width, image_height)
+    fields = prepared.fields
+    with timer.stage("logo"):
+        logo_img = prepared.logo(plan.logo_size(scale))
+
+    layer_key = (plan.template.name, image_width, image_height, scale, fields.bg_color, fields.text_color)
+    if logo_img is not None:
+        position = fields.logo_position
+        layer_key += (prepared.logo_id, str(position.get('x')), str(position.get('y')))
+    build = partial(_build_base_layer, plan, fields, logo_img, scale)
+    with timer.stage("base"):
+        if should_spool(*scaled_size(image_width, image_height, scale)):
+            # Large canvases are built fresh rather than kept as a cached layer as big as the render
+            img = build()
+        else:
+            img = base_layers.get_or_build(layer_key, build)
+
+    with timer.stage("fonts"):
+        fonts = plan.fonts_for(fields.font_family)
+    draw = ImageDraw.Draw(img)
+    ctx = RenderContext(
+        draw=FallbackDraw(draw if scale == 1.0 else ScaledDraw(draw, scale, fields.font_family)),
+        width=image_width,
+        height=image_height,
+        fonts=fonts,
+        fields=fields,
+        has_logo=fields.has_logo,
+    )
+    with timer.stage("draw"):
+        plan.template.layout(ctx)
+    return img
+
+
+def layout_design(prepared, template_type, image_width, image_height):
+    """Where everything on a design goes, in full-size canvas pixels, without painting anything."""
+    plan = compile_plan(template_type, image_width, image_height)
+    fields = prepared.fields
+    recorder = LayoutRecorder()
+    for box, _ in plan.shapes:
+        recorder.rectangle(box)
+    ctx = RenderContext(
+        draw=FallbackDraw(recorder),
+        width=image_width,
+        height=image_height,
+        fonts=plan.fonts_for(fields.font_family),
+        fields=fields,
+        has_logo=fields.has_logo,
+    )
+    plan.template.layout(ctx)
+
+    logo = None
+    if prepared.logo_id:
+        logo_x, logo_y, logo_w, logo_h = plan.logo_box
+        try:
+            logo_x += int(fields.logo_position['x'])
+            logo_y += int(fields.logo_position['y'])
+            logo = [logo_x, logo_y, logo_x + logo_w, logo_y + logo_h]
+        except Exception:
+            pass  # the render skips a logo it cannot place, too
+    return {"width": image_width, "height": image_height, "logo": logo, "elements": recorder.elements}
+
+
+def render_design(design_data, template_type, image_width, image_height, scale=1.0):
+    """Render a design onto a new RGB image."""
+    return render_prepared(prepare_design(design_data), template_type, image_width, image_height, scale)
+
+
+def render_error_image(error, image_width, image_height, scale=1.0):
+    image_width, image_height = scaled_size(image_width, image_height, scale)
+    img = Image.new('RGB', (image_width, image_height), color='red')
+    d = ImageDraw.Draw(img)
+    error_msg = f"Error: {error}"
+    error_font = get_robust_font(20)
+    bbox_error = d.textbbox((0, 0), error_msg, font=error_font)
+    error_width = bbox_error[2] - bbox_error[0]
+    error_height = bbox_error[3] - bbox_error[1]
+    d.text(((image_width - error_width) / 2, (image_height - error_height) / 2), error_msg, fill='white', font=error_font)
+    return img
+
+
+class RenderedImage(NamedTuple):
+    etag: Optional[str]  # None when rendering failed and ``data`` is the error image
+    data: Optional[Union[bytes, memoryview, SpooledImage]]  # None when the client's If-None-Match already matches ``etag``
+    timings: Optional[Dict[str, float]] = None  # milliseconds per stage, for the Server-Timing header
+    layout: Optional[dict] = None  # layout_design's metadata, when the render was asked to lay the design out
+
+    @property
+    def not_modified(self):
+        return self.data is None
+
+
+def encode_prepared(prepared, template_type, image_width, image_height, profile=DEFAULT_PROFILE, scale=1.0,
+                    timer=None):
+    """Render and encode a prepared design; returns ``(data, ok, stages)``.
+
+    When rendering fails ``ok`` is False and ``data`` is the error image.
+    ``stages`` maps each render stage to its time in milliseconds.
+    """
+    timer = timer or StageTimer()
+    img, ok = _render_or_error(prepared, template_type, image_width, image_height, scale, timer)
+    data, timer.stages["encode"] = encode_image(img, profile)
+    return data, ok, timer.stages
+
+
+def _render_or_error(prepared, template_type, image_width, image_height, scale, timer):
+    try:
+        return render_prepared(prepared, template_type, image_width, image_height, scale, timer), True
+    except Exception as e:
+        logger.error(f"Error generating image: {e}")
+        return render_error_image(e, image_width, image_height, scale), False
+
+
+def encode_prepared_file(prepared, template_type, image_width, image_height, profile=DEFAULT_PROFILE, scale=1.0,
+                         timer=None):
+    """Like encode_prepared, but encodes into a temporary file; returns ``(path, ok, stages)``.
+
+    For large canvases, whose encoded image should not be held in memory or
+    pickled back from a worker process. SpooledImage.open takes over the file.
+    """
+    timer = timer or StageTimer()
+    img, ok = _render_or_error(prepared, template_type, image_width, image_height, scale, timer)
+    with timer.stage("encode"):
+        path = spool_encode(img, get_encoder_profile(profile))
+    return path, ok, timer.stages
+
+
+def encode_design(design_data, template_type, image_width, image_height, profile=DEFAULT_PROFILE, scale=1.0,
+                  spool=False):
+    """Prepare, render and encode a design; ``spool`` encodes to a temporary file as encode_prepared_file does."""
+    timer = StageTimer()
+    with timer.stage("prepare"):
+        prepared = prepare_design(design_data)
+    encode = encode_prepared_file if spool else encode_prepared
+    return encode(prepared, template_type, image_width, image_height, profile, scale, timer)
+
+
+def encode_prepared_bytes(prepared, template_type, image_width, image_height, profile=DEFAULT_PROFILE, scale=1.0):
+    """encode_prepared for worker processes: memoryviews cannot be pickled back to the caller."""
+    data, ok, stages = encode_prepared(prepared, template_type, image_width, image_height, profile, scale)
+    return bytes(data), ok, stages
+
+
+def encode_design_bytes(design_data, template_type, image_width, image_height, profile=DEFAULT_PROFILE, scale=1.0,
+                        spool=False):
+    """encode_design for worker processes, which prepare the design (inline logo decode included) themselves."""
+    data, ok, stages = encode_design(design_data, template_type, image_width, image_height, profile, scale, spool)
+    return (data if spool else bytes(data)), ok, stages
+
+
+def encode_design_layout(design, template_type, image_width, image_height, profile=DEFAULT_PROFILE, scale=1.0,
+                         spool=False):
+    """Render and encode a design and lay it out in the same call; returns ``(data, ok, stages, layout)``.
+
+    ``design`` is the design data, or a PreparedDesign fit for a worker. The
+    layout is worked out next to the render, in the worker, rather than by
+    whoever serves the response.
+    """
+    timer = StageTimer()
+    if not isinstance(design, PreparedDesign):
+        with timer.stage("prepare"):
+            design = prepare_design(design)
+    encode = encode_prepared_file if spool else encode_prepared
+    data, ok, stages = encode(design, template_type, image_width, image_height, profile, scale, timer)
+    with timer.stage("layout"):
+        layout = layout_design(design, template_type, image_width, image_height)
+    return (data if spool else bytes(data)), ok, stages, layout
+
+
+class DesignRender:
+    """Cache bookkeeping for one design request, so the render itself can run anywhere.
+
+    The ETag is the content hash of the inputs (tagged with ``representation``
+    when the endpoint serves more than one), so a matching If-None-Match is
+    answered without rendering or even looking the image up.
+
+    Output canvases over MAX_CANVAS_PIXELS raise CanvasTooLarge. Large ones are
+    spooled: encoded to a temporary file and returned as a SpooledImage. With
+    ``layout`` the render also returns the design's layout metadata. A ``dpi``
+    is written into the image file, for print targets.
+    """
+
+    def __init__(self, design_data, template_type, image_width, image_height, representation=None,
+                 profile=DEFAULT_PROFILE, scale=1.0, layout=False, dpi=None):
+        self.profile = get_encoder_profile(profile)
+        if dpi:
+            self.profile = self.profile.at_dpi(dpi)
+        self.layout = layout
+        # Profiles reach the workers and the cache key by name; one carrying a DPI goes as it is
+        profile = self.profile if dpi else self.profile.name
+        self.args = (design_data, template_type, image_width, image_height, profile, scale)
+        if image_width <= 0 or image_height <= 0:
+            raise ValueError("Image dimensions must be positive")
+        check_canvas(*self.output_size)
+        self.spooled = should_spool(*self.output_size)
+        self.memory_estimate = estimate_render_bytes(*self.output_size)
+        self.representation = representation
+
+    @cached_property
+    def cache_key(self):
+        return design_cache_key(*self.args)
+
+    @cached_property
+    def etag(self):
+        return make_etag(self.cache_key, self.representation)
+
+    @property
+    def output_size(self):
+        _, _, image_width, image_height, _, scale = self.args
+        return scaled_size(image_width, image_height, scale)
+
+    def worker_call(self, prepared=None):
+        """The worker function rendering this job, and its arguments.
+
+        The worker prepares the design itself, decoding and resizing an inline
+        logo off the event loop. Logos uploaded to the asset store (logoId)
+        only live in this process, so those designs, and an already
+        ``prepared`` one, go with their logo variants resized here: call this
+        in a thread.
+        """
+        design_data, template_type, image_width, image_height, profile, scale = self.args
+        if self._prepares_in_worker(prepared):
+            return encode_design_layout if self.layout else encode_design_bytes, (*self.args, self.spooled)
+        plan = compile_plan(template_type, image_width, image_height)
+        prepared = (prepared or prepare_design(design_data)).for_worker(plan, scale=scale)
+        if self.layout:
+            return encode_design_layout, (prepared, *self.args[1:], self.spooled)
+        return (encode_prepared_file if self.spooled else encode_prepared_bytes,
+                (prepared, template_type, image_width, image_height, profile, scale))
+
+    def _prepares_in_worker(self, prepared):
+        return prepared is None and not self.args[0].get('logoId')
+
+    async def render_in(self, executor, prepared=None):
+        """Render in ``executor``'s worker pool; time spent waiting for a worker is the 'queue' stage.
+
+        Raises RenderQueueFull when the pool or the memory budget has no room.
+        """
+        start = time.perf_counter()
+        if self._prepares_in_worker(prepared):
+            fn, args = self.worker_call()
+        else:
+            fn, args = await asyncio.to_thread(self.worker_call, prepared)
+        submitted = time.perf_counter()
+        with render_budget.reserve(self.memory_estimate):
+            data, ok, stages, *layout = await executor.submit(fn, *args)
+        waited_ms = (time.perf_counter() - submitted) * 1000
+        queue_ms = max(0.0, waited_ms - sum(stages.values()))
+        # Preparing happens here, in the worker or in both (logo variants here, fields there)
+        prepare_ms = (submitted - start) * 1000 + stages.pop("prepare", 0.0)
+        stages = {"prepare": prepare_ms, "queue": queue_ms, **stages}
+        return self.complete(data, ok, stages, *layout)
+
+    def render(self):
+        """Render in this thread; raises RenderQueueFull when the memory budget has no room."""
+        encode = encode_design_layout if self.layout else encode_design
+        with render_budget.reserve(self.memory_estimate):
+            return self.complete(*encode(*self.args, spool=self.spooled))
+
+    def cached(self, if_none_match=None):
+        """The response when no render is needed, otherwise None."""
+        if etag_matches(if_none_match, self.etag):
+            return RenderedImage(self.etag, None, {})
+        start = time.perf_counter()
+        png_data = image_cache.get(self.cache_key)
+        if png_data is not None:
+            return RenderedImage(self.etag, png_data, {"cache": (time.perf_counter() - start) * 1000})
+        return None
+
+    async def cached_async(self, if_none_match=None):
+        """cached(), hashing a design that carries an inline logo in a thread rather than on the event loop."""
+        if self.args[0].get('logo'):
+            return await asyncio.to_thread(self.cached, if_none_match)
+        return self.cached(if_none_match)
+
+    def complete(self, data, ok, stages, layout=None):
+        """The response for an encode_prepared* result: bytes, or the spooled file's path."""
+        if self.spooled:
+            data = SpooledImage.open(data)
+        if not ok:
+            return RenderedImage(None, data, stages, layout)
+        template_name = get_template(self.args[1]).name
+        encoder_stats.record(self.profile.name, template_name, stages["encode"], len(data))
+        render_metrics.record(template_name, *self.output_size, dict(stages, total=sum(stages.values())))
+        if not self.spooled:
+            image_cache.put(self.cache_key, data)
+        return RenderedImage(self.etag, data, stages, layout)
+
+
+def render_design_png(design_data, template_type, image_width, image_height, if_none_match=None, representation=None,
+                      profile=DEFAULT_PROFILE, scale=1.0):
+    """Render and encode a design in this thread, serving identical designs from the image cache.
+
+    The output is PNG unless another output ``profile`` is asked for. Raises
+    RenderQueueFull when the memory budget has no room for the render.
+    """
+    job = DesignRender(design_data, template_type, image_width, image_height, representation, profile, scale)
+    return job.cached(if_none_match) or job.render()
+
+
+def base64_image(rendered, template_type, image_width, image_height, scale=1.0):
+    """``rendered.data`` as base64 text, timed as the render's 'base64' stage."""
+    start = time.perf_counter()
+    data = rendered.data.read() if isinstance(rendered.data, SpooledImage) else rendered.data
+    text = base64.b64encode(data).decode()
+    base64_ms = (time.perf_counter() - start) * 1000
+    if rendered.timings is not None:
+        rendered.timings["base64"] = base64_ms
+    render_metrics.record(get_template(template_type).name, *scaled_size(image_width, image_height, scale),
+                          {"base64": base64_ms})
+    return text
+
+
+def generate_image_from_design(design_data, template_type, image_width, image_height, preview_scale=None):
+    """Render a design and return it as a base64-encoded PNG.
+
+    With a ``preview_scale`` the image is a fast-encoded preview at that
+    fraction of the size, laid out exactly like the full-size export.
+    Stage timings are recorded in render_metrics.
+    """
+    scale = 1.0 if preview_scale is None else validate_preview_scale(preview_scale)
+    profile = DEFAULT_PROFILE if preview_scale is None else PREVIEW_PROFILE
+    rendered = render_design_png(design_data, template_type, image_width, image_height, profile=profile, scale=scale)
+    return base64_image(rendered, template_type, image_width, image_height, scale)
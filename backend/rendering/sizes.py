@@ -0,0 +1,54 @@
+# backend/rendering/sizes.py - Relative layout units and the standard export sizes
+#
+# Template offsets and font sizes are tuned on the editor's 800px-wide canvas
+# and stay in those pixels. Relative units come from the canvas they are solved
+# on instead: a target is laid out on a reference canvas about 800px wide with
+# the target's aspect ratio, and ScaledDraw paints that layout at the target
+# size, so every size of a design has the same layout.
+from typing import NamedTuple, Optional
+
+from .preview import scaled_size
+
+REFERENCE_WIDTH = 800
+
+
+def relative_canvas(width, height):
+    """The reference canvas for a ``width`` x ``height`` target: ``(layout_width, layout_height, scale)``.
+
+    The canvas is in whole pixels, since it keys the compiled plan cache, and
+    as close to REFERENCE_WIDTH wide as it can be while still scaling to
+    exactly the target size.
+    """
+    for offset in range(REFERENCE_WIDTH):
+        for layout_width in (REFERENCE_WIDTH + offset, REFERENCE_WIDTH - offset):
+            scale = width / layout_width
+            layout_height = max(1, round(height / scale))
+            if scaled_size(layout_width, layout_height, scale) == (width, height):
+                return layout_width, layout_height, scale
+    return width, height, 1.0
+
+
+class ExportSize(NamedTuple):
+    name: str
+    width: int
+    height: int
+    label: str
+    dpi: Optional[int] = None  # print sizes carry their resolution into the exported file
+
+
+EXPORT_SIZES = {
+    size.name: size
+    for size in (
+        ExportSize("instagram-post", 1080, 1080, "Instagram post"),
+        ExportSize("instagram-story", 1080, 1920, "Instagram story"),
+        ExportSize("a4-300dpi", 2480, 3508, "A4 at 300 DPI", dpi=300),
+        ExportSize("business-card", 1050, 600, "Business card, 3.5 x 2 in at 300 DPI", dpi=300),
+    )
+}
+
+
+def get_export_size(name):
+    size = EXPORT_SIZES.get(name)
+    if size is None:
+        raise ValueError(f"Unknown export size '{name}', expected one of {sorted(EXPORT_SIZES)}")
+    return size
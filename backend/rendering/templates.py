@@ -0,0 +1,624 @@
+# backend/rendering/templates.py - Declarative registry of the design templates
+#
+# A template is data: the font roles it uses, where its logo goes, and the
+# static shapes painted behind the text. Positions are a fraction of the canvas
+# plus a pixel offset, so they can be resolved once per canvas size. The only
+# code per template is its layout function, which flows the user's text.
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from .qr import draw_qr, qr_payload
+from .text import draw_text_wrapped, measure_text
+
+
+@dataclass(frozen=True)
+class Point:
+    """A canvas position: ``(fx * width + dx, fy * height + dy)``."""
+    fx: float = 0.0
+    fy: float = 0.0
+    dx: float = 0
+    dy: float = 0
+
+    def resolve(self, width, height):
+        return (self.fx * width + self.dx, self.fy * height + self.dy)
+
+
+@dataclass(frozen=True)
+class LogoSlot:
+    size: int
+    anchor: Point = Point()
+    # Fraction of the logo box that sits on the anchor, e.g. (0.5, 0) centres it horizontally
+    align: Tuple[float, float] = (0.0, 0.0)
+
+    def resolve(self, width, height):
+        x, y = self.anchor.resolve(width, height)
+        return (int(x - self.align[0] * self.size), int(y - self.align[1] * self.size), self.size, self.size)
+
+
+@dataclass(frozen=True)
+class Rect:
+    top_left: Point
+    bottom_right: Point
+    fill: str  # 'text', 'bg' or a literal colour
+
+    def resolve(self, width, height):
+        return self.top_left.resolve(width, height) + self.bottom_right.resolve(width, height)
+
+
+@dataclass(frozen=True)
+class TemplateSpec:
+    name: str
+    fonts: Mapping[str, int]
+    logo: LogoSlot
+    layout: Callable[["RenderContext"], None]
+    shapes: Tuple[Rect, ...] = ()
+
+
+@dataclass(frozen=True)
+class DesignFields:
+    bg_color: str
+    text_color: str
+    font_family: str
+    text: str
+    sub_text: str
+    offer_details: str
+    phone_number: str
+    email: str
+    website: str
+    logo: Any
+    logo_id: Optional[str]  # a logo uploaded to the asset store, used instead of an inline ``logo``
+    logo_position: Mapping[str, float]
+    qr_url: str = ''  # what the QR code templates encode, when it is not the website or contact details
+
+    @property
+    def has_logo(self):
+        return bool(self.logo or self.logo_id)
+
+    @classmethod
+    def from_design_data(cls, design_data):
+        def text_field(key):
+            # Clients send null for fields they cleared; those render like fields left out
+            return design_data.get(key) or ''
+
+        return cls(
+            bg_color=design_data.get('bgColor', '#ffffff'),
+            text_color=design_data.get('textColor', '#333333'),
+            font_family=design_data.get('fontFamily', 'Arial'),
+            text=text_field('text'),
+            sub_text=text_field('subText'),
+            offer_details=text_field('offerDetails'),
+            phone_number=text_field('phoneNumber'),
+            email=text_field('email'),
+            website=text_field('website'),
+            logo=design_data.get('logo'),
+            logo_id=design_data.get('logoId'),
+            logo_position=design_data.get('logoPosition', {'x': 0, 'y': 0}),
+            qr_url=text_field('qrUrl'),
+        )
+
+
+@dataclass
+class RenderContext:
+    draw: Any
+    width: int
+    height: int
+    fonts: Dict[str, Any]
+    fields: DesignFields
+    has_logo: bool
+
+    @property
+    def text_color(self):
+        return self.fields.text_color
+
+    @property
+    def bg_color(self):
+        return self.fields.bg_color
+
+
+# --- Layout helpers ---
+
+def _text_size(font, text):
+    bbox = font.getbbox(text)
+    return bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+
+def _draw_centered(ctx, y, text, font, fill):
+    ctx.draw.text(((ctx.width - measure_text(font, text)) / 2, y), text, font=font, fill=fill)
+
+
+def _draw_right(ctx, y, text, font, fill, margin=20):
+    ctx.draw.text((ctx.width - margin - measure_text(font, text), y), text, font=font, fill=fill)
+
+
+def _bare_url(url):
+    return url.replace('https://', '').replace('http://', '').replace('www.', '')
+
+
+def _draw_cta(ctx, y, text, font, pad_x, pad_y, radius, box_fill, text_fill):
+    """Draw a centred call-to-action button at ``y`` and return its height."""
+    text_width, text_height = _text_size(font, text)
+    cta_width = text_width + pad_x * 2
+    cta_height = text_height + pad_y * 2
+    cta_x = (ctx.width - cta_width) / 2
+    ctx.draw.rounded_rectangle([(cta_x, y), (cta_x + cta_width, y + cta_height)], radius=radius, fill=box_fill)
+    ctx.draw.text((cta_x + pad_x, y + pad_y), text, font=font, fill=text_fill)
+    return cta_height
+
+
+# --- Template layouts ---
+
+def _layout_blank(ctx):
+    pass
+
+
+def _layout_poster(ctx):
+    d, fields, fonts = ctx.draw, ctx.fields, ctx.fonts
+    main_text_y = 150 if ctx.has_logo else 50
+    _draw_centered(ctx, main_text_y, fields.text or 'Your Poster Title', fonts['main'], ctx.text_color)
+
+    sub_text_y = main_text_y + fonts['main'].size + 20
+    _draw_centered(ctx, sub_text_y, fields.sub_text or 'Catchy slogan or details here.', fonts['sub'], ctx.text_color)
+
+    if fields.offer_details:
+        offer_y = sub_text_y + fonts['sub'].size + 20
+        _draw_centered(ctx, offer_y, fields.offer_details, fonts['offer'], 'red')
+
+    # Contact Info
+    small_font = fonts['small']
+    contact_y = ctx.height - 80
+    if fields.phone_number:
+        d.text((ctx.width - 20, contact_y), f"Call: {fields.phone_number}", font=small_font, fill=ctx.text_color, anchor="ra")
+        contact_y += small_font.size + 5
+    if fields.website:
+        d.text((ctx.width - 20, contact_y), f"Visit: {fields.website}", font=small_font, fill=ctx.text_color, anchor="ra")
+    elif not fields.phone_number:
+        d.text((ctx.width - 20, contact_y), "Grogent.com", font=small_font, fill=ctx.text_color, anchor="ra")
+
+
+def _layout_business_card(ctx):
+    d, fields, fonts = ctx.draw, ctx.fields, ctx.fonts
+    current_y = 80 if ctx.has_logo else 40
+
+    _draw_centered(ctx, current_y, fields.text or 'Your Business Name', fonts['main'], ctx.text_color)
+    current_y += fonts['main'].size + 10
+
+    _draw_centered(ctx, current_y, fields.sub_text or 'Your Tagline / Name', fonts['sub'], ctx.text_color)
+    current_y += fonts['sub'].size + 20
+
+    # Contact Info
+    small_font = fonts['small']
+    d.text((ctx.width / 2, current_y), f"Contact: {fields.phone_number or '123-456-7890'}", font=small_font, fill=ctx.text_color, anchor="mm")
+    current_y += small_font.size + 5
+    d.text((ctx.width / 2, current_y), f"Email: {fields.email or 'info@example.com'}", font=small_font, fill=ctx.text_color, anchor="mm")
+    current_y += small_font.size + 5
+    if fields.website:
+        d.text((ctx.width / 2, current_y), f"Web: {fields.website}", font=small_font, fill=ctx.text_color, anchor="mm")
+
+
+def _layout_header_offer(ctx, title_default, sub_default, offer_fill):
+    """Shared flow of the two poster templates with a coloured header band."""
+    fields, fonts = ctx.fields, ctx.fonts
+    header_height = ctx.height * 0.25
+
+    header_font = fonts['header']
+    header_y = header_height / 2 - header_font.size / 2 + (30 if ctx.has_logo else 0)
+    _draw_centered(ctx, header_y, fields.text or title_default, header_font, ctx.bg_color)
+
+    current_y = header_height + 50
+    _draw_centered(ctx, current_y, fields.sub_text or sub_default, fonts['body'], ctx.text_color)
+    current_y += fonts['body'].size + 20
+
+    if fields.offer_details:
+        _draw_centered(ctx, current_y, fields.offer_details, fonts['offer'], offer_fill)
+        current_y += fonts['offer'].size + 30
+    return current_y
+
+
+def _layout_modern_event_poster(ctx):
+    fields, fonts = ctx.fields, ctx.fonts
+    current_y = _layout_header_offer(ctx, 'Modern Event', 'Join Us for an Exciting Experience!', 'red')
+
+    # Call to Action
+    cta_text = fields.website if fields.website else 'Learn More at Grogent.com'
+    current_y += _draw_cta(ctx, current_y, cta_text, fonts['cta'], 20, 10, 5, ctx.text_color, ctx.bg_color) + 20
+
+    if fields.phone_number:
+        ctx.draw.text((ctx.width / 2, current_y), f"Contact: {fields.phone_number}", font=fonts['small'], fill=ctx.text_color, anchor="mm")
+
+
+def _layout_vibrant_offer_poster(ctx):
+    fields, fonts = ctx.fields, ctx.fonts
+    current_y = _layout_header_offer(ctx, 'BIG SALE!', 'Up to 50% Off Everything!', 'darkred')
+
+    # Call to Action
+    cta_text = fields.website if fields.website else 'Shop Now!'
+    _draw_cta(ctx, current_y, cta_text, fonts['cta'], 25, 15, 50, 'red', 'white')
+
+    small_font = fonts['small']
+    if fields.phone_number:
+        ctx.draw.text((ctx.width / 2, ctx.height - 80), f"Call: {fields.phone_number}", font=small_font, fill=ctx.text_color, anchor="mm")
+    ctx.draw.text((ctx.width / 2, ctx.height - 30), "Limited Time Offer", font=small_font, fill=ctx.text_color, anchor="mm")
+
+
+def _layout_minimalist_business_card(ctx):
+    fields, fonts = ctx.fields, ctx.fonts
+    current_y = 30
+
+    _draw_right(ctx, current_y, fields.text or 'Your Name', fonts['main'], ctx.text_color)
+    current_y += fonts['main'].size + 5
+
+    _draw_right(ctx, current_y, fields.sub_text or 'Your Professional Title', fonts['sub'], ctx.text_color)
+
+    # Contact Info
+    small_font = fonts['small']
+    line_step = small_font.size + 5
+    contact_y = ctx.height - 20 - line_step * (3 if fields.website else (2 if fields.email else 1))
+    if fields.website:
+        _draw_right(ctx, contact_y, fields.website, small_font, ctx.text_color)
+        contact_y -= line_step
+    if fields.email:
+        _draw_right(ctx, contact_y, fields.email, small_font, ctx.text_color)
+        contact_y -= line_step
+    if fields.phone_number:
+        _draw_right(ctx, contact_y, fields.phone_number, small_font, ctx.text_color)
+    elif not (fields.email or fields.website):
+        for placeholder in ('+1 (234) 567-8900', 'email@example.com', 'yourwebsite.com'):
+            _draw_right(ctx, contact_y, placeholder, small_font, ctx.text_color)
+            contact_y -= line_step
+
+
+def _layout_professional_flyer(ctx):
+    d, fields, fonts = ctx.draw, ctx.fields, ctx.fonts
+    content_width = ctx.width - 60
+    current_y = 30
+
+    height_used = draw_text_wrapped(d, fields.text or 'Professional Service', fonts['main'], ctx.text_color, (30, current_y), content_width - (100 if ctx.has_logo else 0))
+    current_y += height_used + 15
+
+    height_used = draw_text_wrapped(d, fields.sub_text or 'Your Tagline Goes Here', fonts['sub'], ctx.text_color, (30, current_y), content_width)
+    current_y += height_used + 25
+
+    # Offer Details / Body Text
+    body_text = fields.offer_details or 'Discover how our solutions can help your business grow. We offer unparalleled quality and dedicated support.'
+    height_used = draw_text_wrapped(d, body_text, fonts['body'], ctx.text_color, (30, current_y), content_width)
+    current_y += height_used + 30
+
+    # Contact Section
+    d.line([(30, current_y), (ctx.width - 30, current_y)], fill=ctx.text_color, width=1)
+    current_y += 20
+
+    small_font = fonts['small']
+    if fields.phone_number:
+        d.text((30, current_y), f"Phone: {fields.phone_number}", font=small_font, fill=ctx.text_color)
+        current_y += small_font.size + 5
+    if fields.email:
+        d.text((30, current_y), f"Email: {fields.email}", font=small_font, fill=ctx.text_color)
+        current_y += small_font.size + 5
+    if fields.website:
+        d.text((30, current_y), f"Website: {fields.website}", font=small_font, fill=ctx.text_color)
+    elif not (fields.phone_number or fields.email):
+        d.text((30, current_y), "Learn more at Grogent.com", font=small_font, fill=ctx.text_color)
+
+
+def _layout_social_media_post(ctx):
+    fields, fonts = ctx.fields, ctx.fonts
+
+    # Header (Brand Name)
+    sub_font = fonts['sub']
+    brand_x = 20 + (80 if ctx.has_logo else 0)
+    ctx.draw.text((brand_x, 20 + (60 - sub_font.size) / 2), fields.text or 'Your Brand Name', font=sub_font, fill=ctx.text_color)
+
+    # Main Content
+    content_center_y = ctx.height / 2
+    main_font = fonts['main']
+    _draw_centered(ctx, content_center_y - main_font.size - 15, fields.sub_text or 'New Product Launch!', main_font, ctx.text_color)
+
+    if fields.offer_details:
+        _draw_centered(ctx, content_center_y + 15, fields.offer_details, sub_font, 'green')
+
+    # Call to Action
+    cta_text = f"Shop Now: {_bare_url(fields.website)}" if fields.website else 'Learn More'
+    _draw_cta(ctx, ctx.height - 80, cta_text, fonts['cta'], 20, 10, 5, ctx.text_color, ctx.bg_color)
+
+
+TICKET_QR_SIZE = 100
+
+
+def _ticket_number(fields):
+    """A four-digit ticket number derived from the ticket's text.
+
+    Rendered images are cached and tagged by content, so the same ticket must
+    always render the same number.
+    """
+    text = "\x1f".join(str(value) for value in (fields.text, fields.sub_text, fields.offer_details, fields.website,
+                                                 fields.phone_number, fields.email, fields.qr_url))
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") % 9000 + 1000
+
+
+def _layout_event_ticket(ctx):
+    d, fields, fonts = ctx.draw, ctx.fields, ctx.fonts
+    current_y = 20
+
+    d.text((20, current_y), fields.text or 'Event Name', font=fonts['main'], fill=ctx.text_color)
+    current_y += fonts['main'].size + 15
+
+    # Details
+    detail_font = fonts['detail']
+    for detail in (f"Date: {fields.sub_text or 'DD/MM/YYYY'}",
+                   f"Time: {fields.offer_details or 'HH:MM AM/PM'}",
+                   f"Location: {fields.website or 'Venue Address'}"):
+        d.text((20, current_y), detail, font=detail_font, fill=ctx.text_color)
+        current_y += detail_font.size + 5
+
+    # Footer (Ticket ID)
+    ticket_id = f"Ticket ID: #GRG{_ticket_number(fields)}"
+    _draw_right(ctx, ctx.height - 30, ticket_id, fonts['small'], ctx.text_color)
+
+    # QR code of the qrUrl, bottom right above the ticket id; the website field is the venue here, so it is not encoded
+    payload = qr_payload(fields, contact_fallback=False)
+    if payload:
+        draw_qr(d, ctx.width - 20 - TICKET_QR_SIZE, ctx.height - 40 - TICKET_QR_SIZE, TICKET_QR_SIZE, payload,
+                ctx.text_color)
+
+
+TRADITIONAL_TOP_TEXT_COLOR = '#ffeb3b'
+TRADITIONAL_BOTTOM_TEXT_COLOR = '#004d40'
+
+
+def _layout_traditional_indian_business_card(ctx):
+    fields, fonts = ctx.fields, ctx.fonts
+    half_height = ctx.height // 2
+
+    main_font = fonts['main']
+    main_text_y = half_height / 2 - main_font.size / 2 - 10
+    _draw_right(ctx, main_text_y, fields.text or 'Your Business Name', main_font, TRADITIONAL_TOP_TEXT_COLOR)
+
+    sub_text_y = main_text_y + main_font.size + 5
+    _draw_right(ctx, sub_text_y, fields.sub_text or 'Crafting Excellence', fonts['sub'], TRADITIONAL_TOP_TEXT_COLOR)
+
+    contact_lines = [line for line in (fields.phone_number, fields.email, fields.website) if line]
+    if not contact_lines:
+        contact_lines = ['+91 98765 43210', 'contact@indianbiz.com']
+
+    small_font = fonts['small']
+    line_height = small_font.size * 1.3
+    current_contact_y = half_height + half_height / 2 - line_height * len(contact_lines) / 2
+    for line in contact_lines:
+        _draw_centered(ctx, current_contact_y, line, small_font, TRADITIONAL_BOTTOM_TEXT_COLOR)
+        current_contact_y += line_height
+
+
+def _layout_wrapped_banner(ctx, main_default, main_fill, main_gap, sub_default, offer_fill, offer_gap):
+    """Shared flow of the banners that wrap their headline across the canvas."""
+    d, fields, fonts = ctx.draw, ctx.fields, ctx.fonts
+    content_width = ctx.width - 40
+    content_x_start = 20
+    current_y = ctx.height * 0.2
+
+    height_used = draw_text_wrapped(d, fields.text or main_default, fonts['main'], main_fill, (content_x_start, current_y), content_width)
+    current_y += height_used + main_gap
+
+    height_used = draw_text_wrapped(d, fields.sub_text or sub_default, fonts['sub'], ctx.text_color, (content_x_start, current_y), content_width)
+    current_y += height_used + 10
+
+    if fields.offer_details:
+        height_used = draw_text_wrapped(d, fields.offer_details, fonts['offer'], offer_fill, (content_x_start, current_y), content_width)
+        current_y += height_used + offer_gap
+    return current_y
+
+
+def _layout_product_discount_banner(ctx):
+    current_y = _layout_wrapped_banner(ctx, 'Flash Sale!', ctx.text_color, 10, 'Up to 70% Off!', 'red', 15)
+
+    # Website/Call to Action
+    if ctx.fields.website:
+        _draw_centered(ctx, current_y, f"Shop Now: {_bare_url(ctx.fields.website)}", ctx.fonts['website'], ctx.text_color)
+
+
+def _layout_limited_time_offer_banner(ctx):
+    current_y = _layout_wrapped_banner(ctx, 'Limited Time Offer!', '#dc3545', 5, 'Save Big Today!', '#dc3545', 10)
+
+    # Call to Action
+    if ctx.fields.website:
+        _draw_centered(ctx, current_y + 10, f"Claim Your Deal: {_bare_url(ctx.fields.website)}", ctx.fonts['cta'], '#007bff')
+
+
+def _layout_inspirational_quote_card(ctx):
+    fields, fonts = ctx.fields, ctx.fonts
+    quote_y = ctx.height * 0.25
+
+    quote_text = f"\u201c{fields.text or 'The only way to do great work is to love what you do.'}\u201d"
+    height_used = draw_text_wrapped(ctx.draw, quote_text, fonts['quote'], ctx.text_color, (50, quote_y), ctx.width - 100)
+    current_y = quote_y + height_used + 20  # Position author below quote
+
+    _draw_centered(ctx, current_y, f"\u2014 {fields.sub_text or 'Steve Jobs'}", fonts['author'], ctx.text_color)
+    current_y += fonts['author'].size + 15
+
+    if fields.website:
+        _draw_centered(ctx, current_y, _bare_url(fields.website), fonts['website'], ctx.text_color)
+
+
+def _layout_event_invitation_card(ctx):
+    d, fields, fonts = ctx.draw, ctx.fields, ctx.fonts
+    current_y = 25
+
+    d.text((25, current_y), fields.text or 'You\'re Invited!', font=fonts['title'], fill=ctx.text_color)
+    current_y += fonts['title'].size + 10
+
+    d.text((25, current_y), fields.sub_text or 'Special Event Name', font=fonts['event_name'], fill=ctx.text_color)
+    current_y += fonts['event_name'].size + 20
+
+    # Details
+    detail_font = fonts['detail']
+    for detail in (f"Date: {fields.offer_details or 'October 26, 2025'}",
+                   f"Time: {fields.phone_number or '7:00 PM EST'}",
+                   f"Location: {fields.website or 'Virtual / Your Venue'}"):
+        d.text((25, current_y), detail, font=detail_font, fill=ctx.text_color)
+        current_y += detail_font.size + 5
+
+    # RSVP
+    if fields.email:
+        d.text((25, current_y + 10), f"RSVP: {fields.email}", font=fonts['rsvp'], fill=ctx.text_color)
+
+
+def _layout_product_showcase_post(ctx):
+    d, fields, fonts = ctx.draw, ctx.fields, ctx.fonts
+    content_width = ctx.width - 60
+    current_y = ctx.height * 0.3  # Start from 30% down
+
+    height_used = draw_text_wrapped(d, fields.text or 'Amazing Product Name', fonts['product_name'], ctx.text_color, (30, current_y), content_width)
+    current_y += height_used + 10
+
+    height_used = draw_text_wrapped(d, fields.sub_text or 'Discover unparalleled quality.', fonts['tagline'], ctx.text_color, (30, current_y), content_width)
+    current_y += height_used + 20
+
+    if fields.offer_details:
+        height_used = draw_text_wrapped(d, fields.offer_details, fonts['offer'], 'green', (30, current_y), content_width)
+        current_y += height_used + 25
+
+    # Call to Action
+    cta_text = f"Buy Now: {_bare_url(fields.website)}" if fields.website else 'Learn More'
+    _draw_cta(ctx, current_y + 10, cta_text, fonts['cta'], 25, 15, 5, ctx.text_color, ctx.bg_color)
+
+
+def _layout_elegant_contact_card(ctx):
+    fields, fonts = ctx.fields, ctx.fonts
+    current_y = 25 + (60 if ctx.has_logo else 0)
+
+    _draw_centered(ctx, current_y, fields.text or 'Your Name', fonts['name'], ctx.text_color)
+    current_y += fonts['name'].size + 5
+
+    _draw_centered(ctx, current_y, fields.sub_text or 'Your Professional Title', fonts['title'], ctx.text_color)
+    current_y += fonts['title'].size + 20
+
+    # Separator Line
+    ctx.draw.line([(ctx.width * 0.2, current_y), (ctx.width * 0.8, current_y)], fill=ctx.text_color, width=1)
+    current_y += 15
+
+    contact_font = fonts['contact']
+    for line in (fields.phone_number, fields.email, fields.website):
+        if line:
+            _draw_centered(ctx, current_y, line, contact_font, ctx.text_color)
+            current_y += contact_font.size + 5
+
+
+def _layout_modern_tech_business_card(ctx):
+    d, fields, fonts = ctx.draw, ctx.fields, ctx.fonts
+    name_font, title_font, contact_font = fonts['name'], fonts['title'], fonts['contact']
+
+    # Text content (right side of the bar)
+    text_start_x = ctx.width * 0.3 + 20
+    current_y = (ctx.height - (name_font.size + title_font.size + contact_font.size * 3 + 30)) / 2
+
+    d.text((text_start_x, current_y), fields.text or 'Tech Solutions Inc.', font=name_font, fill=ctx.text_color)
+    current_y += name_font.size + 5
+
+    d.text((text_start_x, current_y), fields.sub_text or 'Innovating the Future', font=title_font, fill=ctx.text_color)
+    current_y += title_font.size + 20
+
+    for line in (fields.phone_number, fields.email, fields.website):
+        if line:
+            d.text((text_start_x, current_y), line, font=contact_font, fill=ctx.text_color)
+            current_y += contact_font.size + 5
+
+
+def _layout_minimalist_qr_code_card(ctx):
+    fields, fonts = ctx.fields, ctx.fonts
+
+    qr_size = 100
+    qr_x = (ctx.width - qr_size) / 2
+    qr_y = (ctx.height - qr_size) / 2 - 20
+
+    payload = qr_payload(fields)
+    if not payload or not draw_qr(ctx.draw, qr_x, qr_y, qr_size, payload, ctx.text_color):
+        # Nothing to encode yet, or too much to scan at this size, so keep the placeholder square
+        ctx.draw.rectangle([(qr_x, qr_y), (qr_x + qr_size, qr_y + qr_size)], fill=ctx.text_color)
+        qr_placeholder_text = "QR Code Here"
+        qr_text_width, qr_text_height = _text_size(fonts['qr_text'], qr_placeholder_text)
+        ctx.draw.text((qr_x + (qr_size - qr_text_width) / 2, qr_y + (qr_size - qr_text_height) / 2), qr_placeholder_text, font=fonts['qr_text'], fill=ctx.bg_color)
+
+    # Name and website below QR
+    current_y = qr_y + qr_size + 15
+    _draw_centered(ctx, current_y, fields.text or 'Your Name', fonts['name'], ctx.text_color)
+    current_y += fonts['name'].size + 5
+
+    if fields.website:
+        _draw_centered(ctx, current_y, fields.website, fonts['website'], ctx.text_color)
+
+
+# --- Registry ---
+
+TOP_LEFT = Point(dx=20, dy=20)
+
+
+def _top_center(dy):
+    return Point(fx=0.5, dy=dy)
+
+
+def _top_right(margin):
+    return Point(fx=1.0, dx=-margin, dy=margin)
+
+
+HEADER_BAND = Rect(Point(), Point(fx=1.0, fy=0.25), 'text')
+
+TEMPLATES: Dict[str, TemplateSpec] = {}
+
+
+def register_template(spec):
+    TEMPLATES[spec.name] = spec
+    return spec
+
+
+# Unknown template types still get the background and an 80px logo in the corner
+DEFAULT_TEMPLATE = TemplateSpec('default', {}, LogoSlot(80), _layout_blank)
+
+
+def get_template(template_type):
+    return TEMPLATES.get(template_type, DEFAULT_TEMPLATE)
+
+
+for _spec in (
+    TemplateSpec('poster', {'main': 40, 'sub': 25, 'offer': 22, 'small': 18},
+                 LogoSlot(80, TOP_LEFT), _layout_poster),
+    TemplateSpec('businessCard', {'main': 30, 'sub': 20, 'small': 16},
+                 LogoSlot(60, _top_center(20), (0.5, 0)), _layout_business_card),
+    TemplateSpec('modernEventPoster', {'header': 50, 'body': 30, 'offer': 24, 'cta': 22, 'small': 18},
+                 LogoSlot(70, _top_center(30), (0.5, 0)), _layout_modern_event_poster,
+                 shapes=(HEADER_BAND,)),
+    TemplateSpec('minimalistBusinessCard', {'main': 35, 'sub': 22, 'small': 18},
+                 LogoSlot(50, TOP_LEFT), _layout_minimalist_business_card),
+    TemplateSpec('vibrantOfferPoster', {'header': 50, 'body': 35, 'offer': 28, 'cta': 26, 'small': 18},
+                 LogoSlot(60, _top_center(25), (0.5, 0)), _layout_vibrant_offer_poster,
+                 shapes=(HEADER_BAND,)),
+    TemplateSpec('professionalFlyer', {'main': 55, 'sub': 30, 'body': 22, 'small': 20},
+                 LogoSlot(70, _top_right(30), (1.0, 0)), _layout_professional_flyer),
+    TemplateSpec('socialMediaPost', {'main': 40, 'sub': 30, 'cta': 22},
+                 LogoSlot(60, TOP_LEFT), _layout_social_media_post),
+    TemplateSpec('eventTicket', {'main': 35, 'detail': 22, 'small': 18},
+                 LogoSlot(40, _top_right(20), (1.0, 0)), _layout_event_ticket,
+                 shapes=(Rect(Point(), Point(fy=1.0, dx=10), 'text'),)),
+    TemplateSpec('traditionalIndianBusinessCard', {'main': 28, 'sub': 18, 'small': 16},
+                 LogoSlot(60, TOP_LEFT), _layout_traditional_indian_business_card,
+                 shapes=(Rect(Point(), Point(fx=1.0, fy=0.5), '#004d40'),
+                         Rect(Point(fy=0.5), Point(fx=1.0, fy=1.0), '#e0b973'))),
+    TemplateSpec('productDiscountBanner', {'main': 60, 'sub': 35, 'offer': 25, 'website': 22},
+                 LogoSlot(70, TOP_LEFT), _layout_product_discount_banner),
+    TemplateSpec('inspirationalQuoteCard', {'quote': 40, 'author': 25, 'website': 18},
+                 LogoSlot(50, _top_right(20), (1.0, 0)), _layout_inspirational_quote_card),
+    TemplateSpec('eventInvitationCard', {'title': 45, 'event_name': 30, 'detail': 22, 'rsvp': 18},
+                 LogoSlot(60, _top_right(25), (1.0, 0)), _layout_event_invitation_card),
+    TemplateSpec('productShowcasePost', {'product_name': 50, 'tagline': 28, 'offer': 22, 'cta': 24},
+                 LogoSlot(80, _top_center(30), (0.5, 0)), _layout_product_showcase_post),
+    TemplateSpec('limitedTimeOfferBanner', {'main': 70, 'sub': 35, 'offer': 25, 'cta': 22},
+                 LogoSlot(60, TOP_LEFT), _layout_limited_time_offer_banner),
+    TemplateSpec('elegantContactCard', {'name': 35, 'title': 22, 'contact': 18},
+                 LogoSlot(60, _top_center(25), (0.5, 0)), _layout_elegant_contact_card),
+    TemplateSpec('modernTechBusinessCard', {'name': 35, 'title': 22, 'contact': 18},
+                 LogoSlot(70, Point(fx=0.15, fy=0.5), (0.5, 0.5)), _layout_modern_tech_business_card,
+                 shapes=(Rect(Point(), Point(fx=0.3, fy=1.0), 'text'),)),
+    TemplateSpec('minimalistQrCodeCard', {'name': 30, 'website': 18, 'qr_text': 12},
+                 LogoSlot(50, TOP_LEFT), _layout_minimalist_qr_code_card),
+):
+    register_template(_spec)
@@ -0,0 +1,138 @@
+# backend/rendering/text.py - Linear-time text wrapping for the design templates
+from typing import List, NamedTuple
+from weakref import WeakKeyDictionary
+
+from .fallback import font_fallback
+
+# Per-font measurement caches; fonts come from the registry so they are long-lived
+_width_cache = WeakKeyDictionary()  # font -> {text: advance width}
+_line_height_cache = WeakKeyDictionary()  # font -> base line height
+MAX_CACHED_WIDTHS_PER_FONT = 8192
+
+
+class WrappedLine(NamedTuple):
+    text: str
+    width: float
+
+
+class TextBlock(NamedTuple):
+    lines: List[WrappedLine]
+    line_height: float
+    height: float
+
+
+def measure_text(font, text):
+    """Advance width of ``text`` in ``font``, its fallback runs measured in their own fonts; cached per font."""
+    runs = font_fallback.runs(font, text)
+    if len(runs) == 1:
+        return _advance(runs[0][1], text)
+    return sum(_advance(run_font, run_text) for run_text, run_font in runs)
+
+
+def _advance(font, text):
+    widths = _width_cache.get(font)
+    if widths is None:
+        widths = _width_cache[font] = {}
+    width = widths.get(text)
+    if width is None:
+        if len(widths) >= MAX_CACHED_WIDTHS_PER_FONT:
+            widths.clear()
+        width = widths[text] = font.getlength(text)
+    return width
+
+
+def line_height_for(font, line_spacing_factor=1.2):
+    base_line_height = _line_height_cache.get(font)
+    if base_line_height is None:
+        try:
+            bbox = font.getbbox("Tg")
+            base_line_height = bbox[3] - bbox[1]
+        except Exception:
+            base_line_height = 0
+        if not base_line_height:  # Avoid division by zero or tiny height
+            base_line_height = font.size if getattr(font, 'size', 0) > 0 else 20
+        _line_height_cache[font] = base_line_height
+    return base_line_height * line_spacing_factor
+
+
+def wrap_text(text, font, max_width, line_spacing_factor=1.2):
+    """Greedy word wrap that measures every word and the space glyph exactly once.
+
+    Words are measured whole, so kerning inside a word is kept, and a line's
+    width is the running prefix sum of its words plus the joining spaces. The
+    returned widths are final, so callers can align lines without measuring
+    them again. A word wider than ``max_width`` gets a line of its own.
+    """
+    space_width = measure_text(font, ' ')
+    lines = []
+    current_words = []
+    current_width = 0.0
+
+    for word in text.split():
+        word_width = measure_text(font, word)
+        if not current_words:
+            current_words.append(word)
+            current_width = word_width
+            continue
+        candidate_width = current_width + space_width + word_width
+        if candidate_width <= max_width:
+            current_words.append(word)
+            current_width = candidate_width
+        else:
+            lines.append(WrappedLine(' '.join(current_words), current_width))
+            current_words = [word]
+            current_width = word_width
+    lines.append(WrappedLine(' '.join(current_words), current_width))
+
+    line_height = line_height_for(font, line_spacing_factor)
+    return TextBlock(lines, line_height, line_height * len(lines))
+
+
+def draw_text_wrapped(draw, text, font, fill, xy, max_width, line_spacing_factor=1.2):
+    """Draw ``text`` wrapped and centred within ``max_width``; returns the block height."""
+    block = wrap_text(text, font, max_width, line_spacing_factor)
+    x, y = xy
+    for line in block.lines:
+        draw.text((x + (max_width - line.width) / 2, y), line.text, font=font, fill=fill)
+        y += block.line_height
+    return block.height
+
+
+# Baseline offset from ``y`` for each vertical anchor, from the font's (ascent, descent)
+_BASELINE_OFFSETS = {
+    "a": lambda ascent, descent: ascent,
+    "t": lambda ascent, descent: ascent,
+    "m": lambda ascent, descent: (ascent - descent) / 2,
+    "s": lambda ascent, descent: 0,
+    "b": lambda ascent, descent: -descent,
+    "d": lambda ascent, descent: -descent,
+}
+
+
+class FallbackDraw:
+    """ImageDraw stand-in that draws each font-fallback run of a text in its own font.
+
+    Runs are laid side by side on the baseline the first font would use for
+    ``anchor``. Text a single font covers goes to ``draw`` untouched.
+    """
+
+    def __init__(self, draw):
+        self.draw = draw
+
+    def __getattr__(self, name):
+        return getattr(self.draw, name)
+
+    def text(self, xy, text, fill=None, font=None, anchor=None, **kwargs):
+        runs = font_fallback.runs(font, text) if font is not None else ()
+        if len(runs) <= 1 or "\n" in text:
+            run_font = runs[0][1] if len(runs) == 1 else font  # multiline text keeps the first font
+            return self.draw.text(xy, text, fill=fill, font=run_font, anchor=anchor, **kwargs)
+
+        horizontal, vertical = anchor or "la"
+        widths = [_advance(run_font, run_text) for run_text, run_font in runs]
+        x, y = xy
+        x -= {"m": sum(widths) / 2, "r": sum(widths)}.get(horizontal, 0)
+        y += _BASELINE_OFFSETS.get(vertical, _BASELINE_OFFSETS["a"])(*font.getmetrics())
+        for (run_text, run_font), width in zip(runs, widths):
+            self.draw.text((x, y), run_text, fill=fill, font=run_font, anchor="ls", **kwargs)
+            x += width
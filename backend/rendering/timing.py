@@ -0,0 +1,119 @@
+# backend/rendering/timing.py - Per-stage render timers, Server-Timing headers and latency histograms
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Distinct (template, size) series kept; further sizes are pooled under OTHER_SIZE
+MAX_SERIES = 512
+OTHER_SIZE = "other"
+
+
+class StageTimer:
+    """Wall time per named render stage, in milliseconds; repeated stages add up."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def server_timing_header(stages):
+    """A Server-Timing header value for ``stages``, followed by their total."""
+    metrics = [f"{name};dur={ms:.2f}" for name, ms in stages.items()]
+    metrics.append(f"total;dur={sum(stages.values()):.2f}")
+    return ", ".join(metrics)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram. Not locked; RenderMetrics holds the lock."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        index = 0
+        while index < len(LATENCY_BUCKETS_MS) and ms > LATENCY_BUCKETS_MS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, fraction):
+        """Upper bound of the bucket holding the ``fraction`` quantile (the max for the open bucket)."""
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def stats(self):
+        cumulative, buckets = 0, {}
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.50), 2),
+            "p95_ms": round(self.quantile(0.95), 2),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": buckets,
+        }
+
+
+class RenderMetrics:
+    """Latency histograms per template, output size and render stage."""
+
+    def __init__(self, max_series=MAX_SERIES):
+        self.max_series = max_series
+        self._series = {}  # (template, "WxH") -> stage -> LatencyHistogram
+        self._lock = threading.Lock()
+
+    def record(self, template_type, width, height, stages):
+        size = f"{width}x{height}"
+        with self._lock:
+            key = (template_type, size)
+            if key not in self._series and len(self._series) >= self.max_series:
+                key = (template_type, OTHER_SIZE)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = defaultdict(LatencyHistogram)
+            for stage, ms in stages.items():
+                series[stage].observe(ms)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def stats(self):
+        """Histograms by template and size, with the stage that costs the most on average."""
+        with self._lock:
+            snapshot = {key: {stage: h.stats() for stage, h in series.items()} for key, series in self._series.items()}
+        report = {}
+        for (template_type, size), stages in sorted(snapshot.items()):
+            timed = {stage: h["mean_ms"] for stage, h in stages.items() if stage != "total"}
+            report.setdefault(template_type, {})[size] = {
+                "hot_stage": max(timed, key=timed.get) if timed else None,
+                "stages": stages,
+            }
+        return report
+
+
+render_metrics = RenderMetrics()
@@ -0,0 +1,137 @@
+# backend/rendering/warmup.py - Startup warm-up of the render path, and the readiness it gates
+#
+# The first render after boot pays for Pillow plugin imports, font discovery,
+# FreeType setup, template compilation and base layer building. The warm-up
+# pays all of that before traffic arrives: every process that renders (the
+# server itself and each pool worker) runs warm_process once, and /health
+# reports not-ready until the server's warm-up has finished.
+import base64
+import io
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from PIL import Image
+
+from .encoders import DEFAULT_PROFILE
+from .fallback import font_fallback
+from .fonts import font_registry
+from .renderer import compile_plan, encode_prepared, prepare_design
+from .templates import TEMPLATES
+from .timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+# The editor's default canvas and the common social sizes
+WARM_UP_SIZES = ((800, 1000), (1080, 1080), (1080, 1920))
+
+
+def _sample_logo():
+    logo = io.BytesIO()
+    Image.new('RGBA', (200, 200), (30, 60, 90, 255)).save(logo, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(logo.getvalue()).decode()
+
+
+def warm_up_design():
+    """A design that exercises every field, the logo path and the QR code path."""
+    return {
+        'text': 'Grand Opening Celebration',
+        'subText': 'Join us this weekend',
+        'offerDetails': '50% off every item in store, this weekend only',
+        'phoneNumber': '555-123-4567',
+        'email': 'hello@example.com',
+        'website': 'https://shop.example.com',
+        'logo': _sample_logo(),
+    }
+
+
+# This process's warm-up result, so pool workers can report theirs
+_process_warm_up = None
+
+
+def warm_process(sizes=WARM_UP_SIZES, render=True):
+    """Warm this process: fonts, every template plan at ``sizes`` and, with ``render``, one render of each.
+
+    Returns the time of each phase and of each template's renders, in milliseconds.
+    """
+    global _process_warm_up
+    timer = StageTimer()
+    with timer.stage("fonts"):
+        font_registry.preload()
+        font_fallback.build()
+    with timer.stage("plans"):
+        for template_type in TEMPLATES:
+            for width, height in sizes:
+                compile_plan(template_type, width, height)
+
+    templates_ms = {}
+    if render:
+        with timer.stage("renders"):
+            prepared = prepare_design(warm_up_design())
+            for template_type in TEMPLATES:
+                start = time.perf_counter()
+                for width, height in sizes:
+                    encode_prepared(prepared, template_type, width, height, DEFAULT_PROFILE)
+                templates_ms[template_type] = round((time.perf_counter() - start) * 1000, 2)
+
+    _process_warm_up = {
+        "pid": os.getpid(),
+        "phases_ms": {name: round(ms, 2) for name, ms in timer.stages.items()},
+        "templates_ms": templates_ms,
+        "total_ms": round(sum(timer.stages.values()), 2),
+    }
+    return _process_warm_up
+
+
+def process_warm_up():
+    """This process's warm-up timings, warming it first if that has not happened yet."""
+    return _process_warm_up or warm_process()
+
+
+class Readiness:
+    """Whether the server has finished warming up, and what the warm-up cost."""
+
+    def __init__(self):
+        self._ready = threading.Event()
+        self.started_at = None
+        self.finished_at = None
+        self.duration_ms = None
+        self.timings = {}
+        self.error = None
+        self._start = None
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def begin(self):
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+
+    def finish(self, timings=None, error=None):
+        """Mark the server ready. A failed warm-up still ends in ready, since renders work, only slower."""
+        if error is not None:
+            logger.error(f"Render warm-up failed: {error}")
+            self.error = str(error)
+        self.timings = timings or {}
+        self.finished_at = datetime.now()
+        self.duration_ms = round((time.perf_counter() - (self._start or time.perf_counter())) * 1000, 2)
+        self._ready.set()
+
+    def wait(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def stats(self):
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+            **self.timings,
+        }
+
+
+readiness = Readiness()
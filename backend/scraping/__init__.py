@@ -0,0 +1,54 @@
+# backend/scraping - Fetching and reading the web pages designs are built from
+from .batch import (
+    MAX_BATCH_URLS,
+    SCRAPE_BATCH_CONCURRENCY,
+    parse_batch_urls,
+    scrape_batch,
+    scrape_error,
+    stream_scrape_batch,
+)
+from .cache import (
+    SCRAPE_CACHE_TTL_S,
+    ScrapeCache,
+    ScrapeEntry,
+    normalize_url,
+    scrape_cache,
+)
+from .client import (
+    HTTP2_AVAILABLE,
+    FetchedPage,
+    FetchError,
+    FetchTimeout,
+    ScrapeClient,
+    scrape_client,
+)
+from .extract import MAX_SCRAPE_BYTES, ContentExtractor, extract_content, sniff_encoding
+from .flight import SingleFlight, scrape_flights
+from .scraper import scrape_page
+
+__all__ = [
+    "ContentExtractor",
+    "FetchError",
+    "FetchTimeout",
+    "FetchedPage",
+    "HTTP2_AVAILABLE",
+    "MAX_BATCH_URLS",
+    "MAX_SCRAPE_BYTES",
+    "SCRAPE_BATCH_CONCURRENCY",
+    "SCRAPE_CACHE_TTL_S",
+    "ScrapeCache",
+    "ScrapeClient",
+    "ScrapeEntry",
+    "SingleFlight",
+    "extract_content",
+    "normalize_url",
+    "parse_batch_urls",
+    "scrape_batch",
+    "scrape_cache",
+    "scrape_client",
+    "scrape_error",
+    "scrape_flights",
+    "scrape_page",
+    "sniff_encoding",
+    "stream_scrape_batch",
+]
@@ -0,0 +1,116 @@
+# backend/scraping/batch.py - Scrapes a list of URLs concurrently, streaming each result as it completes
+#
+# A campaign built from a competitor's catalog needs dozens of pages. They are
+# scraped side by side, so a batch takes about as long as its slowest page
+# rather than the sum of all of them. At most SCRAPE_BATCH_CONCURRENCY run at
+# once, and no host gets more than the client's per-host share: a URL whose
+# host is busy waits while URLs of other hosts go ahead, so one large site
+# cannot hold up the rest of the batch.
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from .cache import scrape_cache
+from .client import FetchError, FetchTimeout, scrape_client
+from .scraper import scrape_page
+
+DEFAULT_MAX_BATCH_URLS = 100
+DEFAULT_SCRAPE_BATCH_CONCURRENCY = 16
+
+MAX_BATCH_URLS = int(os.getenv("MAX_SCRAPE_BATCH_URLS", DEFAULT_MAX_BATCH_URLS))
+SCRAPE_BATCH_CONCURRENCY = int(os.getenv("SCRAPE_BATCH_CONCURRENCY", DEFAULT_SCRAPE_BATCH_CONCURRENCY))
+
+
+def parse_batch_urls(urls):
+    """The URLs of a batch, stripped; raises ValueError for an empty or oversized batch."""
+    if not urls:
+        raise ValueError("At least one URL is required")
+    if len(urls) > MAX_BATCH_URLS:
+        raise ValueError(f"At most {MAX_BATCH_URLS} URLs are allowed per batch")
+    return [url.strip() for url in urls]
+
+
+def scrape_error(error):
+    """``(status, message)`` for an error raised by scrape_page, as /scrape-content reports it."""
+    if isinstance(error, FetchTimeout):
+        return 504, f"Failed to fetch URL: {error}"
+    if isinstance(error, FetchError):
+        return 500, f"Failed to fetch URL: {error}"
+    return 500, f"Failed to parse content: {error}"
+
+
+async def _scrape(url, client, cache):
+    try:
+        return await scrape_page(url, client, cache), None
+    except Exception as e:
+        return None, e
+
+
+async def scrape_batch(urls, concurrency=SCRAPE_BATCH_CONCURRENCY, per_host=None, client=scrape_client,
+                       cache=scrape_cache):
+    """Scrape ``urls`` concurrently, yielding ``(index, url, result, error)`` in the order they complete.
+
+    ``result`` is scrape_page's ``(main_text, sub_text)``, or None with the
+    exception in ``error``. ``per_host`` defaults to the client's per-host
+    connection limit.
+    """
+    per_host = per_host or client.max_connections_per_host
+    waiting = deque(enumerate(urls))
+    running_per_host = {}
+    pending = {}
+
+    def start_ready():
+        # Start the first waiting URLs whose host has room, keeping the others in order
+        skipped = deque()
+        while waiting and len(pending) < concurrency:
+            index, url = waiting.popleft()
+            host = urlsplit(url).netloc.lower()
+            if running_per_host.get(host, 0) >= per_host:
+                skipped.append((index, url))
+                continue
+            running_per_host[host] = running_per_host.get(host, 0) + 1
+            pending[asyncio.ensure_future(_scrape(url, client, cache))] = (index, url, host)
+        waiting.extendleft(reversed(skipped))
+
+    start_ready()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, url, host = pending.pop(task)
+                running_per_host[host] -= 1
+                result, error = task.result()
+                yield index, url, result, error
+            start_ready()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def stream_scrape_batch(urls, concurrency=SCRAPE_BATCH_CONCURRENCY):
+    """NDJSON of scrape_batch: a line per URL as it completes, then a ``{"summary": ...}`` line.
+
+    A line is ``{"index", "url", "ok", "main_text", "sub_text"}``, or
+    ``{"index", "url", "ok", "status", "error"}`` for a URL that failed; the
+    status is the one /scrape-content would have answered with.
+    """
+    start = time.perf_counter()
+    failed = 0
+    async for index, url, result, error in scrape_batch(urls, concurrency):
+        line = {"index": index, "url": url, "ok": error is None}
+        if error is None:
+            line["main_text"], line["sub_text"] = result
+        else:
+            failed += 1
+            line["status"], line["error"] = scrape_error(error)
+        yield (json.dumps(line) + "\n").encode()
+    summary = {
+        "total": len(urls),
+        "succeeded": len(urls) - failed,
+        "failed": failed,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+    yield (json.dumps({"summary": summary}) + "\n").encode()
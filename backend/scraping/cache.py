@@ -0,0 +1,175 @@
+# backend/scraping/cache.py - Cache of scrape results, revalidated with the page's own validators
+#
+# Users scrape the same product and landing pages over and over. A result is
+# kept with the page's ETag and Last-Modified validators: within the TTL it is
+# served as is, and after that a conditional GET asks the site whether the page
+# changed, so a 304 costs one small round trip and no download or parsing.
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCRAPE_CACHE_ENTRIES = 1024
+DEFAULT_SCRAPE_CACHE_TTL_S = 600
+
+SCRAPE_CACHE_ENTRIES = int(os.getenv("SCRAPE_CACHE_ENTRIES", DEFAULT_SCRAPE_CACHE_ENTRIES))
+SCRAPE_CACHE_TTL_S = float(os.getenv("SCRAPE_CACHE_TTL_S", DEFAULT_SCRAPE_CACHE_TTL_S))
+SCRAPE_CACHE_DIR = os.getenv("SCRAPE_CACHE_DIR") or None  # also keep results on disk, across restarts
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid", "ref_src"}
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url):
+    """The cache key form of ``url``: lowercase scheme and host, no default port, fragment or tracking
+    parameters, and the remaining query parameters sorted."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not name.lower().startswith("utm_") and name.lower() not in TRACKING_PARAMS)
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class ScrapeEntry(NamedTuple):
+    main_text: str
+    sub_text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float  # time.time() of the last fetch or successful revalidation
+
+    @property
+    def validators(self):
+        """Conditional request headers for revalidating this entry; empty when the page sent no validators."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ScrapeCache:
+    """LRU of scrape results by normalized URL, optionally backed by one JSON file per URL in ``directory``.
+
+    ``get`` tells fresh entries (younger than ``ttl``) from stale ones, which
+    the caller revalidates; the counters cover the whole lookup and
+    revalidation cycle.
+    """
+
+    def __init__(self, max_entries=DEFAULT_SCRAPE_CACHE_ENTRIES, ttl=DEFAULT_SCRAPE_CACHE_TTL_S, directory=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.not_modified = 0
+        self.stale_served = 0
+        self.evictions = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _read_disk(self, key):
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return ScrapeEntry(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable scrape cache file for {key}: {e}")
+            return None
+
+    def _write_disk(self, key, entry):
+        path = self._path(key)
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(entry._asdict(), f)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.warning(f"Could not write the scrape cache file for {key}: {e}")
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key):
+        """``(entry, fresh)`` for ``key``; ``(None, False)`` on a miss. A stale entry counts as a revalidation."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self.directory:
+            entry = self._read_disk(key)
+            if entry is not None:
+                with self._lock:
+                    self._remember(key, entry)
+                    self.disk_hits += 1
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None, False
+            if time.time() - entry.fetched_at < self.ttl:
+                self.hits += 1
+                return entry, True
+            self.revalidations += 1
+            return entry, False
+
+    def put(self, key, entry):
+        with self._lock:
+            self._remember(key, entry)
+        if self.directory:
+            self._write_disk(key, entry)
+
+    def refresh(self, key, entry):
+        """The site answered 304: ``entry`` is fresh again for another TTL."""
+        entry = entry._replace(fetched_at=time.time())
+        self.put(key, entry)
+        with self._lock:
+            self.not_modified += 1
+        return entry
+
+    def served_stale(self):
+        with self._lock:
+            self.stale_served += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.revalidations
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "disk": self.directory is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "not_modified": self.not_modified,
+                "stale_served": self.stale_served,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+scrape_cache = ScrapeCache(SCRAPE_CACHE_ENTRIES, SCRAPE_CACHE_TTL_S, SCRAPE_CACHE_DIR)
@@ -0,0 +1,207 @@
+# backend/scraping/client.py - Shared async HTTP client for fetching the pages the scraper reads
+#
+# Every scrape used to open its own TCP/TLS connection with a blocking
+# requests.get, holding the event loop for up to the whole timeout. One pooled
+# httpx.AsyncClient now serves all scrapes: connections are kept alive and
+# reused (multiplexed over HTTP/2 where the server and the h2 package allow),
+# each host gets a bounded share of them, and every fetch has connect, read
+# and total deadlines.
+import asyncio
+import os
+import time
+from typing import Mapping, NamedTuple
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (httpx only negotiates HTTP/2 when it is installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                      'Chrome/91.0.4472.124 Safari/537.36')
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 6  # what browsers allow per host
+DEFAULT_MAX_KEEPALIVE = 20
+DEFAULT_KEEPALIVE_EXPIRY_S = 30.0
+DEFAULT_CONNECT_TIMEOUT_S = 5.0
+DEFAULT_READ_TIMEOUT_S = 10.0
+DEFAULT_DEADLINE_S = 15.0  # the whole fetch: waiting for a connection, connecting, redirects and the body
+STREAM_CHUNK_BYTES = 64 * 1024  # of a streamed body, handed to the sink at once
+
+MAX_CONNECTIONS = int(os.getenv("SCRAPE_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("SCRAPE_MAX_CONNECTIONS_PER_HOST", DEFAULT_MAX_CONNECTIONS_PER_HOST))
+CONNECT_TIMEOUT_S = float(os.getenv("SCRAPE_CONNECT_TIMEOUT_S", DEFAULT_CONNECT_TIMEOUT_S))
+READ_TIMEOUT_S = float(os.getenv("SCRAPE_READ_TIMEOUT_S", DEFAULT_READ_TIMEOUT_S))
+DEADLINE_S = float(os.getenv("SCRAPE_DEADLINE_S", DEFAULT_DEADLINE_S))
+
+
+class FetchError(Exception):
+    """Raised when a page cannot be fetched: network errors, error statuses, unsupported URLs."""
+
+
+class FetchTimeout(FetchError):
+    """Raised when a fetch misses its connect, read or total deadline."""
+
+
+class FetchedPage(NamedTuple):
+    url: str  # after redirects
+    status_code: int
+    headers: Mapping[str, str]
+    text: str
+    http_version: str
+
+
+class _HostLimiter:
+    """One semaphore per host, dropped again once the host has nothing in flight."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._hosts = {}  # host -> [semaphore, fetches waiting or running, fetches running]
+
+    def in_flight(self):
+        return {host: running for host, (_, _, running) in self._hosts.items()}
+
+    async def __call__(self, host, fetch):
+        entry = self._hosts.setdefault(host, [asyncio.Semaphore(self.limit), 0, 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                entry[2] += 1
+                try:
+                    return await fetch()
+                finally:
+                    entry[2] -= 1
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._hosts[host]
+
+
+class ScrapeClient:
+    """Fetches pages over a pooled, keep-alive httpx.AsyncClient with per-host limits and deadlines.
+
+    The underlying client is created on first use, in the running event loop,
+    and closed by ``aclose`` when the server shuts down. Counters are only
+    touched from the event loop thread.
+    """
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, max_connections_per_host=MAX_CONNECTIONS_PER_HOST,
+                 connect_timeout=CONNECT_TIMEOUT_S, read_timeout=READ_TIMEOUT_S, deadline=DEADLINE_S,
+                 http2=HTTP2_AVAILABLE):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.deadline = deadline
+        self.http2 = http2
+        self._client = None
+        self._hosts = _HostLimiter(max_connections_per_host)
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.bytes_downloaded = 0
+        self.streams_stopped = 0  # streamed bodies whose sink was done before their end
+        self.http_versions = {}
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                follow_redirects=True,
+                headers={'User-Agent': DEFAULT_USER_AGENT},
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=min(DEFAULT_MAX_KEEPALIVE, self.max_connections),
+                                    keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY_S),
+                # pool: waiting for a free connection; the deadline bounds it as well
+                timeout=httpx.Timeout(connect=self.connect_timeout, read=self.read_timeout,
+                                      write=self.read_timeout, pool=self.deadline),
+            )
+        return self._client
+
+    async def fetch(self, url, headers=None, sink=None):
+        """GET ``url``, with extra request ``headers`` such as validators for a conditional GET.
+
+        With a ``sink``, such as a ContentExtractor, the body is not kept
+        (``text`` is empty): after ``sink.begin(charset)`` it is streamed into
+        ``sink.feed(chunk)``, in a worker thread since parsing is CPU-bound,
+        and the download stops at the first chunk that leaves the sink done.
+
+        Raises FetchTimeout past a deadline and FetchError for anything else that fails.
+        """
+        host = urlsplit(url).netloc.lower()
+        if not host:
+            raise FetchError(f"Unsupported URL '{url}', expected an absolute http(s) URL")
+        self.requests += 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(self._hosts(host, lambda: self._get(url, headers, sink)), self.deadline)
+        except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+            self.timeouts += 1
+            raise FetchTimeout(f"Timed out after {time.perf_counter() - start:.1f}s fetching {url}") from e
+        except httpx.HTTPStatusError as e:
+            self.errors += 1
+            raise FetchError(str(e)) from e
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            self.errors += 1
+            raise FetchError(f"{type(e).__name__}: {e}") from e
+        finally:
+            self.in_flight -= 1
+        self.http_versions[response.http_version] = self.http_versions.get(response.http_version, 0) + 1
+        return FetchedPage(str(response.url), response.status_code, response.headers,
+                           response.text if sink is None else "", response.http_version)
+
+    @staticmethod
+    def _check(response):
+        if response.status_code != 304:  # the answer to a conditional GET, not an error
+            response.raise_for_status()
+
+    async def _get(self, url, headers, sink):
+        client = self._get_client()
+        if sink is None:
+            response = await client.get(url, headers=headers)
+            self._check(response)
+            self.bytes_downloaded += response.num_bytes_downloaded
+            return response
+
+        # Leaving the block mid-body closes the response, dropping the rest of a large page unread
+        async with client.stream("GET", url, headers=headers) as response:
+            try:
+                self._check(response)
+                if response.status_code != 304:
+                    sink.begin(response.charset_encoding)
+                    async for chunk in response.aiter_bytes(STREAM_CHUNK_BYTES):
+                        if await asyncio.to_thread(sink.feed, chunk):
+                            self.streams_stopped += 1
+                            break
+            finally:
+                self.bytes_downloaded += response.num_bytes_downloaded
+        return response
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight,
+            "in_flight_per_host": self._hosts.in_flight(),
+            "bytes_downloaded": self.bytes_downloaded,
+            "streams_stopped": self.streams_stopped,
+            "http_versions": dict(self.http_versions),
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_connections_per_host": self.max_connections_per_host,
+            "deadlines_s": {"connect": self.connect_timeout, "read": self.read_timeout, "total": self.deadline},
+        }
+
+
+scrape_client = ScrapeClient()
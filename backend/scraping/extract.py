@@ -0,0 +1,275 @@
+# backend/scraping/extract.py - Pulls the headline and the first paragraph out of a page
+#
+# extract_content parses a whole page into a BeautifulSoup tree. The scraper
+# uses ContentExtractor instead: it is fed the body chunk by chunk as it
+# downloads, keeps no tree, and is done as soon as the headline and first
+# paragraph have been read, usually within the first few kilobytes, so the
+# rest of the page is never downloaded or parsed.
+import codecs
+import os
+import re
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+MAX_MAIN_TEXT = 100
+MAX_SUB_TEXT = 200
+DEFAULT_MAX_SCRAPE_BYTES = 2 * 1024 * 1024
+
+MAX_SCRAPE_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", DEFAULT_MAX_SCRAPE_BYTES))  # of a body, past which it is cut
+PARSE_SLICE_CHARS = 4096  # a chunk is parsed this much at a time, so parsing stops soon after it is done
+SNIFF_BYTES = 1024  # browsers look this far into a page for its <meta charset>
+
+BYTE_ORDER_MARKS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+# <meta charset="..."> and <meta http-equiv="Content-Type" content="text/html; charset=...">
+META_CHARSET = re.compile(rb'<meta[^>]*?charset\s*=\s*["\']?\s*([A-Za-z0-9._:-]+)', re.IGNORECASE)
+
+# Elements without an end tag, which never hold text (as in BeautifulSoup's tree builder)
+VOID_ELEMENTS = {
+    'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed', 'frame', 'hr', 'image', 'img', 'input',
+    'isindex', 'keygen', 'link', 'menuitem', 'meta', 'nextid', 'param', 'source', 'spacer', 'track', 'wbr',
+}
+HIDDEN_TEXT_ELEMENTS = {'script', 'style', 'template'}  # their text is not part of get_text()
+
+
+def sniff_encoding(head):
+    """The encoding of a page its headers do not name, from the first bytes of its body.
+
+    A byte order mark decides, then a ``<meta charset>`` in the first
+    SNIFF_BYTES. Failing both, the page is UTF-8 if ``head`` decodes as UTF-8,
+    otherwise windows-1252 (what browsers read unlabeled Latin-1 pages as).
+    """
+    for mark, encoding in BYTE_ORDER_MARKS:
+        if head.startswith(mark):
+            return encoding
+    match = META_CHARSET.search(head[:SNIFF_BYTES])
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode('ascii')).name
+        except LookupError:
+            pass
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head)
+    except UnicodeDecodeError:
+        return 'windows-1252'
+    return 'utf-8'
+
+
+def _truncate(text, limit):
+    return text[:limit - 3] + '...' if len(text) > limit else text
+
+
+def extract_content(html):
+    """``(main_text, sub_text)`` of a page: its first h1/h2 (else its title) and first paragraph (else its meta description)."""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    main_text = ''
+    title_tag = soup.find(['h1', 'h2'])
+    if title_tag:
+        main_text = title_tag.get_text(strip=True)
+    elif soup.title:
+        main_text = soup.title.get_text(strip=True)
+
+    sub_text = ''
+    first_p = soup.find('p')
+    if first_p:
+        sub_text = first_p.get_text(strip=True)
+    else:
+        meta_description = soup.find('meta', attrs={'name': 'description'})
+        if meta_description and meta_description.get('content'):
+            sub_text = meta_description['content'].strip()
+
+    return _truncate(main_text, MAX_MAIN_TEXT), _truncate(sub_text, MAX_SUB_TEXT)
+
+
+class _Capture:
+    """The text of one element being read: its stripped strings, joined, up to ``limit`` characters.
+
+    A string can arrive in several pieces, split where the chunks were, so
+    its pieces are held until a tag or comment ends it and only then stripped.
+    """
+
+    def __init__(self, depth, limit):
+        self.depth = depth  # open elements outside it; it ends when the stack is back to this depth
+        self.limit = limit
+        self.parts = []
+        self.length = 0
+        self.closed = False
+        self._pending = []  # pieces of the current string, leading whitespace dropped
+        self._pending_length = 0
+        self._pending_solid = 0  # length of the pending pieces without their trailing whitespace
+
+    def add(self, data):
+        if self.length + self._pending_solid > self.limit:
+            return  # one character past the limit is enough to truncate
+        if not self._pending:
+            data = data.lstrip()
+            if not data:
+                return
+        solid = len(data.rstrip())
+        if solid:
+            self._pending_solid = self._pending_length + solid
+        self._pending.append(data)
+        self._pending_length += len(data)
+
+    def end_string(self):
+        text = ''.join(self._pending).rstrip()
+        if text:
+            self.parts.append(text)
+            self.length += len(text)
+        self._pending.clear()
+        self._pending_length = self._pending_solid = 0
+
+    @property
+    def text(self):
+        return ''.join(self.parts)
+
+
+class ContentExtractor(HTMLParser):
+    """Incremental extract_content: feed it the body in chunks, then read ``result()``.
+
+    Gives the same ``(main_text, sub_text)`` as extract_content on the bytes it
+    was fed. It is ``done`` once the first h1/h2 and the first paragraph have
+    been closed, as nothing later in the page can change them (the title and
+    the meta description are only fallbacks), or once ``max_bytes`` were fed;
+    later chunks are ignored. Memory stays bounded by the open elements and
+    the captured text, whatever the size of the page.
+    """
+
+    def __init__(self, max_bytes=MAX_SCRAPE_BYTES, encoding=None):
+        super().__init__(convert_charrefs=True)
+        self.max_bytes = max_bytes
+        self.bytes_fed = 0
+        self.truncated = False  # stopped by max_bytes rather than by finding everything
+        self._decoder = None
+        self._head = b''  # the first bytes, held until there are enough to sniff the encoding from
+        self._closed_parser = False
+        self._stack = []  # names of the open elements
+        self._closed_void = {}  # void element -> start tags not followed by their redundant end tag yet
+        self._heading = None
+        self._title = None
+        self._paragraph = None
+        self._meta_description = None  # content of the first <meta name="description">, None when there is none
+        self.begin(encoding)
+
+    def begin(self, encoding):
+        """Decode the bytes fed from now on as ``encoding``; when None or unknown, sniff_encoding picks it."""
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace') if encoding else None
+        except LookupError:
+            self._decoder = None
+
+    @property
+    def done(self):
+        return self.truncated or (self._closed(self._heading) and self._closed(self._paragraph))
+
+    @staticmethod
+    def _closed(capture):
+        return capture is not None and capture.closed
+
+    def feed(self, data):
+        """Parse the next chunk of the body, ``bytes`` or ``str``; returns ``done``."""
+        if self.done:
+            return True
+        if isinstance(data, bytes):
+            room = self.max_bytes - self.bytes_fed
+            if len(data) >= room:
+                data, self.truncated = data[:room], True
+            self.bytes_fed += len(data)
+            if self._decoder is None:
+                self._head += data
+                if len(self._head) < SNIFF_BYTES and not self.truncated:
+                    return False
+                data, self._head = self._head, b''
+                self.begin(sniff_encoding(data))
+            data = self._decoder.decode(data, final=self.truncated)
+        self._parse(data)
+        return self.done
+
+    def _parse(self, text):
+        for start in range(0, len(text), PARSE_SLICE_CHARS):
+            super().feed(text[start:start + PARSE_SLICE_CHARS])
+            if self._closed(self._heading) and self._closed(self._paragraph):
+                break
+
+    def result(self):
+        """``(main_text, sub_text)`` from what was fed, truncated like extract_content."""
+        if not self._closed_parser:
+            self._closed_parser = True
+            if self._head:  # a body shorter than SNIFF_BYTES
+                self.begin(sniff_encoding(self._head))
+                self._parse(self._decoder.decode(self._head, final=True))
+            self.close()  # flushes text still buffered at the end of what was fed
+            self._end_strings()
+        if self._heading is not None:
+            main_text = self._heading.text
+        else:
+            main_text = self._title.text if self._title is not None else ''
+        if self._paragraph is not None:
+            sub_text = self._paragraph.text
+        else:
+            sub_text = (self._meta_description or '').strip()
+        return _truncate(main_text, MAX_MAIN_TEXT), _truncate(sub_text, MAX_SUB_TEXT)
+
+    def _open_captures(self):
+        return [capture for capture in (self._heading, self._title, self._paragraph)
+                if capture is not None and not capture.closed]
+
+    def _end_strings(self):
+        for capture in self._open_captures():
+            capture.end_string()
+
+    def handle_starttag(self, tag, attrs):
+        self._end_strings()
+        if tag == 'meta':
+            attrs = dict(attrs)
+            if self._meta_description is None and attrs.get('name') == 'description':
+                self._meta_description = attrs.get('content') or ''
+        if tag in VOID_ELEMENTS:
+            self._closed_void[tag] = self._closed_void.get(tag, 0) + 1
+            return
+        depth = len(self._stack)
+        self._stack.append(tag)
+        if tag in ('h1', 'h2') and self._heading is None:
+            self._heading = _Capture(depth, MAX_MAIN_TEXT)
+        elif tag == 'title' and self._title is None:
+            self._title = _Capture(depth, MAX_MAIN_TEXT)
+        elif tag == 'p' and self._paragraph is None:
+            self._paragraph = _Capture(depth, MAX_SUB_TEXT)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in VOID_ELEMENTS:
+            self._closed_void[tag] -= 1  # <br/> needs no end tag of its own
+        else:
+            self._end(tag)
+
+    def handle_endtag(self, tag):
+        if self._closed_void.get(tag):
+            self._closed_void[tag] -= 1  # the redundant end of <br>...</br>, as BeautifulSoup ignores it
+            return
+        self._end(tag)
+
+    def _end(self, tag):
+        self._end_strings()
+        # Like BeautifulSoup, an end tag closes everything opened since its start tag, and a stray one is ignored
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index] == tag:
+                del self._stack[index:]
+                break
+        else:
+            return
+        for capture in self._open_captures():
+            if len(self._stack) <= capture.depth:
+                capture.closed = True
+
+    def handle_data(self, data):
+        if self._stack and self._stack[-1] in HIDDEN_TEXT_ELEMENTS:
+            return
+        for capture in self._open_captures():
+            capture.add(data)
+
+    def handle_comment(self, data):
+        self._end_strings()
+
+    handle_decl = handle_pi = unknown_decl = handle_comment
@@ -0,0 +1,51 @@
+# backend/scraping/flight.py - Coalesces concurrent scrapes of the same page into one fetch
+#
+# A link shared across a team is scraped by many users within seconds. Until
+# the first scrape has filled the cache, every one of them would fetch and
+# parse the page again. The first caller for a URL now starts the one fetch,
+# and the callers arriving while it runs wait for it and get its result too.
+import asyncio
+
+
+class SingleFlight:
+    """At most one call in flight per key; callers arriving meanwhile share its result or its exception.
+
+    The call runs as a task of its own, so a caller that gives up (a client
+    hanging up) does not cancel it for the others. Counters are only touched
+    from the event loop thread.
+    """
+
+    def __init__(self):
+        self._calls = {}  # key -> future of the call in flight
+        self.calls = 0
+        self.coalesced = 0  # callers served by a call already in flight: the calls saved
+
+    def _finished(self, key, future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            future.exception()  # retrieved, even when every caller gave up waiting
+
+    async def run(self, key, call):
+        """The result of ``call()``, or of the call for ``key`` already in flight."""
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._finished(key, done))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def stats(self):
+        requests = self.calls + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "saved_rate": round(self.coalesced / requests, 4) if requests else 0.0,
+        }
+
+
+scrape_flights = SingleFlight()
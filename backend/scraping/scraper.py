@@ -0,0 +1,45 @@
+# backend/scraping/scraper.py - Scrapes a page through the result cache, the shared client and the extractor
+import asyncio
+import time
+
+from .cache import ScrapeEntry, normalize_url, scrape_cache
+from .client import FetchError, scrape_client
+from .extract import ContentExtractor
+from .flight import scrape_flights
+
+
+async def scrape_page(url, client=scrape_client, cache=scrape_cache, flights=scrape_flights):
+    """``(main_text, sub_text)`` of the page at ``url``, served from ``cache`` while fresh.
+
+    A stale entry is revalidated with a conditional GET and kept on a 304
+    without downloading or parsing the page again; it is also served when the
+    site cannot be reached. Concurrent scrapes of a URL that is not fresh in
+    the cache share one fetch through ``flights``. Raises FetchError
+    (FetchTimeout past a deadline).
+    """
+    key = normalize_url(url)
+    entry, fresh = cache.get(key)
+    if fresh:
+        return entry.main_text, entry.sub_text
+    return await flights.run(key, lambda: _fetch_page(url, key, entry, client, cache))
+
+
+async def _fetch_page(url, key, entry, client, cache):
+    # The page is parsed as it downloads, and only until its headline and first paragraph are in
+    extractor = ContentExtractor()
+    try:
+        page = await client.fetch(url, headers=entry.validators if entry is not None else None, sink=extractor)
+    except FetchError:
+        if entry is None:
+            raise
+        cache.served_stale()
+        return entry.main_text, entry.sub_text
+    if page.status_code == 304 and entry is not None:
+        entry = cache.refresh(key, entry)
+        return entry.main_text, entry.sub_text
+
+    main_text, sub_text = await asyncio.to_thread(extractor.result)
+    if "no-store" not in page.headers.get("cache-control", "").lower():
+        cache.put(key, ScrapeEntry(main_text, sub_text, page.headers.get("etag"), page.headers.get("last-modified"),
+                                   time.time()))
+    return main_text, sub_text
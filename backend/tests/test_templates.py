@@ -0,0 +1,18 @@
+# backend/tests/test_templates.py - Designs with cleared (null) fields render like ones that leave them out
+import pytest
+
+from rendering import encode_design
+
+NULL_CONTACT_FIELDS = {
+    'text': 'Grand Opening',
+    'website': None,
+    'qrUrl': None,
+    'phoneNumber': None,
+    'email': None,
+}
+
+
+@pytest.mark.parametrize("template_type", ["eventTicket", "minimalistQrCodeCard"])
+def test_null_contact_fields_render(template_type):
+    _, ok, _ = encode_design(NULL_CONTACT_FIELDS, template_type, 800, 1000)
+    assert ok